@@ -0,0 +1,260 @@
+"""Run the crawler against a local fixture server and report comparable performance numbers.
+
+    python benchmark.py --products 24 --latency 0.1 --jitter 0.05 --workers 2
+
+Every result is appended to ``benchmark_results.jsonl`` together with the
+commit and parameters, and compared with the previous result that used the
+same parameters.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from driver_manager import process_tree_rss
+from fixture_server import FixtureServer, RecordedSite, SyntheticSite
+from profiler import percentile
+
+base_path = os.path.dirname(os.path.abspath(__file__))
+
+# Stages that make up the work on one product (see main.TestAdidas.extract_product_page)
+PRODUCT_STAGES = ("pdp_http", "pdp_load", "change_check", "size_chart", "reviews", "extract", "coordinated_items")
+
+# Results that are compared across commits
+COMPARED = ("products_per_min", "latency_p50_s", "latency_p95_s", "webdriver_calls_per_product", "peak_rss_mb")
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=base_path, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=base_path,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class PeakMemory:
+    """Sample the resident memory of process trees (crawlers, chromedrivers and browsers) until stopped."""
+
+    def __init__(self, pids, interval=0.5):
+        self.pids = pids
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="peak-memory", daemon=True)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, sum(process_tree_rss(pid) for pid in self.pids))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+
+def _read_jsonl(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as jsonl_file:
+        return [json.loads(line) for line in jsonl_file if line.strip()]
+
+
+def product_latencies(execution_log):
+    """Seconds spent on each product, summed over its stages, from the execution log."""
+    per_product = {}
+    for record in execution_log:
+        if record.get("message") == "stage finished" and record.get("stage") in PRODUCT_STAGES \
+                and "product_index" in record:
+            per_product[record["product_index"]] = per_product.get(record["product_index"], 0.0) + record["duration"]
+    return sorted(per_product.values())
+
+
+def _execution_dir(run_dir):
+    return next((os.path.join(run_dir, name) for name in sorted(os.listdir(run_dir))
+                 if name.startswith("execution_")), run_dir)
+
+
+def _merged_stages(execution_dirs):
+    """Stage profiles of every process; counts and calls are summed, p50/p95 are the slowest process's."""
+    stages = {}
+    for execution_dir in execution_dirs:
+        profile_path = os.path.join(execution_dir, "profile.json")
+        if not os.path.exists(profile_path):
+            continue
+        with open(profile_path, encoding="utf-8") as profile_file:
+            for stage, entry in json.load(profile_file)["stages"].items():
+                merged = stages.setdefault(stage, {"count": 0, "p50_s": 0.0, "p95_s": 0.0, "webdriver_calls": 0})
+                merged["count"] += entry["count"]
+                merged["webdriver_calls"] += entry["webdriver_calls"]
+                merged["p50_s"] = max(merged["p50_s"], entry["p50_s"])
+                merged["p95_s"] = max(merged["p95_s"], entry["p95_s"])
+    return stages
+
+
+def summarize(run_dir, wall_s, peak_rss, nodes=0):
+    execution_dir = _execution_dir(run_dir)
+    # Shard workers log their products and profiles in their own run directories
+    execution_dirs = [execution_dir] + [_execution_dir(os.path.join(run_dir, f"node-{node}"))
+                                        for node in range(1, nodes + 1)]
+    rows = len(_read_jsonl(os.path.join(execution_dir, "products.jsonl")))
+    latencies = sorted(latency for directory in execution_dirs
+                       for latency in product_latencies(_read_jsonl(os.path.join(directory, "execution_log.jsonl"))))
+    stages = _merged_stages(execution_dirs)
+    calls = sum(entry["webdriver_calls"] for entry in stages.values())
+    product_calls = sum(entry["webdriver_calls"] for stage, entry in stages.items() if stage in PRODUCT_STAGES)
+    products = max(1, len(latencies))
+    return {
+        "products": rows,
+        "products_scraped": len(latencies),
+        "wall_s": round(wall_s, 2),
+        "products_per_min": round(rows / wall_s * 60, 2) if wall_s else 0.0,
+        "latency_p50_s": round(percentile(latencies, 0.50), 3),
+        "latency_p95_s": round(percentile(latencies, 0.95), 3),
+        "latency_max_s": round(latencies[-1], 3) if latencies else 0.0,
+        "webdriver_calls": calls,
+        "webdriver_calls_per_product": round(product_calls / products, 1),
+        "peak_rss_mb": round(peak_rss / 1024 / 1024, 1),
+        "stages": {stage: {key: entry[key] for key in ("count", "p50_s", "p95_s", "webdriver_calls")}
+                   for stage, entry in stages.items()},
+        "nodes": nodes,
+    }
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def crawler_env(base_url, run_dir, workers, http_extract=False, role="", coordinator=None):
+    env = dict(os.environ)
+    env.update({
+        "ADIDAS_BASE_URL": base_url,
+        "ADIDAS_RUN_DIR": run_dir,
+        "ADIDAS_STATE_DB": os.path.join(run_dir, "crawl_state.sqlite"),
+        "ADIDAS_EXCEL_PATH": os.path.join(run_dir, "adidas_products.xlsx"),
+        "ADIDAS_RESUME": "0",
+        # Every run starts from cold browser profiles so runs with the same parameters stay comparable
+        "ADIDAS_BROWSER_PROFILE_DIR": os.path.join(run_dir, "browser_profiles"),
+        "ADIDAS_WORKERS": str(workers),
+        "ADIDAS_OUTPUT_FORMAT": "jsonl",
+        "ADIDAS_HTTP_EXTRACT": "1" if http_extract else "0",
+        "ADIDAS_ROLE": role,
+    })
+    if coordinator:
+        env["ADIDAS_COORDINATOR"] = coordinator
+    env.pop("ADIDAS_PROFILE_TEXTFILE", None)
+    return env
+
+
+def run_crawler(base_url, run_dir, workers, timeout, http_extract=False, nodes=0):
+    """Crawl in one process, or with ``nodes`` shard-worker processes behind a coordinator process."""
+    if nodes:
+        coordinator = f"127.0.0.1:{free_port()}"
+        envs = [crawler_env(base_url, run_dir, workers, http_extract, "coordinator", coordinator)]
+        for node in range(1, nodes + 1):
+            node_dir = os.path.join(run_dir, f"node-{node}")
+            os.makedirs(node_dir, exist_ok=True)
+            envs.append(crawler_env(base_url, node_dir, workers, http_extract, "worker", coordinator))
+    else:
+        envs = [crawler_env(base_url, run_dir, workers, http_extract)]
+    started = time.monotonic()
+    processes = [subprocess.Popen([sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "main.py"],
+                                  cwd=base_path, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+                 for env in envs]
+    outputs = []
+    with PeakMemory([process.pid for process in processes]) as memory:
+        for process in processes:
+            outputs.append(process.communicate(timeout=timeout)[0])
+    returncode = max(process.returncode for process in processes)
+    return time.monotonic() - started, memory.peak, returncode, "\n".join(outputs)
+
+
+def previous_result(results_path, params):
+    previous = None
+    for result in _read_jsonl(results_path):
+        if result.get("params") == params:
+            previous = result
+    return previous
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=24, help="synthetic products (default 24)")
+    parser.add_argument("--page-size", type=int, default=12, help="products per listing page (default 12)")
+    parser.add_argument("--reviews", type=int, default=12, help="max reviews per product (default 12)")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response (default 0.05)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="latency varies by up to this many seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="ADIDAS_WORKERS for the crawl (default 1)")
+    parser.add_argument("--nodes", type=int, default=0,
+                        help="shard-worker processes behind a coordinator process (default 0: one process)")
+    parser.add_argument("--http", action="store_true", help="crawl with the HTTP fast path (ADIDAS_HTTP_EXTRACT=1)")
+    parser.add_argument("--recorded", help="directory of recorded pages with an index.json, instead of synthetic pages")
+    parser.add_argument("--timeout", type=int, default=3600, help="give up on the crawl after this many seconds")
+    parser.add_argument("--results", default=os.path.join(base_path, "benchmark_results.jsonl"))
+    parser.add_argument("--keep", action="store_true", help="keep the run directory (logs, rows, profile)")
+    args = parser.parse_args(argv)
+
+    if args.recorded:
+        site = RecordedSite(args.recorded)
+        params = {"recorded": os.path.abspath(args.recorded)}
+    else:
+        site = SyntheticSite(products=args.products, page_size=args.page_size, reviews=args.reviews,
+                             seed=args.seed, latency=args.latency)
+        params = {"products": args.products, "page_size": args.page_size, "reviews": args.reviews, "seed": args.seed}
+    params.update({"latency": args.latency, "jitter": args.jitter, "workers": args.workers, "http": args.http})
+    if args.nodes:
+        params["nodes"] = args.nodes
+
+    run_dir = tempfile.mkdtemp(prefix="adidas_bench_")
+    with FixtureServer(site, latency=args.latency, jitter=args.jitter, seed=args.seed) as server:
+        wall_s, peak_rss, returncode, output = run_crawler(server.base_url, run_dir, args.workers, args.timeout,
+                                                          http_extract=args.http, nodes=args.nodes)
+        requests_served = server.requests
+    if returncode != 0:
+        print(output)
+
+    result = {
+        "commit": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "params": params,
+        "returncode": returncode,
+        "requests_served": requests_served,
+        **summarize(run_dir, wall_s, peak_rss, nodes=args.nodes),
+    }
+    previous = previous_result(args.results, params)
+    with open(args.results, "a", encoding="utf-8") as results_file:
+        results_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    print(json.dumps({key: value for key, value in result.items() if key != "stages"}, ensure_ascii=False, indent=2))
+    if previous is not None:
+        print(f"Compared with {previous['commit']} ({previous['timestamp']}):")
+        for key in COMPARED:
+            before, after = previous.get(key), result.get(key)
+            if before:
+                print(f"  {key}: {before} -> {after} ({(after - before) / before:+.1%})")
+    if args.keep:
+        print(f"Run directory: {run_dir}")
+    else:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    return 0 if returncode == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+import logging
+import os
+import shutil
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger()
+
+# Profile contents that only grow and never make a restarted browser faster
+DISPOSABLE_DIRS = ("Crashpad", "ShaderCache", "GrShaderCache", "GraphiteDawnCache", "BrowserMetrics",
+                   os.path.join("Default", "GPUCache"), os.path.join("Default", "Service Worker", "CacheStorage"))
+
+# Files Chrome leaves behind to mark a profile as in use
+LOCK_FILES = ("SingletonLock", "SingletonSocket", "SingletonCookie")
+
+
+def directory_size(path):
+    """Bytes used by every file under ``path``."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+def lock_owner(profile_dir):
+    """PID of the live Chrome that holds ``profile_dir``, or None if it is free.
+
+    SingletonLock is a symlink to "<hostname>-<pid>"; a lock whose process is
+    gone was left by a crashed browser.
+    """
+    try:
+        target = os.readlink(os.path.join(profile_dir, "SingletonLock"))
+        pid = int(target.rsplit("-", 1)[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return None
+    except PermissionError:
+        pass
+    return pid
+
+
+def try_lock(path):
+    """Open ``path`` and take an exclusive, non-blocking flock on it; the open file, or None if it is held.
+
+    Without fcntl (Windows) every lock succeeds and slots are only exclusive within one process.
+    """
+    lock_file = open(path, "a")
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+class BrowserProfiles:
+    """Persistent Chrome profiles and disk caches reused across driver restarts.
+
+    Every browser leases a profile slot (``root/profile-<n>``) for as long as
+    it runs, so a recycled or pre-warmed browser starts with the cookies,
+    consent state and cached scripts, styles and fonts of the one before it,
+    and parallel browsers never open the same profile. A slot is held through
+    an flock on ``root/profile-<n>.lock`` for the whole lease, so crawler
+    processes sharing ``root`` (shard workers on one host, parallel runs)
+    never take or clean up each other's slots. Disk caches live under
+    one shared ``root/cache`` directory, one per slot (Chrome cannot share a
+    live cache between processes), each capped at ``cache_mb``. ``cleanup``
+    removes stale locks and disposable directories, wipes profiles grown past
+    ``max_profile_mb`` and drops the least recently used caches while all of
+    them together exceed ``max_cache_mb``.
+    """
+
+    def __init__(self, root, cache_mb=200, max_cache_mb=1000, max_profile_mb=500):
+        self.root = root
+        self.cache_root = os.path.join(root, "cache")
+        self.cache_mb = cache_mb
+        self.max_cache_mb = max_cache_mb
+        self.max_profile_mb = max_profile_mb
+        self._leased = {}
+        self._lock = threading.Lock()
+        self.stats = {"leases": 0, "new_profiles": 0, "wiped_profiles": 0, "dropped_caches": 0,
+                      "freed_mb": 0.0}
+        os.makedirs(self.cache_root, exist_ok=True)
+
+    def profile_dir(self, slot):
+        return os.path.join(self.root, f"profile-{slot}")
+
+    def cache_dir(self, slot):
+        return os.path.join(self.cache_root, f"profile-{slot}")
+
+    def lock_path(self, slot):
+        return os.path.join(self.root, f"profile-{slot}.lock")
+
+    def _try_slot(self, slot):
+        """The slot's held lock file if no browser of this or another process has the slot, else None."""
+        if slot in self._leased:
+            return None
+        lock_file = try_lock(self.lock_path(slot))
+        if lock_file is not None and lock_owner(self.profile_dir(slot)):
+            lock_file.close()
+            return None
+        return lock_file
+
+    def lease(self):
+        """Take the lowest free slot; returns (slot, profile_dir, cache_dir)."""
+        with self._lock:
+            slot = 1
+            lock_file = self._try_slot(slot)
+            while lock_file is None:
+                slot += 1
+                lock_file = self._try_slot(slot)
+            self._leased[slot] = lock_file
+            self.stats["leases"] += 1
+            if not os.path.isdir(self.profile_dir(slot)):
+                self.stats["new_profiles"] += 1
+        os.makedirs(self.profile_dir(slot), exist_ok=True)
+        os.makedirs(self.cache_dir(slot), exist_ok=True)
+        # Chrome writes inside the cache directory, not to it; mark the lease for least-recently-used cleanup
+        os.utime(self.cache_dir(slot))
+        return slot, self.profile_dir(slot), self.cache_dir(slot)
+
+    def release(self, slot):
+        with self._lock:
+            lock_file = self._leased.pop(slot, None)
+        if lock_file is not None:
+            lock_file.close()
+
+    def apply(self, options, slot):
+        """Point Chrome options at the slot's disk cache; the profile itself goes to uc.Chrome(user_data_dir=)."""
+        options.add_argument(f"--disk-cache-dir={self.cache_dir(slot)}")
+        options.add_argument(f"--disk-cache-size={self.cache_mb * 1024 * 1024}")
+
+    def bind(self, driver, slot):
+        """Release ``slot`` once ``driver`` has quit."""
+        quit_driver = driver.quit
+
+        def quit_and_release(*args, **kwargs):
+            try:
+                return quit_driver(*args, **kwargs)
+            finally:
+                self.release(slot)
+
+        driver.quit = quit_and_release
+        return driver
+
+    def _remove(self, path):
+        size = directory_size(path)
+        shutil.rmtree(path, ignore_errors=True)
+        self.stats["freed_mb"] = round(self.stats["freed_mb"] + size / (1024 * 1024), 1)
+
+    def _slots(self):
+        return sorted(int(name.split("-", 1)[1]) for name in os.listdir(self.root)
+                      if name.startswith("profile-") and name.split("-", 1)[1].isdigit())
+
+    def cleanup(self):
+        """Trim profiles and caches that no running browser holds; call before browsers start."""
+        with self._lock:
+            # Hold every free slot's lock while trimming so no other process starts a browser on it
+            held = {}
+            for slot in self._slots():
+                lock_file = self._try_slot(slot)
+                if lock_file is not None:
+                    held[slot] = lock_file
+            free = sorted(held)
+            try:
+                self._trim(free)
+            finally:
+                for lock_file in held.values():
+                    lock_file.close()
+        return dict(self.stats)
+
+    def _trim(self, free):
+        """Trim the profiles and caches of the ``free`` slots (call with their locks held)."""
+        for slot in free:
+            profile_dir = self.profile_dir(slot)
+            for name in LOCK_FILES:
+                path = os.path.join(profile_dir, name)
+                if os.path.lexists(path):
+                    os.remove(path)
+            for name in DISPOSABLE_DIRS:
+                if os.path.isdir(os.path.join(profile_dir, name)):
+                    self._remove(os.path.join(profile_dir, name))
+            if self.max_profile_mb and directory_size(profile_dir) > self.max_profile_mb * 1024 * 1024:
+                logger.info(f"Browser profile {profile_dir} is over {self.max_profile_mb} MB; starting it fresh")
+                self._remove(profile_dir)
+                self.stats["wiped_profiles"] += 1
+
+        if self.max_cache_mb:
+            caches = [(os.path.getmtime(self.cache_dir(slot)), slot) for slot in free
+                      if os.path.isdir(self.cache_dir(slot))]
+            total = directory_size(self.cache_root)
+            for _, slot in sorted(caches):
+                if total <= self.max_cache_mb * 1024 * 1024:
+                    break
+                size = directory_size(self.cache_dir(slot))
+                self._remove(self.cache_dir(slot))
+                total -= size
+                self.stats["dropped_caches"] += 1
+
+    def usage(self):
+        """Disk used by profiles and caches, in MB."""
+        cache = directory_size(self.cache_root)
+        return {"profiles_mb": round((directory_size(self.root) - cache) / (1024 * 1024), 1),
+                "cache_mb": round(cache / (1024 * 1024), 1)}
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+from extractor import build_row
+
+# Fields read from the first snapshot of a PDP; if none changed, the expensive sections are reused
+CHEAP_FIELDS = ("product_title", "price", "sizes", "number_of_reviews")
+
+# Row columns taken from the previous full extraction of an unchanged product
+REUSED_COLUMNS = ("Size info", "Title of description", "Description", "General description (itemization)",
+                  "User Reviews", "Coordinated product info")
+
+
+def cheap_fields(product):
+    return {field: product.get(field) for field in CHEAP_FIELDS}
+
+
+def fingerprint(fields):
+    return hashlib.sha1(json.dumps(fields, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def field_diff(old, new):
+    """{field: [old, new]} for every cheap field that changed."""
+    return {field: [old.get(field), new.get(field)] for field in CHEAP_FIELDS if old.get(field) != new.get(field)}
+
+
+class ChangeDetector:
+    """Skip full extraction of products whose cheap fields are unchanged since their last full extraction.
+
+    ``check`` compares a product's cheap fields (from its first snapshot)
+    with the snapshot stored in the crawl-state database and returns the
+    stored row when they match and it is younger than ``max_age_days``.
+    ``record`` saves fully extracted rows as the new snapshot and writes every
+    new or changed product to the JSONL diff report at ``report_path``.
+    """
+
+    def __init__(self, state, report_path, max_age_days=7, keep_reviews=True):
+        self.state = state
+        self.report_path = report_path
+        self.max_age = timedelta(days=max_age_days) if max_age_days else None
+        self.keep_reviews = keep_reviews
+        self.stats = {"new": 0, "changed": 0, "unchanged": 0, "refreshed": 0, "removed": 0}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._report = open(report_path, 'a', encoding="utf-8")
+
+    def _expired(self, snapshot):
+        if self.max_age is None:
+            return False
+        return datetime.now(timezone.utc) - datetime.fromisoformat(snapshot["updated_at"]) > self.max_age
+
+    def check(self, article, product):
+        """The stored row of ``article`` if its cheap fields match ``product``'s, else None."""
+        fields = cheap_fields(product)
+        snapshot = self.state.snapshot(article)
+        unchanged = snapshot is not None and snapshot["fingerprint"] == fingerprint(fields) \
+            and not self._expired(snapshot)
+        with self._lock:
+            self._pending[article] = (fields, snapshot, unchanged)
+        return snapshot["row"] if unchanged else None
+
+    def reuse(self, stored_row, product):
+        """Row of an unchanged product: the fields read now over the stored expensive sections."""
+        row = dict(stored_row)
+        fresh = build_row(product) or {}
+        row.update({column: value for column, value in fresh.items()
+                    if column not in REUSED_COLUMNS and value not in (None, "")})
+        if not self.keep_reviews:
+            row["User Reviews"] = []
+        return row
+
+    def _write(self, entry):
+        self._report.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._report.flush()
+
+    def record(self, article, url, row):
+        """Report a finished product; a fully extracted row becomes the snapshot for the next crawl."""
+        with self._lock:
+            fields, snapshot, unchanged = self._pending.pop(article, (None, None, False))
+            if fields is None:
+                return
+            if unchanged:
+                self.stats["unchanged"] += 1
+                return
+            status = "new" if snapshot is None else "changed"
+            changes = field_diff(snapshot["fields"], fields) if snapshot else {}
+            if snapshot is not None and not changes:
+                # Same cheap fields, but the snapshot was too old to reuse
+                status = "refreshed"
+            self.stats[status] += 1
+            if status != "refreshed":
+                self._write({"product": article, "url": url, "status": status, "changes": changes})
+        self.state.save_snapshot(article, fingerprint(fields), fields, row)
+
+    def report_removed(self, articles):
+        """Report and forget stored products that are not among ``articles`` (no longer listed)."""
+        articles = set(articles)
+        removed = [article for article in self.state.snapshot_products() if article not in articles]
+        self.state.delete_snapshots(removed)
+        with self._lock:
+            for article in removed:
+                self._write({"product": article, "url": None, "status": "removed", "changes": {}})
+            self.stats["removed"] += len(removed)
+        return removed
+
+    def close(self):
+        with self._lock:
+            if not self._report.closed:
+                self._report.close()
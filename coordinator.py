@@ -0,0 +1,359 @@
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from collections import deque
+
+from failures import classify
+
+logger = logging.getLogger()
+
+# Protocol: one JSON object per line over TCP, each request answered by one response line.
+#   {"op": "lease", "worker": name}                     -> {"lease": id, "items": [[index, url], ...], "ttl": s}
+#                                                          | {"wait": s} | {"done": true}
+#   {"op": "heartbeat", "lease": id}                    -> {"ok": bool} (false: the lease expired)
+#   {"op": "result", "lease": id, "index": i, "url": u,
+#    "row": row | null, "error": str | null, "category": str | null} -> {"ok": true}
+#   {"op": "complete", "lease": id}                     -> {"ok": true}
+
+
+def parse_address(address):
+    """(host, port) from 'host:port'."""
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class RemoteFailure(Exception):
+    """A product that failed on a shard worker, carrying the worker's failure class."""
+
+    def __init__(self, message, category=None):
+        super().__init__(message)
+        self.category = category
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = self.server.coordinator.handle(json.loads(line))
+            except Exception as e:
+                response = {"error": str(e)}
+            self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ShardCoordinator:
+    """Own the product frontier and lease shards of it to worker processes over TCP.
+
+    Links are split into shards of ``shard_size``. A worker leases one shard
+    at a time and must heartbeat within ``lease_ttl`` seconds; an expired
+    lease puts the shard's unfinished products back on the queue for another
+    worker, and after ``max_leases`` expiries they are recorded as failed.
+    Results are merged in product-link order like ProductWorkerPool.run, so
+    one output file is written no matter how many workers took part.
+    """
+
+    def __init__(self, address, shard_size=10, lease_ttl=300.0, max_leases=3, linger=10.0, log_error=None):
+        self.address = parse_address(address)
+        self.shard_size = max(1, int(shard_size))
+        self.lease_ttl = lease_ttl
+        self.max_leases = max_leases
+        self.linger = linger
+        self.log_error = log_error or logger.error
+
+        self._condition = threading.Condition()
+        self._shards = {}
+        self._queue = deque()
+        self._leases = {}
+        self._lease_counts = {}
+        self._finished = set()
+        self._total = 0
+        self._results = {}
+        self._rows = []
+        self._next_index = 1
+        self._on_row = None
+        self._on_done = None
+        self.workers = set()
+        self.stats = {"leases": 0, "expired": 0, "requeued": 0, "duplicates": 0, "completed": 0, "failed": 0}
+
+    def run(self, product_links, on_row=None, on_done=None):
+        """Serve leases until every link has a result; same contract as ProductWorkerPool.run."""
+        self._on_row = on_row
+        self._on_done = on_done
+        items = list(enumerate(product_links, start=1))
+        self._total = len(items)
+        for start in range(0, len(items), self.shard_size):
+            self._add_shard(items[start:start + self.shard_size])
+
+        server = _Server(self.address, _Handler)
+        server.coordinator = self
+        thread = threading.Thread(target=server.serve_forever, name="shard-coordinator", daemon=True)
+        thread.start()
+        logger.info(f"Coordinator on {self.address[0]}:{self.address[1]}: {self._total} products "
+                    f"in {len(self._queue)} shards")
+        started = time.monotonic()
+        try:
+            with self._condition:
+                while len(self._finished) < self._total:
+                    self._condition.wait(timeout=1.0)
+                    self._reap()
+            # Keep answering "done" for a while so idle workers exit instead of waiting for a connection
+            time.sleep(self.linger)
+        finally:
+            server.shutdown()
+            server.server_close()
+        logger.info(f"Coordinator: {self.stats} with {len(self.workers)} workers in "
+                    f"{time.monotonic() - started:.1f}s")
+        return self._rows
+
+    def _add_shard(self, items):
+        shard_id = len(self._shards) + 1
+        self._shards[shard_id] = items
+        self._queue.append(shard_id)
+
+    def handle(self, message):
+        op = message.get("op")
+        with self._condition:
+            self._reap()
+            if op == "lease":
+                return self._lease(message.get("worker"))
+            if op == "heartbeat":
+                lease = self._leases.get(message.get("lease"))
+                if lease is not None:
+                    lease["expires"] = time.monotonic() + self.lease_ttl
+                return {"ok": lease is not None}
+            if op == "result":
+                self._record(message)
+                return {"ok": True}
+            if op == "complete":
+                lease = self._leases.pop(message.get("lease"), None)
+                if lease is not None:
+                    self._requeue(lease["shard"])
+                return {"ok": True}
+        raise ValueError(f"Unknown op: {op}")
+
+    def _lease(self, worker):
+        self.workers.add(worker)
+        while self._queue:
+            shard_id = self._queue.popleft()
+            items = [item for item in self._shards[shard_id] if item[0] not in self._finished]
+            if not items:
+                continue
+            lease_id = uuid.uuid4().hex
+            self._leases[lease_id] = {"shard": shard_id, "worker": worker,
+                                      "expires": time.monotonic() + self.lease_ttl}
+            self._lease_counts[shard_id] = self._lease_counts.get(shard_id, 0) + 1
+            self.stats["leases"] += 1
+            return {"lease": lease_id, "items": items, "ttl": self.lease_ttl}
+        if len(self._finished) >= self._total:
+            return {"done": True}
+        # Everything left is leased; a lease may still expire and come back
+        return {"wait": min(5.0, self.lease_ttl)}
+
+    def _requeue(self, shard_id):
+        """Queue a shard again for its unfinished products, or fail them once it was leased too often."""
+        items = [item for item in self._shards[shard_id] if item[0] not in self._finished]
+        if not items:
+            return
+        if self._lease_counts.get(shard_id, 0) >= self.max_leases:
+            for index, url in items:
+                self._finish(index, url, None, RemoteFailure(f"Lease expired {self.max_leases} times", "other"))
+            return
+        self._queue.append(shard_id)
+        self.stats["requeued"] += 1
+
+    def _reap(self):
+        now = time.monotonic()
+        for lease_id, lease in list(self._leases.items()):
+            if lease["expires"] <= now:
+                del self._leases[lease_id]
+                self.stats["expired"] += 1
+                logger.warning(f"Lease of shard {lease['shard']} held by {lease['worker']} expired")
+                self._requeue(lease["shard"])
+
+    def _record(self, message):
+        index = message["index"]
+        if index in self._finished:
+            # A worker whose lease expired finished the product anyway
+            self.stats["duplicates"] += 1
+            return
+        error = RemoteFailure(message["error"], message.get("category")) if message.get("error") else None
+        self._finish(index, message["url"], message.get("row"), error)
+
+    def _finish(self, index, url, row, error):
+        self._finished.add(index)
+        self.stats["completed" if row else "failed"] += 1
+        self._results[index] = (url, row, error)
+        self._release()
+        self._condition.notify_all()
+
+    def _release(self):
+        """Hand finished rows to on_row in index order (call with the lock held)."""
+        while self._next_index in self._results:
+            url, row, error = self._results.pop(self._next_index)
+            if row and self._on_row:
+                try:
+                    self._on_row(self._next_index, row)
+                except Exception as e:
+                    self.log_error(f"Failed to handle row {self._next_index}: {e}")
+            elif row:
+                self._rows.append(row)
+            if self._on_done:
+                try:
+                    self._on_done(self._next_index, url, row, error)
+                except Exception as e:
+                    self.log_error(f"Failed to record result of ({url}): {e}")
+            self._next_index += 1
+
+
+class CoordinatorClient:
+    """Line-oriented JSON client for a ShardCoordinator; reconnects, waiting up to ``connect_timeout``."""
+
+    def __init__(self, address, connect_timeout=600.0, timeout=60.0):
+        self.address = parse_address(address)
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self._socket = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                self._socket = socket.create_connection(self.address, timeout=self.timeout)
+                self._file = self._socket.makefile("rwb")
+                return
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(1.0)
+
+    def _close(self):
+        for closable in (self._file, self._socket):
+            if closable is not None:
+                try:
+                    closable.close()
+                except OSError:
+                    pass
+        self._socket = self._file = None
+
+    def request(self, message):
+        with self._lock:
+            for attempt in (1, 2):
+                if self._file is None:
+                    self._connect()
+                try:
+                    self._file.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+                    self._file.flush()
+                    line = self._file.readline()
+                    if not line:
+                        raise ConnectionError("Coordinator closed the connection")
+                    response = json.loads(line)
+                    break
+                except OSError:
+                    self._close()
+                    if attempt == 2:
+                        raise
+        if "error" in response:
+            raise RuntimeError(f"Coordinator error: {response['error']}")
+        return response
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+class ShardWorker:
+    """Lease shards from a coordinator and scrape them with a local ProductWorkerPool until none are left.
+
+    ``on_done`` (optional) is called for every product before its result is
+    sent, so local state (review sync, change detection) is kept as usual; a
+    failing ``on_done`` is logged and the result is still sent. Once the
+    coordinator cannot be reached (restarted, or gone after its linger) the
+    worker sends nothing more and stops after the current shard.
+    """
+
+    def __init__(self, client, pool, name=None, on_done=None, heartbeat_every=None):
+        self.client = client
+        self.pool = pool
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.on_done = on_done
+        self.heartbeat_every = heartbeat_every
+        self.stats = {"shards": 0, "products": 0, "lost_leases": 0}
+        self._unreachable = False
+
+    def _heartbeat(self, lease_id, interval, stop):
+        while not stop.wait(interval):
+            try:
+                if not self.client.request({"op": "heartbeat", "lease": lease_id})["ok"]:
+                    # Finish the shard anyway; the coordinator ignores results it already has
+                    self.stats["lost_leases"] += 1
+                    logger.warning(f"Lease {lease_id} expired at the coordinator")
+                    return
+            except Exception as e:
+                logger.warning(f"Heartbeat failed: {e}")
+
+    def _request(self, message):
+        """The coordinator's response, or None once it cannot be reached (the worker then winds down)."""
+        if self._unreachable:
+            return None
+        try:
+            return self.client.request(message)
+        except (OSError, RuntimeError, ValueError) as e:
+            logger.info(f"Coordinator unreachable, stopping: {e}")
+            self._unreachable = True
+            return None
+
+    def run(self):
+        while not self._unreachable:
+            response = self._request({"op": "lease", "worker": self.name})
+            if response is None or response.get("done"):
+                break
+            if "wait" in response:
+                time.sleep(response["wait"])
+                continue
+            self._run_shard(response["lease"], response["items"], response["ttl"])
+        self.client.close()
+        return self.stats
+
+    def _run_shard(self, lease_id, items, ttl):
+        indexes = [index for index, _ in items]
+
+        def on_done(local_index, url, row, error):
+            if self.on_done is not None:
+                try:
+                    self.on_done(local_index, url, row, error)
+                except Exception as e:
+                    logger.error(f"Failed to record local state of ({url}): {e}")
+            message = str(error) if error is not None else None if row else "Required fields missing"
+            try:
+                category = classify(error, row)
+            except Exception:
+                category = "other"
+            if self._request({"op": "result", "lease": lease_id, "index": indexes[local_index - 1], "url": url,
+                              "row": row, "error": message, "category": category}) is not None:
+                self.stats["products"] += 1
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(lease_id, self.heartbeat_every or ttl / 3, stop),
+                                     name="lease-heartbeat", daemon=True)
+        heartbeat.start()
+        try:
+            self.pool.run([url for _, url in items], on_done=on_done)
+        finally:
+            stop.set()
+            heartbeat.join()
+        if self._request({"op": "complete", "lease": lease_id}) is not None:
+            self.stats["shards"] += 1
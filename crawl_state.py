@@ -0,0 +1,207 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    url TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    content_hash TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS products_status ON products (status, position);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS review_sync (
+    product TEXT PRIMARY KEY,
+    review_count INTEGER,
+    review_keys TEXT NOT NULL,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    product TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    row TEXT NOT NULL,
+    updated_at TEXT
+);
+"""
+
+# Newest review keys remembered per product for incremental review sync
+REVIEW_KEYS_KEPT = 50
+
+
+def content_hash(row):
+    """Stable fingerprint of an extracted row."""
+    return hashlib.sha256(json.dumps(row, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class CrawlStateStore:
+    """SQLite record of the product frontier and each product's extraction status.
+
+    A crawl starts with ``begin``. If the previous crawl never finished, it is
+    resumed: the stored frontier is reused and only products that are not
+    ``done`` (and have attempts left) are handed out again. The review-sync
+    and snapshot tables outlive crawls: they hold the review count and newest
+    review keys each product had when its reviews were last read, and its
+    last fully extracted row (see change_detection).
+    """
+
+    def __init__(self, path, max_attempts=3):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def _get_meta(self, key, default=None):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def begin(self, resume=True):
+        """Start a crawl; return True if an unfinished previous crawl is being resumed."""
+        with self._lock:
+            resuming = resume and self._get_meta("crawl_started", False) and not self._get_meta("crawl_complete", False)
+            if not resuming:
+                self._conn.execute("DELETE FROM products")
+                self._conn.execute("DELETE FROM meta")
+                self._set_meta("crawl_started", _now())
+            self._conn.commit()
+            return bool(resuming)
+
+    @property
+    def listing_complete(self):
+        with self._lock:
+            return self._get_meta("listing_complete", False)
+
+    def add_discovered(self, urls, complete=True):
+        """Record discovered product URLs (keeping first-seen order); ``complete`` marks the listing done."""
+        with self._lock:
+            position = self._conn.execute("SELECT COALESCE(MAX(position), 0) FROM products").fetchone()[0]
+            for url in urls:
+                position += 1
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO products (url, position, updated_at) VALUES (?, ?, ?)",
+                    (url, position, _now()))
+            if complete:
+                self._set_meta("listing_complete", True)
+            self._conn.commit()
+
+    def pending(self):
+        """Product URLs still to extract: never tried, or failed with attempts left."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url FROM products WHERE status != 'done' AND attempts < ? ORDER BY position",
+                (self.max_attempts,)).fetchall()
+        return [url for (url,) in rows]
+
+    def mark_done(self, url, row):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE products SET status = 'done', attempts = attempts + 1, last_error = NULL, "
+                "content_hash = ?, updated_at = ? WHERE url = ?",
+                (content_hash(row), _now(), url))
+            self._conn.commit()
+
+    def mark_failed(self, url, error):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE products SET status = 'failed', attempts = attempts + 1, last_error = ?, updated_at = ? "
+                "WHERE url = ?",
+                (str(error)[:2000], _now(), url))
+            self._conn.commit()
+
+    def review_sync(self, product):
+        """``{"count": ..., "keys": [...]}`` from the last review sync of ``product``, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT review_count, review_keys FROM review_sync WHERE product = ?",
+                                     (product,)).fetchone()
+        return {"count": row[0], "keys": json.loads(row[1])} if row else None
+
+    def save_review_sync(self, product, count, new_keys):
+        """Record the current review count and put ``new_keys`` (newest first) ahead of the known ones."""
+        with self._lock:
+            row = self._conn.execute("SELECT review_keys FROM review_sync WHERE product = ?", (product,)).fetchone()
+            known = json.loads(row[0]) if row else []
+            keys = list(dict.fromkeys(list(new_keys) + known))[:REVIEW_KEYS_KEPT]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO review_sync (product, review_count, review_keys, updated_at) "
+                "VALUES (?, ?, ?, ?)", (product, count, json.dumps(keys, ensure_ascii=False), _now()))
+            self._conn.commit()
+
+    def snapshot(self, product):
+        """The last full extraction of ``product``: fingerprint, cheap fields, row and updated_at; or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT fingerprint, fields, row, updated_at FROM snapshots WHERE product = ?",
+                                     (product,)).fetchone()
+        if row is None:
+            return None
+        return {"fingerprint": row[0], "fields": json.loads(row[1]), "row": json.loads(row[2]), "updated_at": row[3]}
+
+    def save_snapshot(self, product, fingerprint, fields, row):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots (product, fingerprint, fields, row, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (product, fingerprint, json.dumps(fields, ensure_ascii=False), json.dumps(row, ensure_ascii=False),
+                 _now()))
+            self._conn.commit()
+
+    def snapshot_products(self):
+        with self._lock:
+            return [product for (product,) in self._conn.execute("SELECT product FROM snapshots ORDER BY product")]
+
+    def delete_snapshots(self, products):
+        with self._lock:
+            self._conn.executemany("DELETE FROM snapshots WHERE product = ?", [(product,) for product in products])
+            self._conn.commit()
+
+    def discovered(self):
+        """Every product URL of the current crawl, in listing order."""
+        with self._lock:
+            return [url for (url,) in self._conn.execute("SELECT url FROM products ORDER BY position")]
+
+    def add_output(self, path):
+        """Remember a row file written by this crawl so the final export can merge every run."""
+        with self._lock:
+            outputs = self._get_meta("outputs", [])
+            if path not in outputs:
+                outputs.append(path)
+                self._set_meta("outputs", outputs)
+                self._conn.commit()
+
+    def outputs(self):
+        with self._lock:
+            return self._get_meta("outputs", [])
+
+    def finish(self):
+        """Mark the crawl complete if nothing retryable is left; return True if so."""
+        if self.pending():
+            return False
+        with self._lock:
+            self._set_meta("crawl_complete", True)
+            self._conn.commit()
+        return True
+
+    def counts(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM products GROUP BY status").fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
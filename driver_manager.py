@@ -0,0 +1,204 @@
+import logging
+import os
+import threading
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger()
+
+# undetected_chromedriver patches its chromedriver binary on start; never launch two at once
+_launch_lock = threading.Lock()
+
+CRASH_MARKERS = ("crash", "disconnected", "invalid session id", "no such window", "target window already closed",
+                 "chrome not reachable", "connection refused")
+
+
+def _children_map():
+    """ppid -> [pid] for every process, read from /proc (Linux fallback when psutil is missing)."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as stat_file:
+                # The command name may contain spaces; fields resume after the last ')'
+                fields = stat_file.read().rsplit(")", 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return children
+
+
+def _rss_from_proc(pid):
+    try:
+        with open(f"/proc/{pid}/statm", encoding="utf-8") as statm_file:
+            return int(statm_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def process_tree_rss(pid):
+    """Resident memory in bytes of a process and all of its descendants."""
+    if not pid:
+        return 0
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            total = process.memory_info().rss
+            for child in process.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except psutil.Error:
+                    continue
+            return total
+        except psutil.Error:
+            return 0
+    if not os.path.isdir("/proc"):
+        return 0
+    children = _children_map()
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        total += _rss_from_proc(current)
+        pending.extend(children.get(current, []))
+    return total
+
+
+def browser_pid(driver):
+    """PID of the Chrome browser process behind a driver, if it can be found."""
+    pid = getattr(driver, "browser_pid", None)
+    if pid:
+        return pid
+    service = getattr(driver, "service", None)
+    process = getattr(service, "process", None)
+    return getattr(process, "pid", None)
+
+
+def is_crash(error):
+    """True if a WebDriver error means the browser or renderer is gone."""
+    if not isinstance(error, WebDriverException) or isinstance(error, TimeoutException):
+        return False
+    message = str(error).lower()
+    return any(marker in message for marker in CRASH_MARKERS)
+
+
+class DriverLifecycle:
+    """Own one worker's browser and recycle it on measured health signals.
+
+    A driver is replaced when it has served ``max_pages`` pages, when its
+    process tree grows past ``max_rss_mb``, after ``max_timeouts`` page
+    timeouts, or immediately after a renderer/browser crash. With ``prewarm``
+    a spare driver is started in the background so a swap does not wait for
+    Chrome to start.
+    """
+
+    def __init__(self, driver_factory, max_pages=50, max_rss_mb=1500, max_timeouts=3, prewarm=True,
+                 rss_check_every=5):
+        self.driver_factory = driver_factory
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.max_timeouts = max_timeouts
+        self.prewarm = prewarm
+        self.rss_check_every = rss_check_every
+
+        self.driver = None
+        self.pages_served = 0
+        self.timeouts = 0
+        self.crashed = False
+        self.recycles = {}
+
+        self._spare = None
+        self._spare_thread = None
+
+    def _launch(self):
+        with _launch_lock:
+            return self.driver_factory()
+
+    def _start_spare(self):
+        if not self.prewarm or self._spare is not None or self._spare_thread is not None:
+            return
+
+        def warm():
+            try:
+                self._spare = self._launch()
+            except Exception as e:
+                logger.warning(f"Failed to pre-warm spare driver: {e}")
+
+        self._spare_thread = threading.Thread(target=warm, name="driver-prewarm", daemon=True)
+        self._spare_thread.start()
+
+    def _take_spare(self):
+        if self._spare_thread is not None:
+            self._spare_thread.join()
+            self._spare_thread = None
+        spare, self._spare = self._spare, None
+        return spare
+
+    def acquire(self):
+        """Return a healthy driver, recycling the current one first if needed."""
+        reason = self.recycle_reason()
+        if reason:
+            self.recycle(reason)
+        if self.driver is None:
+            self.driver = self._take_spare() or self._launch()
+            self.pages_served = 0
+            self.timeouts = 0
+            self.crashed = False
+        self._start_spare()
+        return self.driver
+
+    def report(self, error=None):
+        """Record the outcome of one page served by the current driver."""
+        self.pages_served += 1
+        if isinstance(error, TimeoutException):
+            self.timeouts += 1
+        elif error is not None and is_crash(error):
+            self.crashed = True
+
+    def rss_mb(self):
+        if self.driver is None:
+            return 0
+        return process_tree_rss(browser_pid(self.driver)) / (1024 * 1024)
+
+    def recycle_reason(self):
+        """Why the current driver should be replaced, or None if it is healthy."""
+        if self.driver is None:
+            return None
+        if self.crashed:
+            return "crash"
+        if self.max_timeouts and self.timeouts >= self.max_timeouts:
+            return "timeouts"
+        if self.max_pages and self.pages_served >= self.max_pages:
+            return "pages"
+        if (self.max_rss_mb and self.rss_check_every and self.pages_served
+                and self.pages_served % self.rss_check_every == 0 and self.rss_mb() > self.max_rss_mb):
+            return "rss"
+        return None
+
+    def recycle(self, reason):
+        """Swap in the spare driver and quit the old one off the crawl thread."""
+        old, self.driver = self.driver, None
+        self.recycles[reason] = self.recycles.get(reason, 0) + 1
+        logger.info(f"Recycling driver after {self.pages_served} pages ({reason})")
+        if old is not None:
+            threading.Thread(target=self._quit, args=(old,), name="driver-quit", daemon=True).start()
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        if self.driver is not None:
+            self._quit(self.driver)
+            self.driver = None
+        spare = self._take_spare()
+        if spare is not None:
+            self._quit(spare)
@@ -0,0 +1,398 @@
+import json
+import re
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+# Fields a product row cannot be written without
+REQUIRED_FIELDS = ("breadcrumb", "category", "product_title", "price", "image_url")
+
+
+def parse_html(html):
+    """Parse an HTML capture (page_source or outerHTML) into a soup."""
+    if isinstance(html, BeautifulSoup):
+        return html
+    return BeautifulSoup(html or "", PARSER)
+
+
+def _text_content(element):
+    """Equivalent of element.get_attribute('textContent').strip()."""
+    if element is None:
+        return None
+    return element.get_text().strip()
+
+
+def _visible_text(element):
+    """Approximation of WebElement.text (whitespace collapsed)."""
+    if element is None:
+        return None
+    return " ".join(element.get_text().split())
+
+
+def product_number_from_url(url):
+    """Article number from a product URL, e.g. .../IA4845.html -> IA4845."""
+    if not url:
+        return None
+    return url.split('?')[0].split('#')[0].rstrip('/').split('/')[-1].split('.')[0]
+
+
+def extract_breadcrumb(soup):
+    items = soup.select('ol[data-auto-id="breadcrumbs-desktop"] li')
+    if not items:
+        return None
+    breadcrumb_texts = []
+    for item in items[1:]:
+        name = item.select_one('[property="name"]')
+        if name is not None:
+            breadcrumb_texts.append(_visible_text(name))
+    return ' / '.join(breadcrumb_texts)
+
+
+def extract_category(soup):
+    return _text_content(soup.select_one('div[data-auto-id="product-category"] span'))
+
+
+def extract_image_url(soup, base_url=None):
+    img = soup.select_one('picture[data-testid="pdp-gallery-picture"] img')
+    if img is None or not img.get("src"):
+        return None
+    return urljoin(base_url, img["src"]) if base_url else img["src"]
+
+
+def extract_product_title(soup):
+    return _text_content(soup.select_one('h1[data-auto-id="product-title"] span'))
+
+
+def extract_price(soup):
+    price_element = soup.select_one('div[data-testid="main-price"]')
+    if price_element is None:
+        return None
+    spans = price_element.find_all("span")
+    if len(spans) >= 2:
+        return _text_content(spans[1])
+    return None
+
+
+def extract_sizes(soup):
+    buttons = soup.select('div[data-auto-id="size-selector"] button')
+    if not buttons:
+        return None
+    available_sizes = []
+    for button in buttons:
+        if "unavailable" in " ".join(button.get("class", [])):
+            continue
+        span = button.find("span")
+        if span is not None:
+            available_sizes.append(_visible_text(span))
+    return ', '.join(available_sizes)
+
+
+def parse_size_chart(html):
+    """Build the sizeInfo structure from the size-chart modal (or a page containing it)."""
+    soup = parse_html(html)
+    modal = soup.find("div", id="gl-modal__size-chart-modal") or soup
+    size_info = {}
+
+    for table in modal.find_all("table"):
+        thead = table.find("thead")
+        if not thead:
+            continue
+
+        headers = [th.get_text(strip=True) for th in thead.find_all("th")]
+        size_headers = headers[1:]
+
+        tbody = table.find("tbody")
+        if not tbody:
+            continue
+        for tr in tbody.find_all("tr"):
+            cells = [td.get_text(strip=True) for td in tr.find_all(["th", "td"])]
+            if len(cells) < 2:
+                continue
+
+            row_label = cells[0]
+            size_values = cells[1:]
+
+            size_dict = {}
+            for idx, size in enumerate(size_headers):
+                if idx < len(size_values):
+                    value = size_values[idx]
+                    if value:
+                        size_dict[size] = value
+
+            size_info.setdefault(row_label, []).append(size_dict)
+
+    return size_info
+
+
+def extract_overall_rating(soup):
+    container = soup.select_one('div[class*="ratings-label-container"]')
+    if container is None:
+        return None
+    return _text_content(container.find("span", recursive=False))
+
+
+def extract_number_of_reviews(soup):
+    header = soup.select_one('div[class*="reviews-header"]')
+    if header is None:
+        return None
+    h2 = header.find("h2", recursive=False)
+    if h2 is None:
+        return None
+    match = re.search(r'\((\d+)\)', _text_content(h2))
+    return int(match.group(1)) if match else 0
+
+
+def rating_from_masks(review):
+    """Count the star masks that are at least half filled."""
+    rating = 0
+    for mask in review.select(".gl-star-rating__mask"):
+        match = re.search(r'width:\s*(\d+)', mask.get("style", ""))
+        if match and int(match.group(1)) >= 50:
+            rating += 1
+    return rating
+
+
+def parse_reviews(html):
+    """Parse every rendered [data-auto-id="review"] into the reviews_data schema."""
+    soup = parse_html(html)
+    reviews_data = []
+    for review in soup.select('[data-auto-id="review"]'):
+        reviewer_element = review.select_one('span[class*="user-name"]')
+        date_element = review.select_one('span[class*="date"]')
+        title_element = review.find("h4")
+        desc_element = review.select_one('div[class*="text"]')
+        if None in (reviewer_element, date_element, title_element, desc_element):
+            continue
+
+        reviews_data.append({
+            "date": _text_content(date_element),
+            "rating": rating_from_masks(review),
+            "review_title": _text_content(title_element),
+            "review_description": _text_content(desc_element),
+            "reviewer_id": _text_content(reviewer_element)
+        })
+    return reviews_data
+
+
+def extract_description(soup):
+    """Return (title, description) from the description section."""
+    container = soup.select_one("#navigation-target-description")
+    if container is None:
+        return None, None
+    title_element = container.find("h3")
+    desc_element = container.select_one("p.gl-vspace")
+    if title_element is None or desc_element is None:
+        return None, None
+    return _text_content(title_element), _text_content(desc_element)
+
+
+def extract_itemization(soup):
+    container = soup.select_one("#navigation-target-specifications")
+    if container is None:
+        return None
+    items = container.select("li")
+    if not items:
+        return None
+    bullets = ["• " + _text_content(li) for li in items if _text_content(li)]
+
+    made_in_text = ""
+    for row in container.select(".gl-table__row--body"):
+        cells = row.select(".gl-table__cell")
+        if len(cells) < 2:
+            continue
+        label_elem = cells[0].select_one(".gl-table__cell-inner")
+        value_elem = cells[1].select_one(".gl-table__cell-inner")
+        if label_elem is None or value_elem is None:
+            continue
+        label = _text_content(label_elem)
+        value = _text_content(value_elem)
+        if "生産国" in label and value:
+            made_in_text = f"• {label}: {value}"
+            break
+
+    return "\n".join(bullets + ([made_in_text] if made_in_text else []))
+
+
+def extract_color_variants(soup, base_url=None):
+    """Article numbers of the other colors offered in the color chooser."""
+    variants = []
+    for link in soup.select('[data-auto-id="color-chooser"] a[href], [data-testid="color-chooser"] a[href]'):
+        number = product_number_from_url(urljoin(base_url, link["href"]) if base_url else link["href"])
+        if number and number not in variants:
+            variants.append(number)
+    return variants
+
+
+def extract_style_card_links(soup, base_url=None):
+    carousel = soup.find(id="gl-carousel-system")
+    if carousel is None:
+        return []
+    links = []
+    for link in carousel.select("a[data-testid='style-card']"):
+        href = link.get("href")
+        if href:
+            links.append(urljoin(base_url, href) if base_url else href)
+    return links
+
+
+def parse_product_cards(html, base_url=None):
+    """Parse the [data-testid="product-card"] entries of a style-card (coordinated look) page."""
+    soup = parse_html(html)
+    coordinated_items_info = []
+    for card in soup.select('[data-testid="product-card"]'):
+        link = card.find("a")
+        image = card.find("img")
+        price_element = card.select_one('[data-testid="main-price"] span:nth-child(2)')
+        if link is None or not link.get("href") or image is None or price_element is None:
+            continue
+        product_page_url = urljoin(base_url, link["href"]) if base_url else link["href"]
+        coordinated_items_info.append({
+            "product_page_url": product_page_url,
+            "product_number": product_number_from_url(product_page_url),
+            "image_url": image.get("src"),
+            "price": _visible_text(price_element)
+        })
+    return coordinated_items_info
+
+
+def parse_listing_links(html, base_url=None):
+    """Product links of a listing (PLP) page, in page order."""
+    soup = parse_html(html)
+    product_links = []
+    for link in soup.select('article[data-testid="plp-product-card"] a[data-testid="product-card-image-link"]'):
+        href = link.get("href")
+        if href:
+            product_links.append(urljoin(base_url, href) if base_url else href)
+    return product_links
+
+
+def extract_product(html, size_chart_html=None, base_url=None, reviews=None, size_info=None):
+    """Extract every field of a product page from a single HTML capture.
+
+    ``size_chart_html`` is the outerHTML of the size-chart modal when it was
+    captured separately; otherwise the modal is looked up in ``html``.
+    ``size_info`` is an already-parsed size chart (see size_chart.SizeChartCache).
+    ``reviews`` are already-harvested reviews; otherwise they are parsed from ``html``.
+    """
+    soup = parse_html(html)
+    title, description = extract_description(soup)
+    return {
+        "product_number": product_number_from_url(base_url),
+        "breadcrumb": extract_breadcrumb(soup),
+        "image_url": extract_image_url(soup, base_url),
+        "category": extract_category(soup),
+        "product_title": extract_product_title(soup),
+        "price": extract_price(soup),
+        "sizes": extract_sizes(soup),
+        "size_info": size_info if size_info is not None else parse_size_chart(
+            size_chart_html if size_chart_html is not None else soup),
+        "title": title,
+        "description": description,
+        "itemization": extract_itemization(soup),
+        "rating": extract_overall_rating(soup),
+        "number_of_reviews": extract_number_of_reviews(soup),
+        "reviews": reviews if reviews is not None else parse_reviews(soup),
+        "style_card_links": extract_style_card_links(soup, base_url),
+        "variants": extract_color_variants(soup, base_url),
+        "coordinated_items": [],
+    }
+
+
+def _json_ld_items(soup):
+    """Every JSON-LD object of a page, with @graph containers flattened."""
+    items = []
+    for script in soup.select('script[type="application/ld+json"]'):
+        try:
+            data = json.loads(script.string or script.get_text() or "null")
+        except ValueError:
+            continue
+        pending = data if isinstance(data, list) else [data]
+        while pending:
+            item = pending.pop(0)
+            if not isinstance(item, dict):
+                continue
+            items.append(item)
+            pending.extend(item.get("@graph") or [])
+    return items
+
+
+def _first(value):
+    return value[0] if isinstance(value, list) and value else value
+
+
+def _format_yen(price):
+    try:
+        return f"¥{int(float(price)):,}"
+    except (TypeError, ValueError):
+        return None
+
+
+def extract_structured_data(soup):
+    """Product fields from the page's JSON-LD (Product and BreadcrumbList), in the row's formats."""
+    fields = {}
+    for item in _json_ld_items(soup):
+        types = item.get("@type")
+        types = types if isinstance(types, list) else [types]
+        if "Product" in types:
+            offer = _first(item.get("offers")) or {}
+            rating = item.get("aggregateRating") or {}
+            review_count = rating.get("reviewCount", rating.get("ratingCount"))
+            fields.update({
+                "product_title": item.get("name"),
+                "image_url": _first(item.get("image")),
+                "price": _format_yen(offer.get("price")) if isinstance(offer, dict) else None,
+                "category": item.get("category"),
+                "description": item.get("description"),
+                "rating": str(rating["ratingValue"]) if rating.get("ratingValue") is not None else None,
+                "number_of_reviews": int(review_count) if str(review_count or "").isdigit() else None,
+            })
+        if "BreadcrumbList" in types:
+            elements = sorted(item.get("itemListElement") or [], key=lambda element: element.get("position", 0))
+            names = [element.get("name") or (element.get("item") or {}).get("name") for element in elements]
+            # The rendered breadcrumb leaves out the first (home) entry
+            fields["breadcrumb"] = " / ".join(name for name in names[1:] if name) or None
+    return {key: value for key, value in fields.items() if value is not None}
+
+
+def extract_product_static(html, base_url=None):
+    """Extract a product from server-rendered HTML (no browser), preferring the rendered fields.
+
+    Fields missing from the markup (typically rating, review count or price
+    on a page that renders them client-side) are filled from JSON-LD. The
+    size chart and reviews need the browser and are left empty.
+    """
+    soup = parse_html(html)
+    product = extract_product(soup, base_url=base_url, size_info={}, reviews=[])
+    for key, value in extract_structured_data(soup).items():
+        if product.get(key) in (None, ""):
+            product[key] = urljoin(base_url, value) if key == "image_url" and base_url else value
+    return product
+
+
+def build_row(product):
+    """Map an extracted product to the output row, or None if a required field is missing."""
+    if not all(product.get(field) for field in REQUIRED_FIELDS):
+        return None
+    return {
+        "Product number": product["product_number"],
+        "Breadcrumb": product["breadcrumb"],
+        "Image URL": product["image_url"],
+        "Category": product["category"],
+        "Product title": product["product_title"],
+        "Price": product["price"],
+        "Sizes": product["sizes"],
+        "Size info": product["size_info"],
+        "Title of description": product["title"],
+        "Description": product["description"],
+        "General description (itemization)": product["itemization"],
+        "Rating": product["rating"],
+        "Number of reviews": product["number_of_reviews"],
+        "User Reviews": product["reviews"],
+        "Coordinated product info": product["coordinated_items"],
+    }
@@ -0,0 +1,142 @@
+import logging
+import random
+import threading
+import time
+
+from driver_manager import is_crash
+from http_client import HttpError
+from rate_control import BotWallError, is_timeout
+
+logger = logging.getLogger()
+
+# Failure classes
+TIMEOUT = "timeout"
+BOT_WALL = "bot_wall"
+ELEMENT_MISSING = "element_missing"
+DRIVER_CRASH = "driver_crash"
+HTTP_ERROR = "http_error"
+OTHER = "other"
+
+# Worth retrying later in the same run
+RETRYABLE = (TIMEOUT, BOT_WALL, DRIVER_CRASH, HTTP_ERROR)
+
+# The page loaded but the product lacks a required field (sold out, no price): trying again in this run would
+# give the same page, and it says nothing about the site's health, so the circuit breaker counts it as a success
+PRODUCT_FAULTS = (ELEMENT_MISSING,)
+
+
+class ElementMissingError(Exception):
+    """A page loaded without an element every product page has (e.g. the price)."""
+
+
+def classify(error, row=None):
+    """Failure class of a product that raised ``error`` or produced no ``row``; None on success."""
+    if error is None:
+        return None if row else ELEMENT_MISSING
+    if getattr(error, "category", None):
+        # Already classified where it happened (a shard worker)
+        return error.category
+    if isinstance(error, BotWallError):
+        return BOT_WALL
+    if isinstance(error, ElementMissingError):
+        return ELEMENT_MISSING
+    if isinstance(error, HttpError):
+        return HTTP_ERROR if error.status in (403, 408, 429) or error.status >= 500 else OTHER
+    if is_crash(error):
+        return DRIVER_CRASH
+    if is_timeout(error):
+        return TIMEOUT
+    return OTHER
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter: ``base_delay * 2 ** (attempt - 1)``, capped at ``max_delay``."""
+
+    def __init__(self, max_attempts=3, base_delay=15.0, max_delay=300.0, jitter=0.2, retryable=RETRYABLE):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retryable = set(retryable)
+
+    def should_retry(self, category, attempt):
+        return category in self.retryable and attempt < self.max_attempts
+
+    def delay(self, attempt):
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+class CircuitBreaker:
+    """Pause the crawl while the recent failure rate is too high.
+
+    Opens when more than ``threshold`` of the last ``window`` products
+    failed (once at least ``min_requests`` were seen). After ``cooldown``
+    seconds it lets one product through; a success closes it, a failure
+    opens it again for twice as long (up to ``max_cooldown``).
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold=0.5, window=20, min_requests=10, cooldown=120.0, max_cooldown=1800.0):
+        self.threshold = threshold
+        self.window = window
+        self.min_requests = min_requests
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = self.CLOSED
+        self.trips = 0
+        self._recent = []
+        self._opened_at = 0.0
+        self._probing = False
+        self._probe_thread = None
+        self._condition = threading.Condition()
+
+    def wait(self):
+        """Block while the breaker is open; return the seconds spent waiting."""
+        waited = 0.0
+        with self._condition:
+            while True:
+                if self.state == self.CLOSED:
+                    return waited
+                remaining = self._opened_at + self.cooldown - time.monotonic()
+                if remaining <= 0 and not self._probing:
+                    self.state = self.HALF_OPEN
+                    self._probing = True
+                    self._probe_thread = threading.get_ident()
+                    return waited
+                started = time.monotonic()
+                self._condition.wait(timeout=remaining if remaining > 0 else None)
+                waited += time.monotonic() - started
+
+    def record(self, ok):
+        with self._condition:
+            # Only the product let through as the probe decides; stragglers from before the trip do not
+            if self.state == self.HALF_OPEN and self._probing and self._probe_thread == threading.get_ident():
+                self._probing = False
+                if ok:
+                    logger.info("Circuit breaker closed")
+                    self.state = self.CLOSED
+                    self.cooldown = self.base_cooldown
+                    self._recent = []
+                else:
+                    self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+                    self._open()
+                self._condition.notify_all()
+                return
+            self._recent = (self._recent + [ok])[-self.window:]
+            failures = self._recent.count(False)
+            if (self.state == self.CLOSED and len(self._recent) >= self.min_requests
+                    and failures / len(self._recent) > self.threshold):
+                self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.trips += 1
+        self._opened_at = time.monotonic()
+        logger.warning(f"Circuit breaker open: pausing the crawl for {self.cooldown:.0f}s")
+
+    def stats(self):
+        with self._condition:
+            return {"state": self.state, "trips": self.trips, "cooldown_s": self.cooldown}
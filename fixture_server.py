@@ -0,0 +1,337 @@
+import html
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+LISTING_PATH = "/メンズ-ウェア・服-tシャツ"
+LIVE_BASE_URL = "https://www.adidas.jp"
+
+# 1x1 transparent GIF served for every image
+PIXEL = (b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00"
+         b",\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;")
+
+CATEGORIES = ("メンズ オリジナルス", "メンズ スポーツウェア", "メンズ ランニング", "メンズ トレーニング")
+SIZES = ("XS", "S", "M", "L", "XL", "2XL")
+
+PAGE = """<!DOCTYPE html>
+<html lang="ja"><head><meta charset="utf-8"><title>{title}</title></head>
+<body>
+<nav><a href="/men">メンズ</a> <a href="{listing_path}">Tシャツ</a></nav>
+{body}
+</body></html>
+"""
+
+PDP_SCRIPT = """<script>
+const LATENCY_MS = {latency_ms};
+const SIZE_CHART = {size_chart};
+const REVIEWS = {reviews};
+const BATCH = {batch};
+document.querySelector('button[data-auto-id="size-chart-link"]').addEventListener("click", () => {{
+    setTimeout(() => {{
+        document.body.insertAdjacentHTML("beforeend", SIZE_CHART);
+        document.getElementById("gl-modal__close-size-chart-modal").addEventListener("click", () => {{
+            document.getElementById("gl-modal__size-chart-modal").remove();
+        }});
+    }}, LATENCY_MS);
+}});
+let shown = 0;
+function showBatch() {{
+    const list = document.getElementById("review-list");
+    list.insertAdjacentHTML("beforeend", REVIEWS.slice(shown, shown + BATCH).join(""));
+    shown = Math.min(shown + BATCH, REVIEWS.length);
+    if (shown >= REVIEWS.length) {{
+        document.querySelector("button[data-auto-id='reviews-load-more']").remove();
+    }}
+}}
+document.getElementById("navigation-target-reviews").addEventListener("click", () => {{
+    if (document.getElementById("review-list")) {{
+        return;
+    }}
+    setTimeout(() => {{
+        document.getElementById("reviews-section").innerHTML =
+            '<div class="reviews-header"><h2>レビュー (' + REVIEWS.length + ')</h2></div>' +
+            '<div id="review-list"></div><button data-auto-id="reviews-load-more">もっと見る</button>';
+        document.querySelector("button[data-auto-id='reviews-load-more']").addEventListener("click", () => {{
+            setTimeout(showBatch, LATENCY_MS);
+        }});
+        showBatch();
+    }}, LATENCY_MS);
+}});
+</script>"""
+
+
+def _e(text):
+    return html.escape(str(text), quote=True)
+
+
+class SyntheticSite:
+    """A deterministic imitation of the adidas.jp T-shirt listing, PDPs and style-card pages.
+
+    Pages carry the same selectors the crawler relies on; the size-chart
+    modal and review batches are rendered by in-page script after
+    ``latency`` so the interactive steps behave like the real site.
+    """
+
+    def __init__(self, products=24, page_size=12, reviews=12, review_batch=5, looks=6, seed=0, latency=0.0):
+        self.page_size = page_size
+        self.review_batch = review_batch
+        self.latency = latency
+        rng = random.Random(seed)
+        self.looks = {f"LOOK{n:03d}": [] for n in range(looks)}
+        self.products = []
+        models = {}
+        for n in range(products):
+            article = f"BM{n:04d}"
+            # Consecutive articles share a model in groups of three (color variants) with one set of reviews
+            model = n // 3
+            if model not in models:
+                models[model] = {
+                    "reviews": [self._review(rng, model, r) for r in range(rng.randint(1, max(1, reviews)))],
+                    "rating": round(rng.uniform(3.0, 5.0), 1),
+                }
+            self.products.append({
+                "article": article,
+                "slug": f"tee-{model}",
+                "model": model,
+                "name": f"ベンチマーク Tシャツ {model}",
+                "category": CATEGORIES[model % len(CATEGORIES)],
+                "price": f"¥{rng.randrange(3000, 12000, 100):,}",
+                "sizes": SIZES[:3 + model % 4],
+                "unavailable": {rng.choice(SIZES[:3])},
+                "reviews": models[model]["reviews"],
+                "rating": models[model]["rating"],
+                "looks": rng.sample(sorted(self.looks), min(2, looks)),
+            })
+        for product in self.products:
+            for look in product["looks"]:
+                if len(self.looks[look]) < 4:
+                    self.looks[look].append(product)
+        self._by_article = {product["article"]: product for product in self.products}
+
+    @staticmethod
+    def _review(rng, model, number):
+        stars = rng.randint(1, 5)
+        masks = "".join(f'<div class="gl-star-rating__mask" style="width: {100 if s < stars else 0}%"></div>'
+                        for s in range(5))
+        return (f'<div data-auto-id="review"><div class="gl-star-rating">{masks}</div>'
+                f'<span class="user-name">user{model}-{number}</span>'
+                f'<span class="date">2024/0{1 + number % 9}/1{number % 10}</span>'
+                f'<h4>レビュー {number}</h4><div class="text">モデル {model} のレビュー本文 {number}。</div></div>')
+
+    def _page(self, title, body):
+        return PAGE.format(title=_e(title), listing_path=LISTING_PATH, body=body)
+
+    def product_path(self, product):
+        return f"/{product['slug']}/{product['article']}.html"
+
+    def men(self):
+        return self._page("メンズ", '<main><h1>メンズ</h1></main>')
+
+    def listing(self, start):
+        cards = []
+        for product in self.products[start:start + self.page_size]:
+            cards.append(
+                f'<article data-testid="plp-product-card"><a data-testid="product-card-image-link" '
+                f'href="{self.product_path(product)}"><img src="/img/{product["article"]}.gif"></a>'
+                f'<p>{_e(product["name"])}</p></article>')
+        links = []
+        if start + self.page_size < len(self.products):
+            # Like the real site, only the next few pages are linked
+            for page in range(1, 3):
+                offset = start + self.page_size * page
+                if offset < len(self.products):
+                    links.append(f'<a href="{LISTING_PATH}?start={offset}">{offset // self.page_size + 1}</a>')
+            links.append(f'<a data-testid="pagination-next-button" '
+                         f'href="{LISTING_PATH}?start={start + self.page_size}">次へ</a>')
+        return self._page("Tシャツ", f'<main>{"".join(cards)}<nav class="pagination">{"".join(links)}</nav></main>')
+
+    def size_chart(self, product):
+        sizes = product["sizes"]
+        rows = "".join(
+            f'<tr><th>{label}</th>{"".join(f"<td>{base + 4 * i}</td>" for i in range(len(sizes)))}</tr>'
+            for label, base in (("胸囲", 80), ("ウエスト", 68), ("着丈", 64)))
+        return (f'<div id="gl-modal__size-chart-modal"><button id="gl-modal__close-size-chart-modal">×</button>'
+                f'<table><thead><tr><th>サイズ</th>{"".join(f"<th>{s}</th>" for s in sizes)}</tr></thead>'
+                f'<tbody>{rows}</tbody></table></div>')
+
+    def pdp(self, article):
+        product = self._by_article.get(article)
+        if product is None:
+            return None
+        variants = "".join(f'<a href="{self.product_path(other)}">{other["article"]}</a>'
+                           for other in self.products if other["model"] == product["model"])
+        sizes = "".join(
+            f'<button class="{"size-unavailable" if size in product["unavailable"] else ""}">'
+            f'<span>{size}</span></button>'
+            for size in product["sizes"])
+        looks = "".join(f'<a data-testid="style-card" href="/look/{look}">{look}</a>' for look in product["looks"])
+        body = f"""
+<ol data-auto-id="breadcrumbs-desktop"><li><a href="/"><span property="name">ホーム</span></a></li>
+<li><a href="/men"><span property="name">メンズ</span></a></li>
+<li><a href="{LISTING_PATH}"><span property="name">Tシャツ</span></a></li></ol>
+<div data-auto-id="product-category"><span>{_e(product["category"])}</span></div>
+<h1 data-auto-id="product-title"><span>{_e(product["name"])}</span></h1>
+<div data-testid="main-price"><span>価格</span><span>{product["price"]}</span></div>
+<picture data-testid="pdp-gallery-picture"><img src="/img/{article}.gif"></picture>
+<div data-auto-id="color-chooser">{variants}</div>
+<div data-auto-id="size-selector">{sizes}</div>
+<button data-auto-id="size-chart-link">サイズガイド</button>
+<div class="ratings-label-container"><span>{product["rating"]}</span></div>
+<section id="navigation-target-description"><h3>{_e(product["name"])} の特徴</h3>
+<p class="gl-vspace">ベンチマーク用の説明文です。モデル {product["model"]}。</p></section>
+<section id="navigation-target-specifications"><ul><li>レギュラーフィット</li><li>綿 100%</li></ul>
+<div class="gl-table"><div class="gl-table__row--body"><div class="gl-table__cell"><span class="gl-table__cell-inner">生産国</span></div>
+<div class="gl-table__cell"><span class="gl-table__cell-inner">ベトナム</span></div></div></div></section>
+<button id="navigation-target-reviews">レビュー</button>
+<section id="reviews-section"></section>
+<div id="gl-carousel-system">{looks}</div>
+"""
+        json_ld = {
+            "@context": "https://schema.org",
+            "@graph": [
+                {"@type": "Product", "name": product["name"], "sku": article, "category": product["category"],
+                 "image": [f"/img/{article}.gif"],
+                 "offers": {"@type": "Offer", "priceCurrency": "JPY",
+                            "price": product["price"].lstrip("¥").replace(",", "")},
+                 "aggregateRating": {"@type": "AggregateRating", "ratingValue": product["rating"],
+                                     "reviewCount": len(product["reviews"])}},
+                {"@type": "BreadcrumbList", "itemListElement": [
+                    {"@type": "ListItem", "position": position, "name": name}
+                    for position, name in enumerate(("ホーム", "メンズ", "Tシャツ"), start=1)]},
+            ],
+        }
+        body += f'<script type="application/ld+json">{json.dumps(json_ld, ensure_ascii=False)}</script>'
+        script = PDP_SCRIPT.format(latency_ms=int(self.latency * 1000), batch=self.review_batch,
+                                   size_chart=json.dumps(self.size_chart(product), ensure_ascii=False),
+                                   reviews=json.dumps(product["reviews"], ensure_ascii=False))
+        return self._page(product["name"], body + script)
+
+    def look(self, look_id):
+        products = self.looks.get(look_id)
+        if products is None:
+            return None
+        cards = "".join(
+            f'<div data-testid="product-card"><a href="{self.product_path(product)}">'
+            f'<img src="/img/{product["article"]}.gif"></a>'
+            f'<div data-testid="main-price"><span>価格</span><span>{product["price"]}</span></div></div>'
+            for product in products)
+        return self._page(look_id, f"<main>{cards}</main>")
+
+    def response(self, path, query):
+        """``(status, content_type, body)`` for a request path (percent-decoded) and query dict."""
+        if path.startswith("/img/"):
+            return 200, "image/gif", PIXEL
+        page = None
+        if path in ("/", "/men"):
+            page = self.men()
+        elif path == LISTING_PATH:
+            start = query.get("start", "0")
+            page = self.listing(int(start) if start.isdigit() else 0)
+        elif path.startswith("/look/"):
+            page = self.look(path.split("/")[-1])
+        elif path.endswith(".html"):
+            page = self.pdp(path.rsplit("/", 1)[-1][:-len(".html")])
+        if page is None:
+            return 404, "text/html; charset=utf-8", b"<html><body>Not found</body></html>"
+        return 200, "text/html; charset=utf-8", page.encode("utf-8")
+
+
+class RecordedSite:
+    """Replay pages saved from the live site.
+
+    ``directory/index.json`` maps a request path (with its query string,
+    percent-decoded) to a file in ``directory``; absolute links to the live
+    site are rewritten to the fixture server.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "index.json"), encoding="utf-8") as index_file:
+            self.index = json.load(index_file)
+        self.base_url = None
+
+    def response(self, path, query):
+        if path.startswith("/img/"):
+            return 200, "image/gif", PIXEL
+        key = path + ("?" + "&".join(f"{k}={v}" for k, v in query.items()) if query else "")
+        name = self.index.get(key) or self.index.get(path)
+        if name is None:
+            return 404, "text/html; charset=utf-8", b"<html><body>Not found</body></html>"
+        with open(os.path.join(self.directory, name), "rb") as page_file:
+            body = page_file.read()
+        if self.base_url:
+            body = body.replace(LIVE_BASE_URL.encode(), self.base_url.encode())
+        return 200, "text/html; charset=utf-8", body
+
+
+class FixtureServer:
+    """Serve a fixture site on localhost from a background thread, delaying every response.
+
+    Each response waits ``latency`` seconds plus up to ``jitter`` seconds
+    either way; the delays come from a seeded generator so runs repeat.
+    """
+
+    def __init__(self, site, latency=0.0, jitter=0.0, port=0, seed=0):
+        self.site = site
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+        if hasattr(site, "base_url"):
+            site.base_url = self.base_url
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def _delay(self):
+        with self._lock:
+            self.requests += 1
+            jitter = self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+        return max(0.0, self.latency + jitter)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, like a real front end
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                time.sleep(server._delay())
+                status, content_type, body = server.site.response(
+                    unquote(parts.path), dict(parse_qsl(parts.query, keep_blank_values=True)))
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fixture-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
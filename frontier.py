@@ -0,0 +1,96 @@
+import threading
+from urllib.parse import urlsplit, urlunsplit
+
+from extractor import product_number_from_url
+
+# Sections that are identical for every color variant of a model
+SHARED_SECTIONS = ("size_info", "title", "description", "rating", "number_of_reviews", "reviews")
+
+
+def canonicalize_product_url(url):
+    """Product URL without query string or fragment, with a lower-cased scheme and host."""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, "", ""))
+
+
+def product_key(url):
+    """Identity of a product page: its article number (e.g. IA4845), falling back to the canonical URL."""
+    number = product_number_from_url(canonicalize_product_url(url))
+    return number.upper() if number else canonicalize_product_url(url)
+
+
+class ProductFrontier:
+    """Canonical product links in first-seen order, one per article number."""
+
+    def __init__(self):
+        self._links = {}
+        self.duplicates = 0
+
+    def add_all(self, links):
+        """Add links; return how many were new."""
+        added = 0
+        for link in links:
+            key = product_key(link)
+            if key in self._links:
+                self.duplicates += 1
+                continue
+            self._links[key] = canonicalize_product_url(link)
+            added += 1
+        return added
+
+    def links(self):
+        return list(self._links.values())
+
+    def __len__(self):
+        return len(self._links)
+
+
+class VariantIndex:
+    """Group color variants into models and share their model-level sections.
+
+    The first variant of a model that is fully scraped stores its shared
+    sections; every later variant of that model reuses them instead of
+    opening the size chart and loading reviews again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models = {}
+        self._sections = {}
+        self.reused = 0
+
+    def register(self, article, variants):
+        """Record that ``article`` and ``variants`` belong to one model; return the model key."""
+        articles = {article.upper()} | {variant.upper() for variant in variants if variant}
+        with self._lock:
+            existing = sorted({self._models[a] for a in articles if a in self._models})
+            model = existing[0] if existing else article.upper()
+            for other in existing[1:]:
+                # Two groups turned out to be one model: fold the second into the first
+                for a, m in list(self._models.items()):
+                    if m == other:
+                        self._models[a] = model
+                if other in self._sections and model not in self._sections:
+                    self._sections[model] = self._sections.pop(other)
+            for a in articles:
+                self._models[a] = model
+            return model
+
+    def shared_sections(self, article):
+        """Model-level sections already scraped for a variant of ``article``'s model, or None."""
+        with self._lock:
+            model = self._models.get(article.upper())
+            sections = self._sections.get(model) if model else None
+            if sections is not None:
+                self.reused += 1
+            return sections
+
+    def store_sections(self, article, product):
+        with self._lock:
+            model = self._models.setdefault(article.upper(), article.upper())
+            self._sections.setdefault(model, {section: product.get(section) for section in SHARED_SECTIONS})
+
+    def stats(self):
+        with self._lock:
+            return {"articles": len(self._models), "models": len(set(self._models.values())),
+                    "models_with_sections": len(self._sections), "reused": self.reused}
@@ -0,0 +1,144 @@
+import gzip
+import http.client
+import threading
+import zlib
+from contextlib import nullcontext
+from urllib.parse import quote, urljoin, urlsplit
+
+from rate_control import BotWallError, is_bot_wall, retry_after_seconds
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+              "Chrome/122.0.0.0 Safari/537.36")
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# Characters left as they are when a request target is percent-encoded
+_SAFE_TARGET = "/?&=%:+,;@!$'()*~-._"
+
+
+class HttpError(Exception):
+    def __init__(self, url, status, message=""):
+        super().__init__(f"HTTP {status} for {url} {message}".strip())
+        self.url = url
+        self.status = status
+
+
+class HttpClient:
+    """HTML fetcher that presents the same user agent and cookies as the crawl browser.
+
+    Connections are kept alive and reused per thread and host, so worker
+    threads can share one client without sharing a socket. Requests are
+    paced by ``rate_limiter`` (a rate_control.RateLimiter) when one is given.
+    """
+
+    def __init__(self, user_agent=USER_AGENT, cookies=None, timeout=30, headers=None, max_redirects=5,
+                 rate_limiter=None):
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.max_redirects = max_redirects
+        self.headers = {
+            "User-Agent": user_agent,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "ja,en;q=0.8",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        }
+        self.headers.update(headers or {})
+        if cookies:
+            self.set_cookies(cookies)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "connections": 0, "reconnects": 0}
+
+    def set_cookies(self, cookies):
+        """Use cookies as returned by driver.get_cookies()."""
+        self.headers["Cookie"] = "; ".join(f"{cookie['name']}={cookie['value']}" for cookie in cookies)
+
+    @classmethod
+    def from_driver(cls, driver, **kwargs):
+        """A client that shares the browser session's user agent and cookies."""
+        user_agent = driver.execute_script("return navigator.userAgent;")
+        return cls(user_agent=user_agent, cookies=driver.get_cookies(), **kwargs)
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _connections(self):
+        if not hasattr(self._local, "connections"):
+            self._local.connections = {}
+        return self._local.connections
+
+    def _connection(self, scheme, netloc):
+        connections = self._connections()
+        connection = connections.get((scheme, netloc))
+        if connection is None:
+            connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            connection = connections[(scheme, netloc)] = connection_class(netloc, timeout=self.timeout)
+            self._count("connections")
+        return connection
+
+    def _drop(self, scheme, netloc):
+        connection = self._connections().pop((scheme, netloc), None)
+        if connection is not None:
+            connection.close()
+
+    def _send(self, url):
+        """One GET over a pooled connection; a stale keep-alive connection is retried once."""
+        parts = urlsplit(url)
+        target = quote(parts.path or "/", safe=_SAFE_TARGET)
+        if parts.query:
+            target += "?" + quote(parts.query, safe=_SAFE_TARGET)
+        for attempt in (1, 2):
+            connection = self._connection(parts.scheme, parts.netloc)
+            try:
+                connection.request("GET", target, headers=self.headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, OSError):
+                self._drop(parts.scheme, parts.netloc)
+                if attempt == 2:
+                    raise
+                self._count("reconnects")
+                continue
+            if response.getheader("Connection", "").lower() == "close":
+                self._drop(parts.scheme, parts.netloc)
+            self._count("requests")
+            return response, body
+
+    def _paced_send(self, url):
+        with self.rate_limiter.request(url) if self.rate_limiter else nullcontext() as outcome:
+            response, body = self._send(url)
+            if outcome is not None:
+                outcome.status = response.status
+                outcome.retry_after = retry_after_seconds(response.getheader("Retry-After"))
+                outcome.blocked = response.status in (200, 403) and is_bot_wall(
+                    body[:20000].decode("utf-8", errors="ignore"))
+        if outcome is not None and outcome.blocked:
+            raise BotWallError(url)
+        return response, body
+
+    def get_text(self, url):
+        for _ in range(self.max_redirects + 1):
+            response, body = self._paced_send(url)
+            location = response.getheader("Location")
+            if response.status in REDIRECT_STATUSES and location:
+                url = urljoin(url, location)
+                continue
+            break
+        else:
+            raise HttpError(url, response.status, "(too many redirects)")
+        if response.status >= 400:
+            raise HttpError(url, response.status)
+        encoding = response.getheader("Content-Encoding", "")
+        charset = response.msg.get_content_charset() or "utf-8"
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "deflate":
+            body = zlib.decompress(body)
+        return body.decode(charset, errors="replace")
+
+    def close(self):
+        """Close this thread's pooled connections."""
+        for scheme, netloc in list(self._connections()):
+            self._drop(scheme, netloc)
@@ -0,0 +1,158 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from extractor import parse_html, parse_listing_links
+from frontier import ProductFrontier
+
+logger = logging.getLogger()
+
+
+def _query(url):
+    return dict(parse_qsl(urlsplit(url).query, keep_blank_values=True))
+
+
+def page_url(url, param, offset):
+    """``url`` with its pagination parameter set to ``offset`` (removed for offset 0)."""
+    parts = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != param]
+    if offset:
+        query.append((param, str(offset)))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def has_next_page(html):
+    """True if a listing page links a next page (the last page has no next button)."""
+    return parse_html(html).select_one('a[data-testid="pagination-next-button"][href]') is not None
+
+
+def learn_pagination(first_url, html):
+    """Work out the listing's offset scheme from its first page.
+
+    Returns ``(param, start, step, last)`` where ``last`` is the highest
+    offset linked from the page (None if none is), or None when the page
+    has no next link. Later pages may exist beyond ``last``.
+    """
+    soup = parse_html(html)
+    next_link = soup.select_one('a[data-testid="pagination-next-button"]')
+    if next_link is None or not next_link.get("href"):
+        return None
+    next_url = urljoin(first_url, next_link["href"])
+    current, following = _query(first_url), _query(next_url)
+    for param, value in following.items():
+        if not value.isdigit():
+            continue
+        start_value = current.get(param, "0")
+        start = int(start_value) if start_value.isdigit() else 0
+        step = int(value) - start
+        if step <= 0:
+            continue
+        last = None
+        for link in soup.select('a[href]'):
+            offset = _query(urljoin(first_url, link["href"])).get(param)
+            if offset and offset.isdigit() and (int(offset) - start) % step == 0:
+                last = max(last or 0, int(offset))
+        return param, start, step, last
+    return None
+
+
+class ListingDiscovery:
+    """Fetch and parse every listing page concurrently from URLs computed off the first page.
+
+    ``fetch(url) -> html`` is called from worker threads. Pages it fails on
+    are retried with ``fallback_fetch`` (e.g. the crawl browser), which is
+    only ever called from the calling thread, before the next window of pages
+    is probed. ``complete`` tells whether the end of the listing was proven
+    (an empty page, or a page without a next link) with no page lost, so a
+    site that answers past its end with a 404, a redirect or its last page
+    again is still seen to end.
+    """
+
+    def __init__(self, fetch, concurrency=4, max_pages=200, fallback_fetch=None):
+        self.fetch = fetch
+        self.concurrency = max(1, concurrency)
+        self.max_pages = max_pages
+        self.fallback_fetch = fallback_fetch
+        self.pages_fetched = 0
+        self.failed_pages = []
+        self.complete = False
+
+    @staticmethod
+    def _page(url, html):
+        """(product links, whether the page links a next page)."""
+        return parse_listing_links(html, url), has_next_page(html)
+
+    def _fetch_links(self, url):
+        try:
+            return url, self._page(url, self.fetch(url)), None
+        except Exception as e:
+            return url, None, e
+
+    def discover(self, first_url, first_html):
+        """Product links of the whole listing, or None if its pages cannot be fetched over HTTP."""
+        frontier = ProductFrontier()
+        frontier.add_all(parse_listing_links(first_html, first_url))
+        self.pages_fetched = 1
+        self.failed_pages = []
+        self.complete = False
+
+        scheme = learn_pagination(first_url, first_html)
+        if scheme is None:
+            self.complete = True
+            return frontier.links()
+        param, start, step, last = scheme
+        logger.info(f"Listing pagination: {param} += {step}, last offset {last}")
+
+        next_offset = start + step
+        end = start + step * self.max_pages
+        fetched_over_http = False
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="listing") as executor:
+            while next_offset < end:
+                if last is not None and next_offset <= last:
+                    # Pages linked from the first page are known to exist: fetch them all at once
+                    batch = list(range(next_offset, last + 1, step))
+                else:
+                    # Probe a window of pages past the known ones; an empty page marks the end
+                    batch = list(range(next_offset, min(end, next_offset + step * self.concurrency), step))
+                next_offset = batch[-1] + step
+                results = list(executor.map(
+                    self._fetch_links, [page_url(first_url, param, offset) for offset in batch]))
+                if not fetched_over_http and all(error is not None for _, _, error in results):
+                    logger.warning("Listing pages cannot be fetched over HTTP")
+                    return None
+                fetched_over_http = True
+
+                window_failed = True
+                for url, page, error in results:
+                    if error is not None:
+                        # A failed page (e.g. a burst of 429s) says nothing about where the listing ends
+                        logger.warning(f"Listing page failed over HTTP ({url}): {error}")
+                        page = self._fallback(url)
+                    if page is None:
+                        continue
+                    window_failed = False
+                    links, has_next = page
+                    if links:
+                        self.pages_fetched += 1
+                        frontier.add_all(links)
+                    if not links or not has_next:
+                        # An empty page, or the last page, ends the listing
+                        self.complete = not self.failed_pages
+                        return frontier.links()
+                if window_failed:
+                    logger.error(f"No listing page of offsets {batch[0]}-{batch[-1]} could be fetched; "
+                                 f"the listing is incomplete")
+                    return frontier.links()
+        logger.warning(f"Listing still had products after {self.max_pages} pages; the listing is incomplete")
+        return frontier.links()
+
+    def _fallback(self, url):
+        if self.fallback_fetch is None:
+            self.failed_pages.append(url)
+            return None
+        try:
+            return self._page(url, self.fallback_fetch(url))
+        except Exception as e:
+            logger.error(f"Listing page failed ({url}): {e}")
+            self.failed_pages.append(url)
+            return None
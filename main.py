@@ -1,32 +1,147 @@
 import os
-import pytz
+from contextlib import ExitStack
 from datetime import datetime
 import logging
 import pytest
-import unicodedata
 from selenium.common.exceptions import TimeoutException
-import traceback
-import time
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from difflib import SequenceMatcher
 from selenium.webdriver.common.action_chains import ActionChains
 import undetected_chromedriver as uc
-from bs4 import BeautifulSoup
-import json
-import re
-import pandas as pd
+from extractor import extract_product, extract_product_static, build_row, parse_product_cards, parse_listing_links
+from worker_pool import ProductWorkerPool
+from sinks import open_sink, export_excel, when_durable
+from tables import NormalizedSink
+from crawl_state import CrawlStateStore
+from style_cache import StyleCardCache
+from review_harvester import harvest_reviews, review_count, review_key
+from readiness import ReadinessWait, WaitStats
+from resource_policy import ResourcePolicy, enable_performance_log
+from text_matcher import PageTextIndex
+from run_logging import RunLogger, JST
+from screenshots import ScreenshotPipeline, ScreenshotPolicy
+from listing import ListingDiscovery
+from frontier import ProductFrontier, VariantIndex, product_key
+from http_client import HttpClient
+from rate_control import BotWallError, RateLimiter, is_bot_wall
+from failures import CircuitBreaker, ElementMissingError, RetryPolicy, classify
+from size_chart import SizeChartCache, size_chart_identity, size_chart_identity_from_html
+from profiler import RunProfiler
+from change_detection import ChangeDetector
+from coordinator import CoordinatorClient, ShardCoordinator, ShardWorker
+from browser_profile import BrowserProfiles
 
 
 base_path = os.path.dirname(os.path.abspath(__file__))
-excel_path = os.path.join(base_path, 'adidas_products.xlsx')
+excel_path = os.environ.get('ADIDAS_EXCEL_PATH', os.path.join(base_path, 'adidas_products.xlsx'))
+
+# Site to crawl (the benchmark points this at its local fixture server) and where run directories go
+BASE_URL = os.environ.get('ADIDAS_BASE_URL', 'https://www.adidas.jp').rstrip('/')
+RUN_DIR = os.environ.get('ADIDAS_RUN_DIR', base_path)
+
+# Number of concurrent product-page browsers
+WORKER_COUNT = int(os.environ.get('ADIDAS_WORKERS', '1'))
+
+# When a product-page browser is replaced (see driver_manager.DriverLifecycle)
+RECYCLE_POLICY = {
+    "max_pages": int(os.environ.get('ADIDAS_MAX_PAGES_PER_DRIVER', '50')),
+    "max_rss_mb": int(os.environ.get('ADIDAS_MAX_DRIVER_RSS_MB', '1500')),
+    "max_timeouts": int(os.environ.get('ADIDAS_MAX_DRIVER_TIMEOUTS', '3')),
+    "prewarm": os.environ.get('ADIDAS_PREWARM_DRIVER', '1') == '1',
+}
+
+# Persistent per-browser profiles (cookies, consent) and disk caches reused across restarts; '' for throwaway ones
+BROWSER_PROFILE_DIR = os.environ.get('ADIDAS_BROWSER_PROFILE_DIR', os.path.join(base_path, 'browser_profiles'))
+BROWSER_PROFILE_LIMITS = {
+    "cache_mb": int(os.environ.get('ADIDAS_DISK_CACHE_MB', '200')),
+    "max_cache_mb": int(os.environ.get('ADIDAS_MAX_CACHE_MB', '1000')),
+    "max_profile_mb": int(os.environ.get('ADIDAS_MAX_PROFILE_MB', '500')),
+}
+
+# Crawl-state database; an interrupted crawl is resumed unless ADIDAS_RESUME=0
+STATE_DB_PATH = os.environ.get('ADIDAS_STATE_DB', os.path.join(base_path, 'crawl_state.sqlite'))
+RESUME = os.environ.get('ADIDAS_RESUME', '1') == '1'
+MAX_ATTEMPTS = int(os.environ.get('ADIDAS_MAX_ATTEMPTS', '3'))
+
+# Read only reviews added since the last run (see review_harvester); rows then carry just the new reviews
+REVIEW_SYNC = os.environ.get('ADIDAS_REVIEW_SYNC', '0') == '1'
+
+# Reuse the last full extraction of products whose title, price, sizes and review count are unchanged,
+# re-extracting fully once it is older than ADIDAS_CHANGE_MAX_AGE_DAYS; changes go to changes.jsonl
+CHANGE_DETECTION = os.environ.get('ADIDAS_CHANGE_DETECTION', '0') == '1'
+CHANGE_MAX_AGE_DAYS = float(os.environ.get('ADIDAS_CHANGE_MAX_AGE_DAYS', '7'))
+
+# Coordinated-look (style-card) cache shared by all products of a run
+STYLE_CACHE_TTL = int(os.environ.get('ADIDAS_STYLE_CACHE_TTL', '3600'))
+STYLE_CACHE_SIZE = int(os.environ.get('ADIDAS_STYLE_CACHE_SIZE', '512'))
+
+# Reuse a parsed size chart, without opening the modal, for PDPs with the same breadcrumb, category, size labels,
+# size-chart link and fit line (a heuristic, so off by default); identical charts are parsed once either way
+SIZE_CHART_CACHE = os.environ.get('ADIDAS_SIZE_CHART_CACHE', '0') == '1'
+
+# Block images, fonts, media and tag scripts per crawl phase (see resource_policy.PROFILES)
+RESOURCE_POLICY = os.environ.get('ADIDAS_RESOURCE_POLICY', '1') == '1'
+
+# Bulk payloads in the execution log: 'none', 'summary' (counts) or 'full'
+LOG_PAYLOADS = os.environ.get('ADIDAS_LOG_PAYLOADS', 'summary')
+
+# Screenshots: policy 'all', 'errors' or 'sample:N'; optional comma-separated stages ('menu_check' for the men's
+# menu label check, 'listing' for listing navigation failures, 'product' for failed product pages); png, jpeg or webp
+SCREENSHOT_POLICY = os.environ.get('ADIDAS_SCREENSHOTS', 'all')
+SCREENSHOT_STAGES = [stage for stage in os.environ.get('ADIDAS_SCREENSHOT_STAGES', '').split(',') if stage]
+SCREENSHOT_FORMAT = os.environ.get('ADIDAS_SCREENSHOT_FORMAT', 'png')
+SCREENSHOT_LOADER_TIMEOUT = 5
+
+# Listing pages fetched in parallel over HTTP
+LISTING_CONCURRENCY = int(os.environ.get('ADIDAS_LISTING_CONCURRENCY', '4'))
+
+# Run profile (stage p50/p95, WebDriver calls per stage); the Prometheus textfile defaults to the execution dir
+PROFILE_TEXTFILE = os.environ.get('ADIDAS_PROFILE_TEXTFILE')
+
+# Read PDPs over HTTP (markup + JSON-LD) and start a browser only for the size chart and reviews
+HTTP_EXTRACT = os.environ.get('ADIDAS_HTTP_EXTRACT', '0') == '1'
+
+# Per-host pacing of every page load and HTTP fetch: token bucket plus AIMD concurrency (see rate_control)
+RATE_CONTROL = os.environ.get('ADIDAS_RATE_CONTROL', '1') == '1'
+RATE_POLICY = {
+    "rate": float(os.environ.get('ADIDAS_RATE', '2')),
+    "max_rate": float(os.environ.get('ADIDAS_MAX_RATE', '10')),
+    "concurrency": int(os.environ.get('ADIDAS_CONCURRENCY', '2')),
+    "max_concurrency": int(os.environ.get('ADIDAS_MAX_CONCURRENCY', '8')),
+    "cooldown": float(os.environ.get('ADIDAS_BACKOFF_SECONDS', '30')),
+}
+
+# Retry failed products later in the same run (exponential backoff), and pause the crawl on error spikes
+RETRY_POLICY = {
+    "max_attempts": int(os.environ.get('ADIDAS_RETRY_ATTEMPTS', '3')),
+    "base_delay": float(os.environ.get('ADIDAS_RETRY_DELAY', '15')),
+    "max_delay": float(os.environ.get('ADIDAS_RETRY_MAX_DELAY', '300')),
+}
+BREAKER_POLICY = {
+    "threshold": float(os.environ.get('ADIDAS_BREAKER_ERROR_RATE', '0.5')),
+    "window": int(os.environ.get('ADIDAS_BREAKER_WINDOW', '20')),
+    "cooldown": float(os.environ.get('ADIDAS_BREAKER_COOLDOWN', '120')),
+}
+
+# Distributed crawl: '' (one process), 'coordinator' (listing, leases product shards, writes the output) or
+# 'worker' (scrapes leased shards); workers on other hosts reach the coordinator at ADIDAS_COORDINATOR
+ROLE = os.environ.get('ADIDAS_ROLE', '')
+COORDINATOR_ADDRESS = os.environ.get('ADIDAS_COORDINATOR', '127.0.0.1:8765')
+SHARD_SIZE = int(os.environ.get('ADIDAS_SHARD_SIZE', '10'))
+LEASE_TTL = float(os.environ.get('ADIDAS_LEASE_TTL', '300'))
+COORDINATOR_WAIT = float(os.environ.get('ADIDAS_COORDINATOR_WAIT', '600'))
+
+# Streaming row output: 'jsonl' or 'parquet' (needs pyarrow)
+OUTPUT_FORMAT = os.environ.get('ADIDAS_OUTPUT_FORMAT', 'jsonl')
+
+# Normalized products / reviews / coordinated-item / size-chart tables: '' (off), 'parquet' or 'csv'.
+# When on, the Excel file is a summary sheet with item counts in place of nested cells.
+TABLES_FORMAT = os.environ.get('ADIDAS_TABLES', '')
 
 # Function to generate the current timestamp
 def get_japan_time():
     """Generate the current timestamp in Japan Standard Time (JST)."""
-    jst = pytz.timezone('Asia/Tokyo')
-    return datetime.now(jst).strftime('%Y%m%d_%H%M%S')
+    return datetime.now(JST).strftime('%Y%m%d_%H%M%S')
 
 # Configure logging
 logging.basicConfig(
@@ -41,6 +156,12 @@ logger = logging.getLogger()
 class TestAdidas:
     def setup_method(self, method):
         timestamp = get_japan_time()
+        self.profiler = RunProfiler()
+        self.resource_policy = ResourcePolicy(enabled=RESOURCE_POLICY)
+        self.browser_profiles = BrowserProfiles(BROWSER_PROFILE_DIR, **BROWSER_PROFILE_LIMITS) \
+            if BROWSER_PROFILE_DIR else None
+        if self.browser_profiles:
+            self.browser_profiles.cleanup()
 
         options = uc.ChromeOptions()
         options.add_argument("--no-sandbox")
@@ -50,12 +171,18 @@ class TestAdidas:
         options.add_argument("start-maximized")
         options.add_argument(
             "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36")
-
-        self.driver = uc.Chrome(options=options)
-        self.driver.set_page_load_timeout(180)
-
-        # Get script directory
-        script_dir = os.path.dirname(os.path.abspath(__file__))
+        if self.resource_policy.enabled:
+            enable_performance_log(options)
+
+        # A shard worker only needs this browser to collect site cookies for its HTTP client
+        self.driver = None
+        if ROLE != "worker" or HTTP_EXTRACT:
+            with self.profiler.span("driver_launch"):
+                self.driver = self.start_browser(options)
+                self.driver.set_page_load_timeout(180)
+
+        # Run directories go next to the script unless ADIDAS_RUN_DIR says otherwise
+        script_dir = RUN_DIR
         base_dir_name = f"{timestamp}"
 
         # Define directory paths relative to the script
@@ -68,591 +195,713 @@ class TestAdidas:
         os.makedirs(self.error_dir, exist_ok=True)
         os.makedirs(self.execution_dir, exist_ok=True)
 
+        self.screenshots = ScreenshotPipeline(
+            self.screenshot_dir, ScreenshotPolicy(SCREENSHOT_POLICY, SCREENSHOT_STAGES), image_format=SCREENSHOT_FORMAT)
+        self.run_logger = RunLogger(self.execution_dir, self.error_dir, payload_verbosity=LOG_PAYLOADS,
+                                    profiler=self.profiler)
+        self.state = CrawlStateStore(STATE_DB_PATH, max_attempts=MAX_ATTEMPTS)
+        self.style_cache = StyleCardCache(STYLE_CACHE_TTL, STYLE_CACHE_SIZE)
+        self.wait_stats = WaitStats()
+        self.variants = VariantIndex()
+        self.size_charts = SizeChartCache()
+        # article -> (review count, new review keys), saved once the product's row is written
+        self.review_syncs = {}
+        self.changes = None
+        # Set by listing discovery: True only when the end of the listing was seen and no page was lost
+        self.listing_complete = False
+        self.http = None
+        self.rate_limiter = RateLimiter(**RATE_POLICY) if RATE_CONTROL else None
+
         self.log_execution("Setup completed.")
 
     def teardown_method(self, method):
         if self.driver:
             self.driver.quit()
+        if self.browser_profiles:
+            self.log_execution(f"Browser profiles: {self.browser_profiles.stats}, disk {self.browser_profiles.usage()}")
+        self.write_profile()
+        self.state.close()
+        self.screenshots.close()
+        self.run_logger.close()
 
     def launch_driver(self):
+        self.driver = self.create_driver()
+
+    def create_driver(self):
+        """Start a product-page browser (images blocked)."""
         options = uc.ChromeOptions()
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-gpu")
         options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--blink-settings=imagesEnabled=false")
+        if not self.resource_policy.enabled:
+            options.add_argument("--blink-settings=imagesEnabled=false")
         options.add_argument("--disable-blink-features=AutomationControlled")
         options.add_argument("start-maximized")
         options.add_argument(
             "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36")
+        if self.resource_policy.enabled:
+            enable_performance_log(options)
+
+        with self.profiler.span("driver_launch"):
+            driver = self.start_browser(options)
+            driver.set_page_load_timeout(180)
+            self.resource_policy.set_phase(driver, "pdp")
+        return driver
+
+    def start_browser(self, options):
+        """uc.Chrome on a leased persistent profile and disk cache (a throwaway profile when they are off)."""
+        if self.browser_profiles is None:
+            return self.profiler.instrument(uc.Chrome(options=options))
+        slot, profile_dir, _ = self.browser_profiles.lease()
+        try:
+            self.browser_profiles.apply(options, slot)
+            driver = uc.Chrome(options=options, user_data_dir=profile_dir)
+        except Exception:
+            self.browser_profiles.release(slot)
+            raise
+        return self.profiler.instrument(self.browser_profiles.bind(driver, slot))
 
-        self.driver = uc.Chrome(options=options)
-        self.driver.set_page_load_timeout(180)
-    def log_error(self, error_message):
-        """Log error to a specific error log file in the error folder."""
-        os.makedirs(self.error_dir, exist_ok=True)
-        timestamp = get_japan_time()
-        error_log_path = os.path.join(self.error_dir, f"error_log.txt")
-
+    def write_profile(self):
+        """Write the run profile as JSON and as a Prometheus textfile."""
+        json_path = os.path.join(self.execution_dir, 'profile.json')
+        prom_path = PROFILE_TEXTFILE or os.path.join(self.execution_dir, 'profile.prom')
         try:
-            # Write the error message and traceback to the error log file
-            with open(error_log_path, 'a', encoding="utf-8") as error_file:
-                error_file.write(f"Error occurred at {timestamp}:\n")
-                error_file.write(f"{error_message}\n")
-                error_file.write(traceback.format_exc())
-            logger.error(f"Error details saved in: {error_log_path}")
+            report = self.profiler.write(json_path, prom_path)
+            for stage, entry in report["stages"].items():
+                self.log_execution(f"Profile {stage}: p50 {entry['p50_s']}s, p95 {entry['p95_s']}s, "
+                                   f"{entry['count']} spans, {entry['webdriver_calls']} WebDriver calls")
+            self.log_execution(f"Run profile written: {json_path}, {prom_path}")
         except Exception as e:
-            logger.error(f"Failed to log error: {e}")
-            raise
+            self.log_error(f"Failed to write run profile: {e}")
+
+    def browser_get(self, driver, url):
+        """driver.get paced by the per-host rate controller; a bot-wall page raises BotWallError."""
+        if self.rate_limiter is None:
+            driver.get(url)
+            return
+        with self.rate_limiter.request(url) as outcome:
+            driver.get(url)
+            outcome.blocked = is_bot_wall(driver.title)
+        if outcome.blocked:
+            raise BotWallError(url)
+
+    def log_error(self, error_message):
+        """Queue an error record (with the current traceback) for the error log."""
+        self.run_logger.error(error_message)
 
     def log_execution(self, step_message):
-        """Log execution message to the result log file."""
-        os.makedirs(self.execution_dir, exist_ok=True)
-        timestamp = get_japan_time()
-        execution_log_path = os.path.join(self.execution_dir, f"execution_log.txt")
+        """Queue an execution record for the execution log."""
+        self.run_logger.execution(step_message)
+
+    def take_screenshot(self, name, type, stage, loader_xpath="//*[@id='img-loader']", driver=None):
+        """Take a screenshot of ``driver`` (the listing browser by default) once the page is loaded.
+
+        ``stage`` names the crawl step for ADIDAS_SCREENSHOT_STAGES; the image is written in the background.
+        """
+        if not self.screenshots.wants(type, stage):
+            return
+        driver = driver or self.driver
+        with self.profiler.span("screenshot"):
+            try:
+                loader_wait = ReadinessWait(driver, SCREENSHOT_LOADER_TIMEOUT, self.wait_stats)
+                loader_wait.until(lambda driver: driver.execute_script('return document.readyState') == 'complete',
+                                  label="screenshot readyState")
+                try:
+                    loader_wait.until(EC.invisibility_of_element_located((By.XPATH, loader_xpath)),
+                                      label="screenshot loader")
+                except TimeoutException:
+                    logger.warning("Loader (id='img-loader') is still visible after timeout, proceeding with screenshot.")
+                self.screenshots.capture(driver, name, type, get_japan_time())
+            except Exception as e:
+                logger.error(f"Failed to take screenshot: {str(e)}")
+
+    def page_text_index(self):
+        """Index the text of every non-blank text node of the current page."""
+        page_text = self.driver.execute_script("""
+                const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+                const parts = [];
+                while (walker.nextNode()) {
+                    if (walker.currentNode.nodeValue.trim() !== "") {
+                        parts.push(walker.currentNode.nodeValue);
+                    }
+                }
+                return parts.join("");
+            """)
+        return PageTextIndex(page_text)
 
+    def assert_expected_result(self, expected_text, wait, stage):
+        self.assert_expected_results([expected_text], wait, stage)
+
+    def assert_expected_results(self, expected_texts, wait, stage):
+        """Check several expected labels against one capture of the page text."""
+        wait.dom_quiet()
         try:
-            # Write the execution message to the execution log file
-            with open(execution_log_path, 'a', encoding="utf-8") as execution_file:
-                execution_message = f"{timestamp}: {step_message}.\n"
-                execution_file.write(execution_message)
-            logger.info(f"Execution details saved in: {execution_log_path}")
+            index = self.page_text_index()
         except Exception as e:
-            logger.error(f"Failed to log execution: {e}")
-            raise
+            self.log_error(f"❌ Error during assertion: {e}")
+            self.take_screenshot(f"{expected_texts[0]}_error", 'error', stage)
+            return
 
-    def take_screenshot(self, name, wait, type, loader_xpath="//*[@id='img-loader']"):
-        """Take a screenshot after ensuring the page is loaded."""
-        sub_dir = 'error' if type == 'error' else 'success'
-        full_dir = os.path.join(self.screenshot_dir, sub_dir)
-        os.makedirs(full_dir, exist_ok=True)
-        timestamp = get_japan_time()
-        screenshot_path = os.path.join(full_dir, f"{name}_{timestamp}.png")
+        for result in index.match_many(expected_texts):
+            expected_text = result.label
+            # ✅ Exact match
+            if result.exact:
+                self.log_execution(f"✅ Expected text found {expected_text}")
+                self.take_screenshot(f"not_found_{expected_text}", 'success', stage)
+            # 🔍 Fuzzy match within a label-sized window
+            elif result.found:
+                self.log_execution(f"✅ Expected text match ({expected_text}, score {result.score})")
+                self.take_screenshot(f"予想テキスト_{expected_text}", 'success', stage)
+            else:
+                self.log_error(f"❌ Expected text not found ({expected_text}, best score {result.score})")
+                self.take_screenshot(f"not_found_{expected_text}", 'error', stage)
+
+    def open_size_chart(self, driver, wait):
+        """Open the size-chart modal and return its outerHTML."""
+        size_guide_btn = wait.element((By.CSS_SELECTOR, 'button[data-auto-id="size-chart-link"]'), clickable=True)
+        driver.execute_script("arguments[0].scrollIntoView(true);", size_guide_btn)
+        try:
+            size_guide_btn.click()
+        except Exception:
+            driver.execute_script("arguments[0].click();", size_guide_btn)
+        wait.element((By.CSS_SELECTOR, "#gl-modal__size-chart-modal table"))
+
+        modal_html = driver.execute_script(
+            "return document.getElementById('gl-modal__size-chart-modal').outerHTML;")
+        close_button = wait.element((By.ID, "gl-modal__close-size-chart-modal"), clickable=True)
+        try:
+            close_button.click()
+        except Exception:
+            driver.execute_script("arguments[0].click();", close_button)
+        return modal_html
+
+    def expand_reviews(self, driver, wait, article):
+        """Open the review section, load the review batches and return ``(reviews, review count)``.
+
+        With review sync only reviews added since the last sync of ``article``
+        are returned; the section is not opened when the count is unchanged.
+        """
+        sync = self.state.review_sync(article) if REVIEW_SYNC else None
+        if sync is not None:
+            count = review_count(driver)
+            if count is not None and count == sync["count"]:
+                self.log_execution(f"Review count unchanged ({count}), reviews not read")
+                return [], count
+
+        review_container = wait.element((By.CSS_SELECTOR, "#navigation-target-reviews"), clickable=True)
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", review_container)
         try:
-            wait.until(lambda driver: driver.execute_script('return document.readyState') == 'complete')
+            review_container.click()
+        except Exception:
+            driver.execute_script("arguments[0].click();", review_container)
+        wait.element((By.XPATH, "//div[contains(@class, 'reviews-header')]/h2"))
+
+        count = review_count(driver) if REVIEW_SYNC else None
+        if sync is not None and count is not None and count == sync["count"]:
+            self.log_execution(f"Review count unchanged ({count}), reviews not read")
+            return [], count
+        known_keys = sync["keys"] if sync else None
+        expected_new = max(0, (count or 0) - sync["count"]) if sync and sync["count"] is not None else 0
+        reviews_data, stats = harvest_reviews(driver, known_keys=known_keys, expected_new=expected_new)
+        self.log_execution(f"Review harvest: {stats}")
+        if REVIEW_SYNC:
+            synced_count = count
+            if stats["stop_reason"] not in ("known", "exhausted"):
+                # Only part of the new reviews loaded: record just those, so the next run pages on for the rest
+                synced_count = (sync["count"] or 0 if sync else 0) + len(reviews_data)
+            self.review_syncs[article] = (synced_count, [review_key(review) for review in reviews_data])
+        return reviews_data, count
+
+    def scrape_coordinated_items(self, get_driver, style_card_links):
+        """Collect the product cards of every style-card (coordinated look), visiting only uncached looks.
+
+        Looks are read over HTTP first when the HTTP fast path is on; the
+        browser from ``get_driver()`` is only used for looks that need rendering.
+        """
+        coordinated_items_info = []
+        for href in style_card_links:
+            cached = self.style_cache.get(href)
+            if cached is not None:
+                coordinated_items_info.extend(cached)
+                continue
+            if self.http is not None:
+                try:
+                    items = parse_product_cards(self.http.get_text(href), href)
+                    if items:
+                        self.style_cache.put(href, items)
+                        coordinated_items_info.extend(items)
+                        continue
+                except Exception as e:
+                    self.log_error(f"Style card not fetched over HTTP ({href}): {e}")
+            driver = get_driver()
             try:
-                wait.until(EC.invisibility_of_element_located((By.XPATH, loader_xpath)))
-            except TimeoutException:
-                logger.warning("Loader (id='img-loader') is still visible after timeout, proceeding with screenshot.")
-            self.driver.save_screenshot(screenshot_path)
-            logger.info(f"Screenshot saved: {screenshot_path}")
+                self.browser_get(driver, href)
+            except Exception as e:
+                self.log_error(f"Failed ({href}): {e}")
+                continue
+            try:
+                ReadinessWait(driver, 60, self.wait_stats).until(
+                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, '[data-testid="product-card"]')),
+                    label="style-card product cards")
+                items = parse_product_cards(driver.page_source, href)
+                self.style_cache.put(href, items)
+                coordinated_items_info.extend(items)
+            except Exception as e:
+                self.log_error(f"Error finding product cards: {e}")
+        return coordinated_items_info
+
+    def load_product_page(self, driver, wait, product_link):
+        self.resource_policy.set_phase(driver, "pdp")
+        self.browser_get(driver, product_link)
+        self.log_execution(f"Navigate to URL ({product_link})")
+
+        try:
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'div[data-testid="main-price"]')),
+                       label="pdp main-price")
+        except TimeoutException as e:
+            # Without a price the row cannot be written; give up on this attempt instead of waiting on every field
+            self.log_error(f"Price not found: {e}")
+            raise ElementMissingError(f"Price not found ({product_link})") from e
+        try:
+            wait.network_idle()
         except Exception as e:
-            logger.error(f"Failed to save screenshot: {str(e)}")
+            self.log_error(f"Network did not settle: {e}")
 
-    def assert_expected_result(self, expected_text, wait):
-        normalized_expected = unicodedata.normalize("NFKC", expected_text.strip())
-        time.sleep(2)
+    def chart_size_info(self, driver, wait, identity):
+        """sizeInfo of the loaded PDP: from the cache when ``identity`` is known, else from the modal."""
         try:
-            # Custom JavaScript: recursively extract all visible text
-            page_text = self.driver.execute_script("""
-                    function getTextContent(node) {
-                        let text = "";
-                        if (node.nodeType === Node.TEXT_NODE && node.nodeValue.trim() !== "") {
-                            text += node.nodeValue;
-                        }
-                        for (let child of node.childNodes) {
-                            text += getTextContent(child);
-                        }
-                        return text;
-                    }
-                    return getTextContent(document.body);
-                """)
-            page_text_cleaned = unicodedata.normalize("NFKC", " ".join(page_text.split()))
+            size_info = self.size_charts.lookup(identity) if identity else None
+            if size_info is not None:
+                self.log_execution("Size chart already known, modal not opened")
+                return size_info
+            self.resource_policy.set_phase(driver, "size_chart")
+            return self.size_charts.store(identity, self.open_size_chart(driver, wait))
+        except Exception as e:
+            self.log_error(f"Error finding in size guide button: {e}")
+            return None
+
+    def log_product(self, product):
+        self.log_execution(f"Breadcrumb: {product['breadcrumb']}")
+        self.log_execution(f"Category: {product['category']}")
+        self.log_execution(f"Image URL: {product['image_url']}")
+        self.log_execution(f"Product: {product['product_title']}")
+        self.log_execution(f"Price: {product['price']}")
+        self.log_execution(f"Available Sizes: {product['sizes']}")
+        self.run_logger.payload("Size info", product['size_info'])
+        self.log_execution(f"Overall rate: {product['rating']}")
+        self.log_execution(f"Number of reviews: {product['number_of_reviews']}")
+        self.log_execution(f"Total reviews extracted: {len(product['reviews'])}")
+        self.run_logger.payload("User reviews", product['reviews'])
+        self.log_execution(f"Title of description: {product['title']}")
+        self.log_execution(f"Description: {product['description']}")
+        self.log_execution(f"General Description (itemization):\n{product['itemization']}")
+
+    def add_coordinated_items(self, get_driver, product):
+        with self.run_logger.stage("coordinated_items"):
+            try:
+                product["coordinated_items"] = self.scrape_coordinated_items(get_driver, product["style_card_links"])
+            except Exception as e:
+                self.log_error(f"Error handling coordinated products: {e}")
+            self.run_logger.payload("Coordinated items", product["coordinated_items"])
 
-            # ✅ Exact match
-            if normalized_expected in page_text_cleaned:
-                self.log_execution(f"✅ Expected text found {expected_text}")
-                self.take_screenshot(f"not_found_{expected_text}", wait, 'success')
-                return
-
-            # 🔍 Fuzzy match
-            score = SequenceMatcher(None, normalized_expected, page_text_cleaned).ratio()
-            if score > 0.75:
-                self.log_execution(f"✅ Expected text match ({expected_text})")
-                self.take_screenshot(f"予想テキスト_{expected_text}", wait, 'success')
-            else:
-                self.log_error(f"❌ Expected text not found ({expected_text})")
-                self.take_screenshot(f"not_found_{expected_text}", wait, 'error')
+    def scrape_product(self, driver, index, product_link):
+        """Scrape one product page in ``driver``, keeping a screenshot of it when the product fails."""
+        try:
+            row = self.extract_product_page(driver, index, product_link)
+        except Exception:
+            self.take_screenshot(f"product_{product_key(product_link)}_error", 'error', "product", driver=driver)
+            raise
+        if row is None:
+            self.take_screenshot(f"product_{product_key(product_link)}_error", 'error', "product", driver=driver)
+        return row
+
+    def extract_product_page(self, driver, index, product_link):
+        """Load one product page, run the interactive steps and extract the row from one snapshot."""
+        wait = ReadinessWait(driver, 60, self.wait_stats)
+        self.run_logger.set_context(product_index=index, url=product_link, stage=None)
+        self.log_execution(f"[{index}] Opened: {product_link}")
+        with self.run_logger.stage("pdp_load"):
+            self.load_product_page(driver, wait, product_link)
+
+        article = product_key(product_link)
+        if self.changes is not None:
+            with self.run_logger.stage("change_check"):
+                with self.profiler.span("pdp_snapshot"):
+                    first_snapshot = extract_product_static(driver.page_source, product_link)
+                stored = self.changes.check(article, first_snapshot)
+            if stored is not None:
+                self.log_execution("Unchanged since the last full extraction, stored sections reused")
+                return self.changes.reuse(stored, first_snapshot)
+
+        shared = self.variants.shared_sections(article)
+        size_info = None
+        reviews_data = None
+        reviews_total = None
+        if shared is not None:
+            self.log_execution(f"Reusing size chart, description and reviews of another color of {article}")
+        else:
+            with self.run_logger.stage("size_chart"):
+                try:
+                    identity = size_chart_identity(driver) if SIZE_CHART_CACHE else None
+                except Exception as e:
+                    self.log_error(f"Size chart identity not read: {e}")
+                    identity = None
+                size_info = self.chart_size_info(driver, wait, identity)
 
-        except Exception as e:
-            self.log_error(f"❌ Error during assertion: {e}")
-            self.take_screenshot(f"{expected_text}_error", wait, 'error')
-    def test_adidas(self):
-        wait = WebDriverWait(self.driver, 60)
-        rows = []
+            with self.run_logger.stage("reviews"):
+                try:
+                    reviews_data, reviews_total = self.expand_reviews(driver, wait, article)
+                except Exception as e:
+                    self.log_error(f"Error finding in review container: {e}")
+
+        with self.run_logger.stage("extract"):
+            # One capture of the fully expanded page replaces per-field WebDriver lookups
+            with self.profiler.span("pdp_snapshot"):
+                html = driver.page_source
+            product = extract_product(html, base_url=product_link,
+                                      reviews=shared["reviews"] if shared else reviews_data, size_info=size_info)
+            if product["number_of_reviews"] is None:
+                # The review header is only rendered when the section was opened
+                product["number_of_reviews"] = reviews_total
+            self.variants.register(article, product["variants"])
+            if shared is not None:
+                product.update(shared)
+            elif size_info is not None and reviews_data is not None:
+                self.variants.store_sections(article, product)
+            self.log_product(product)
+
+        self.add_coordinated_items(lambda: driver, product)
+        self.resource_policy.collect(driver)
+
+        return build_row(product)
+
+    def scrape_product_http(self, get_driver, index, product_link):
+        """Extract one product from its server-rendered HTML, using a browser only for what needs interaction.
+
+        The size chart comes from the cache when a product with the same chart
+        was already seen, and reviews are skipped when the page reports none;
+        otherwise the PDP is loaded in the worker's browser for just those steps.
+        """
+        self.run_logger.set_context(product_index=index, url=product_link, stage=None)
+        self.log_execution(f"[{index}] Fetched: {product_link}")
+        with self.run_logger.stage("pdp_http"):
+            html = self.http.get_text(product_link)
+            product = extract_product_static(html, product_link)
+        if build_row(product) is None:
+            self.log_execution("Required fields missing from the server-rendered page, using the browser")
+            return self.scrape_product(get_driver(), index, product_link)
+
+        article = product_key(product_link)
+        if self.changes is not None:
+            stored = self.changes.check(article, product)
+            if stored is not None:
+                self.log_execution("Unchanged since the last full extraction, stored sections reused")
+                return self.changes.reuse(stored, product)
+
+        shared = self.variants.shared_sections(article)
+        self.variants.register(article, product["variants"])
+        used_driver = []
+
+        def browser():
+            if not used_driver:
+                used_driver.append(get_driver())
+            return used_driver[0]
+
+        if shared is not None:
+            self.log_execution(f"Reusing size chart, description and reviews of another color of {article}")
+            product.update(shared)
+        else:
+            identity = size_chart_identity_from_html(html) if SIZE_CHART_CACHE else None
+            size_info = self.size_charts.lookup(identity) if identity else None
+            reviews_data = [] if product["number_of_reviews"] == 0 else None
+            sync = self.state.review_sync(article) if REVIEW_SYNC else None
+            if sync is not None and product["number_of_reviews"] is not None \
+                    and product["number_of_reviews"] == sync["count"]:
+                self.log_execution(f"Review count unchanged ({sync['count']}), reviews not read")
+                reviews_data = []
+            if size_info is None or reviews_data is None:
+                driver = browser()
+                wait = ReadinessWait(driver, 60, self.wait_stats)
+                with self.run_logger.stage("pdp_load"):
+                    self.load_product_page(driver, wait, product_link)
+                if size_info is None:
+                    with self.run_logger.stage("size_chart"):
+                        size_info = self.chart_size_info(driver, wait, identity)
+                if reviews_data is None:
+                    with self.run_logger.stage("reviews"):
+                        try:
+                            reviews_data, _ = self.expand_reviews(driver, wait, article)
+                        except Exception as e:
+                            self.log_error(f"Error finding in review container: {e}")
+            product["size_info"] = size_info if size_info is not None else {}
+            product["reviews"] = reviews_data if reviews_data is not None else []
+            if size_info is not None and reviews_data is not None:
+                self.variants.store_sections(article, product)
+        self.log_product(product)
+
+        self.add_coordinated_items(browser, product)
+        if used_driver:
+            self.resource_policy.collect(used_driver[0])
+
+        return build_row(product)
+
+    def browser_fetch(self, url):
+        """Load a listing page in the crawl browser and return its HTML."""
+        with self.profiler.span("listing_page"):
+            self.browser_get(self.driver, url)
+            ReadinessWait(self.driver, 60, self.wait_stats).until(EC.presence_of_all_elements_located(
+                (By.CSS_SELECTOR, 'article[data-testid="plp-product-card"]')), label="plp product cards")
+            return self.driver.page_source
+
+    def discover_listing_pages(self, wait):
+        """Fetch every listing page concurrently over HTTP, falling back to clicking through the pagination."""
+        client = HttpClient.from_driver(self.driver, rate_limiter=self.rate_limiter)
+
+        def http_fetch(url):
+            with self.profiler.span("listing_page_http"):
+                return client.get_text(url)
+
+        discovery = ListingDiscovery(http_fetch, concurrency=LISTING_CONCURRENCY, fallback_fetch=self.browser_fetch)
+        product_links = discovery.discover(self.driver.current_url, self.driver.page_source)
+        if product_links:
+            self.listing_complete = discovery.complete
+            self.log_execution(f"Listing pages fetched: {discovery.pages_fetched}, failed: {discovery.failed_pages}, "
+                               f"complete: {discovery.complete}")
+            return product_links
+        self.log_execution("Listing pages cannot be fetched over HTTP; following the pagination in the browser")
+        return self.follow_pagination(wait)
+
+    def follow_pagination(self, wait):
+        """Click through the listing one page at a time, parsing each page from one snapshot."""
+        frontier = ProductFrontier()
+        complete = True
+        while True:
+            try:
+                wait.until(
+                    EC.presence_of_all_elements_located(
+                        (By.CSS_SELECTOR, 'article[data-testid="plp-product-card"]')), label="plp product cards")
+                frontier.add_all(parse_listing_links(self.driver.page_source, self.driver.current_url))
+            except Exception as e:
+                complete = False
+                self.log_error(f"Error finding T-shirts list: {e}")
+                self.log_execution("Failed")
+
+            # The page is already rendered, so a missing next button means this was the last page
+            next_buttons = self.driver.find_elements(By.CSS_SELECTOR, 'a[data-testid="pagination-next-button"]')
+            if not next_buttons:
+                break
+            href = next_buttons[0].get_attribute('href')
+            try:
+                self.browser_get(self.driver, href)
+            except Exception as e:
+                # The rest of the listing is unknown; keep what was found without calling it complete
+                self.log_error(f"Failed to open ({href}): {e}")
+                complete = False
+                break
+
+            try:
+                close_btn = self.driver.find_element(By.ID, "gl-modal__close-mf-account-portal")
+                if close_btn.is_displayed():
+                    try:
+                        close_btn.click()
+                    except Exception:
+                        self.driver.execute_script("arguments[0].click();", close_btn)
+            except Exception:
+                pass
+
+        self.listing_complete = complete
+        return frontier.links()
+
+    def discover_product_links(self):
+        """Open the men's T-shirt listing and follow the pagination to collect every product link."""
+        wait = ReadinessWait(self.driver, 60, self.wait_stats)
         product_links = []
         try:
-            self.driver.get("https://www.adidas.jp/men")
+            self.resource_policy.set_phase(self.driver, "screenshots")
+            self.browser_get(self.driver, f"{BASE_URL}/men")
             mens_menu = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'a[href="/men"]')))
             text = mens_menu.get_attribute('textContent').strip()
-            self.assert_expected_result(text, wait)
+            self.assert_expected_result(text, wait, "menu_check")
         except Exception as e:
-            self.log_error(f"Failed to open (https://www.adidas.jp/men): {e}")
+            self.log_error(f"Failed to open ({BASE_URL}/men): {e}")
+        self.resource_policy.set_phase(self.driver, "listing")
         self.driver.set_window_size(1296, 775)
-        self.log_execution(f"Navigate to URL (https://www.adidas.jp/men)")
+        self.log_execution(f"Navigate to URL ({BASE_URL}/men)")
         try:
-            mens_menu = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'a[href="/men"]')))
-            wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, 'a[href="/men"]')))
+            mens_menu = wait.element((By.CSS_SELECTOR, 'a[href="/men"]'))
             actions = ActionChains(self.driver)
             actions.move_to_element(mens_menu).perform()
             try:
-                wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, 'a[href="/メンズ-ウェア・服-tシャツ"]')))
-                wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, 'a[href="/メンズ-ウェア・服-tシャツ"]')))
-                tshirts_link = wait.until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, 'a[href="/メンズ-ウェア・服-tシャツ"]')))
+                tshirts_link = wait.element((By.CSS_SELECTOR, 'a[href="/メンズ-ウェア・服-tシャツ"]'), clickable=True)
                 try:
                     tshirts_link.click()
                 except Exception:
                     self.driver.execute_script("arguments[0].click();", tshirts_link)
                 self.log_execution("Clicked on T-shirts link")
-                while True:
-                    try:
-                        wait.until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
-                        wait.until(
-                            EC.presence_of_all_elements_located(
-                                (By.CSS_SELECTOR, 'article[data-testid="plp-product-card"]')))
-                        articles = self.driver.find_elements(By.CSS_SELECTOR, 'article[data-testid="plp-product-card"]')
-                        for product in articles:
-                            try:
-                                link_element = product.find_element(By.CSS_SELECTOR,
-                                                                    'a[data-testid="product-card-image-link"]')
-                                link = link_element.get_attribute('href')
-                                product_links.append(link)
-                            except Exception as e:
-                                self.log_error(f"Error getting product link: {e}")
-                    except Exception as e:
-                        self.log_error(f"Error finding T-shirts list: {e}")
-                        self.log_execution("Failed")
-
-                    try:
-                        next_button = wait.until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, 'a[data-testid="pagination-next-button"]'))
-                        )
-                        href = next_button.get_attribute('href')
-                        try:
-                            self.driver.get(href)
-                        except Exception as e:
-                            self.log_error(f"Failed to open ({href}): {e}")
-                    except TimeoutException:
-                        break
-
-                    try:
-                        close_btn = self.driver.find_element(By.ID, "gl-modal__close-mf-account-portal")
-                        if close_btn.is_displayed():
-                            try:
-                                close_btn.click()
-                            except Exception:
-                                self.driver.execute_script("arguments[0].click();", close_btn)
-                    except Exception:
-                        pass
+                wait.until(EC.presence_of_all_elements_located(
+                    (By.CSS_SELECTOR, 'article[data-testid="plp-product-card"]')), label="plp product cards")
+                product_links = self.discover_listing_pages(wait)
             except Exception as e:
                 self.log_error(f"Error finding T-shirts link: {e}")
+                self.take_screenshot("tshirts_link_error", 'error', "listing")
                 self.log_execution("Failed")
         except Exception as e:
             self.log_error(f"Error finding men's menu: {e}")
+            self.take_screenshot("mens_menu_error", 'error', "listing")
             self.log_execution("Failed")
 
-        self.log_execution(f"Product Links: {len(product_links)}")
-        for index, product_link in enumerate(product_links, start=1):
-            try:
-                self.log_execution(f"[{index}] Opened: {product_link}")
-                self.driver.get(product_link)
-                self.log_execution(f"Navigate to URL ({product_link})")
-                time.sleep(2)
-
-                breadcrumb = None
-                image_url = None
-                category = None
-                productTitle = None
-                price = None
-                sizes = None
-                sizeInfo = {}
-                title = None
-                description = None
-                itemization = None
-                reviews_data = []
-                rating = None
-                number_of_reviews = None
-                coordinated_items_info = []
-
-                try:
-                    wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, 'ol[data-auto-id="breadcrumbs-desktop"] li')))
-
-                    breadcrumb_items = self.driver.find_elements(By.CSS_SELECTOR, 'ol[data-auto-id="breadcrumbs-desktop"] li')
-
-                    breadcrumb_texts = []
-                    for item in breadcrumb_items[1:]:
-                        try:
-                            name = item.find_element(By.CSS_SELECTOR, '[property="name"]').text
-                            breadcrumb_texts.append(name)
-                        except:
-                            continue
-
-                    breadcrumb = ' / '.join(breadcrumb_texts)
-                    self.log_execution(f"Breadcrumb: {breadcrumb}")
-
-                except Exception as e:
-                    self.log_error(f"Breadcrump not found: {e}")
-
-                try:
-                    category_element = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, 'div[data-auto-id="product-category"] span')))
-                    category = category_element.get_attribute('textContent').strip()
-
-                    self.log_execution(f"Category: {category}")
-                except Exception as e:
-                    self.log_error(f"Category not found: {e}")
-
-                try:
-                    img_element = wait.until(EC.presence_of_element_located(
-                                    (By.CSS_SELECTOR, 'picture[data-testid="pdp-gallery-picture"] img')
-                                ))
-
-                    image_url = img_element.get_attribute("src")
-                    self.log_execution(f"Image URL: {image_url}")
-                except Exception as e:
-                    self.log_error(f"Image url not found: {e}")
-
-                try:
-                    product_element = wait.until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, 'h1[data-auto-id="product-title"] span')))
-                    productTitle = product_element.get_attribute('textContent').strip()
-                    if not productTitle:
-                        productTitle = self.driver.execute_script("return arguments[0].textContent;",
-                                                             product_element).strip()
-                    self.log_execution(f"Product: {productTitle}")
-                except Exception as e:
-                    self.log_error(f"Product title not found: {e}")
-
-                try:
-                    price_element = wait.until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, 'div[data-testid="main-price"]')))
-                    spans = price_element.find_elements(By.TAG_NAME, 'span')
-
-                    if len(spans) >= 2:
-                        price = spans[1].get_attribute('textContent').strip()
-                        if not price:
-                            price = self.driver.execute_script("return arguments[0].textContent;", spans[1]).strip()
-                        self.log_execution(f"Price: {price}")
-                except Exception as e:
-                    self.log_error(f"Price not found: {e}")
-
-                try:
-                    wait.until(
-                        EC.presence_of_all_elements_located((By.CSS_SELECTOR, 'div[data-auto-id="size-selector"] button')))
-                    buttons = self.driver.find_elements(By.CSS_SELECTOR, 'div[data-auto-id="size-selector"] button')
-
-                    available_sizes = []
-                    for button in buttons:
-                        class_attr = button.get_attribute("class")
-                        if "unavailable" not in class_attr:
-                            try:
-                                size_text = button.find_element(By.TAG_NAME, "span").text
-                                available_sizes.append(size_text)
-                            except:
-                                pass
-
-                    sizes = ', '.join(available_sizes)
-                    self.log_execution(f"Available Sizes: {sizes}")
-                except Exception as e:
-                    self.log_error(f"Available sizes not found: {e}")
-
-                try:
-                    wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, 'button[data-auto-id="size-chart-link"]')))
-                    wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, 'button[data-auto-id="size-chart-link"]')))
-                    size_guide_btn = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, 'button[data-auto-id="size-chart-link"]')))
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", size_guide_btn)
-                    try:
-                        size_guide_btn.click()
-                    except Exception:
-                        self.driver.execute_script("arguments[0].click();", size_guide_btn)
-                    wait.until(EC.presence_of_element_located((By.ID, "gl-modal__size-chart-modal")))
-                    wait.until(EC.visibility_of_element_located((By.ID, "gl-modal__size-chart-modal")))
-                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "#gl-modal__size-chart-modal table")))
-
-                    html = self.driver.page_source
-                    soup = BeautifulSoup(html, "html.parser")
-                    modal = soup.find("div", id="gl-modal__size-chart-modal")
-
-                    tables = modal.find_all("table")
-                    for table in tables:
-                        thead = table.find("thead")
-                        if not thead:
-                            continue
-
-                        headers = [th.get_text(strip=True) for th in thead.find_all("th")]
-                        size_headers = headers[1:]
-
-                        tbody = table.find("tbody")
-                        for tr in tbody.find_all("tr"):
-                            cells = [td.get_text(strip=True) for td in tr.find_all(["th", "td"])]
-                            if len(cells) < 2:
-                                continue
-
-                            row_label = cells[0]
-                            size_values = cells[1:]
-
-                            size_dict = {}
-                            for idx, size in enumerate(size_headers):
-                                if idx < len(size_values):
-                                    value = size_values[idx]
-                                    if value:
-                                        size_dict[size] = value
-
-                            if row_label not in sizeInfo:
-                                sizeInfo[row_label] = []
-
-                            sizeInfo[row_label].append(size_dict)
-
-                    self.log_execution(json.dumps(sizeInfo, ensure_ascii=False, indent=2))
-                    close_button = wait.until(EC.element_to_be_clickable((By.ID, "gl-modal__close-size-chart-modal")))
-                    try:
-                        close_button.click()
-                    except Exception:
-                        self.driver.execute_script("arguments[0].click();", close_button)
-                except Exception as e:
-                    self.log_error(f"Error finding in size guide button: {e}")
-
-                try:
-                    review_container = wait.until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, "#navigation-target-reviews"))
-                    )
-                    self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", review_container)
-                    try:
-                        review_container.click()
-                    except Exception:
-                        self.driver.execute_script("arguments[0].click();", review_container)
-                    try:
-                        wait.until(EC.visibility_of_element_located((By.XPATH, "//div[contains(@class, 'ratings-label-container')]/span")))
-                        rating_span = wait.until(
-                            EC.presence_of_element_located(
-                                (By.XPATH, "//div[contains(@class, 'ratings-label-container')]/span"))
-                        )
-                        overall_rating = rating_span.get_attribute("textContent").strip()
-                        self.log_execution(f"Overall rate: {overall_rating}")
-                    except Exception as e:
-                        self.log_error(f"Error finding overall rating: {e}")
-
-                    try:
-                        wait.until(EC.visibility_of_element_located((By.XPATH, "//div[contains(@class, 'reviews-header')]/h2")))
-                        reviews_header = wait.until(
-                            EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'reviews-header')]/h2")))
-                        review_text = reviews_header.get_attribute("textContent").strip()
-                        match = re.search(r'\((\d+)\)', review_text)
-                        number_of_reviews = int(match.group(1)) if match else 0
-                        self.log_execution(f"Number of reviews: {number_of_reviews}")
-                    except Exception as e:
-                        self.log_error(f"Error finding overall Number of reviews: {e}")
-
-                    while True:
-                        try:
-                            wait.until(EC.presence_of_all_elements_located((By.XPATH, "//button[@data-auto-id='reviews-load-more']")))
-                            wait.until(EC.visibility_of_element_located((By.XPATH, "//button[@data-auto-id='reviews-load-more']")))
-                            load_more_btn = wait.until(EC.element_to_be_clickable(
-                                (By.XPATH, "//button[@data-auto-id='reviews-load-more']")
-                            ))
-                            self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});",
-                                                       load_more_btn)
-                            before_count = len(
-                                self.driver.find_elements(By.CSS_SELECTOR, '[data-auto-id="review"]'))
-                            try:
-                                load_more_btn.click()
-                            except Exception:
-                                self.driver.execute_script("arguments[0].click();", load_more_btn)
-
-                            wait.until(
-                                lambda d: len(
-                                    d.find_elements(By.CSS_SELECTOR, '[data-auto-id="review"]')) > before_count
-                            )
-                            time.sleep(0.5)
-                        except TimeoutException:
-                            print("No more 'Read more reviews' button visible.")
-                            break
-                        except Exception as e:
-                            print(f"Error clicking load more button: {e}")
-                            break
-                    wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, '[data-auto-id="review"]')))
-                    review_elements = self.driver.find_elements(By.CSS_SELECTOR, '[data-auto-id="review"]')
-                    self.log_execution(f"Total reviews extracted: {len(review_elements)}")
-
-                    for review in review_elements:
-                        try:
-                            reviewer_element = review.find_element(By.XPATH,
-                                                                   ".//span[contains(@class, 'user-name')]")
-                            date_element = review.find_element(By.XPATH, ".//span[contains(@class, 'date')]")
-                            title_element = review.find_element(By.TAG_NAME, "h4")
-                            desc_element = review.find_element(By.XPATH, ".//div[contains(@class, 'text')]")
-
-                            reviewer_id = reviewer_element.get_attribute("textContent").strip()
-                            date = date_element.get_attribute("textContent").strip()
-                            review_title = title_element.get_attribute("textContent").strip()
-                            review_description = desc_element.get_attribute("textContent").strip()
-
-                            # Rating from masks
-                            mask_elements = review.find_elements(By.CSS_SELECTOR, ".gl-star-rating__mask")
-                            rating = 0
-                            for mask in mask_elements:
-                                style = mask.get_attribute("style")
-                                match = re.search(r'width:\s*(\d+)', style)
-                                if match:
-                                    width_percent = int(match.group(1))
-                                    if width_percent >= 50:
-                                        rating += 1
-
-                            reviews_data.append({
-                                "date": date,
-                                "rating": rating,
-                                "review_title": review_title,
-                                "review_description": review_description,
-                                "reviewer_id": reviewer_id
-                            })
-
-                        except Exception as e:
-                            print(f"Error processing a review: {e}")
-                            continue
-
-                    self.log_execution(json.dumps(reviews_data, indent=2, ensure_ascii=False))
-
-                except Exception as e:
-                    self.log_error(f"Error finding in review container: {e}")
+        self.resource_policy.collect(self.driver)
+        return product_links
+
+    def write_row(self, sinks, row):
+        with self.profiler.span("output_write"):
+            for sink in sinks:
+                sink.write(row)
+
+    def record_result(self, sinks, index, product_link, row, error):
+        """Persist the outcome of one product in the crawl-state store.
+
+        A product is marked done only once its row is on disk in every sink, so a crash never lets a resume
+        skip a product whose buffered row was lost.
+        """
+        if not row:
+            self.state.mark_failed(product_link, f"{classify(error, row)}: {error or 'Required fields missing'}")
+            return
+
+        def row_durable():
+            self.state.mark_done(product_link, row)
+            self.record_product_state(index, product_link, row, error)
+
+        when_durable(sinks, row_durable)
+
+    def record_product_state(self, index, product_link, row, error):
+        """Save the review sync and change-detection snapshot of a scraped product, not its crawl status.
+
+        Shard workers call only this; the coordinator owns the products table.
+        """
+        if not row:
+            return
+        synced = self.review_syncs.pop(product_key(product_link), None)
+        if synced is not None:
+            self.state.save_review_sync(product_key(product_link), *synced)
+        if self.changes is not None:
+            self.changes.record(product_key(product_link), product_link, row)
+
+    def product_pool(self):
+        return ProductWorkerPool(self.create_driver, self.scrape_product_http if HTTP_EXTRACT else self.scrape_product,
+                                 worker_count=WORKER_COUNT, recycle_policy=RECYCLE_POLICY, log_error=self.log_error,
+                                 lazy_driver=HTTP_EXTRACT, retry_policy=RetryPolicy(**RETRY_POLICY),
+                                 breaker=CircuitBreaker(**BREAKER_POLICY))
+
+    def start_change_detection(self, stack):
+        if CHANGE_DETECTION:
+            self.changes = ChangeDetector(self.state, os.path.join(self.execution_dir, 'changes.jsonl'),
+                                          max_age_days=CHANGE_MAX_AGE_DAYS, keep_reviews=not REVIEW_SYNC)
+            stack.callback(self.changes.close)
+
+    def release_setup_browser(self):
+        """Quit the setup browser once listing is done; product pages run in the pool's own browsers.
+
+        With the HTTP fast path its session (user agent, cookies of the site) is handed to the HTTP client first.
+        """
+        if self.driver is None:
+            return
+        if HTTP_EXTRACT and ROLE != "coordinator":
+            if not self.driver.current_url.startswith(BASE_URL):
                 try:
-                    desc_container = wait.until(EC.presence_of_element_located(
-                        (By.CSS_SELECTOR, "#navigation-target-description")
-                    ))
-                    title_element = desc_container.find_element(By.TAG_NAME, "h3")
-                    desc_element = desc_container.find_element(By.CSS_SELECTOR, "p.gl-vspace")
-                    title = title_element.get_attribute("textContent").strip()
-                    description = desc_element.get_attribute("textContent").strip()
-                    self.log_execution(f"Title of description: {title}")
-                    self.log_execution(f"Description: {description}")
-                except Exception as e:
-                    self.log_error(f"Error finding in description container: {e}")
-                try:
-                    spec_container = wait.until(EC.presence_of_element_located(
-                        (By.CSS_SELECTOR, "#navigation-target-specifications")
-                    ))
-                    wait.until(EC.presence_of_all_elements_located(
-                        (By.CSS_SELECTOR, "#navigation-target-specifications li")
-                    ))
-                    bullet_elements = spec_container.find_elements(By.CSS_SELECTOR, "li")
-                    bullets = ["• " + li.get_attribute("textContent").strip() for li in bullet_elements if li.get_attribute("textContent").strip()]
-                    made_in_text = ""
-                    table_rows = spec_container.find_elements(By.CSS_SELECTOR, ".gl-table__row--body")
-                    for row in table_rows:
-                        cells = row.find_elements(By.CSS_SELECTOR, ".gl-table__cell")
-                        if len(cells) >= 2:
-                            label_elem = cells[0].find_element(By.CSS_SELECTOR, ".gl-table__cell-inner")
-                            value_elem = cells[1].find_element(By.CSS_SELECTOR, ".gl-table__cell-inner")
-
-                            label = label_elem.get_attribute("textContent").strip()
-                            value = value_elem.get_attribute("textContent").strip()
-
-                            if "生産国" in label and value:
-                                made_in_text = f"• {label}: {value}"
-                                break
-
-                    itemization = "\n".join(bullets + ([made_in_text] if made_in_text else []))
-
-                    self.log_execution("General Description (itemization):\n" + itemization)
-
+                    self.browser_get(self.driver, BASE_URL)
                 except Exception as e:
-                    self.log_error(f"Error extracting specifications: {e}")
-
-                try:
-                    carousel = wait.until(EC.presence_of_element_located((By.ID, "gl-carousel-system")))
-                    wait.until(EC.presence_of_all_elements_located(
-                        (By.CSS_SELECTOR, "#gl-carousel-system a[data-testid='style-card']")))
-                    link_index = 0
-                    links = carousel.find_elements(By.CSS_SELECTOR, "a[data-testid='style-card']")
-                    while True:
-                        try:
-                            if link_index >= len(links):
-                                break
-
-                            link = links[link_index]
-                            href = link.get_attribute("href")
-                            if not href:
-                                link_index += 1
-                                continue
-                            try:
-                                self.driver.get(href)
-                            except Exception as e:
-                                self.log_error(f"Failed ({href}): {e}")
-                                continue
-                            try:
-                                product_cards = wait.until(
-                                    EC.presence_of_all_elements_located(
-                                        (By.CSS_SELECTOR, '[data-testid="product-card"]'))
-                                )
-
-                                for card in product_cards:
-                                    try:
-                                        product_link = card.find_element(By.CSS_SELECTOR, 'a')
-                                        product_page_url = product_link.get_attribute("href")
-                                        product_number = product_page_url.split('/')[-1].split('.')[0]
-
-                                        image = card.find_element(By.CSS_SELECTOR, 'img')
-                                        image_url = image.get_attribute("src")
-
-                                        price_element = card.find_element(
-                                            By.CSS_SELECTOR, '[data-testid="main-price"] span:nth-child(2)'
-                                        )
-                                        price = price_element.text.strip()
-
-                                        coordinated_items_info.append({
-                                            "product_page_url": product_page_url,
-                                            "product_number": product_number,
-                                            "image_url": image_url,
-                                            "price": price
-                                        })
-                                    except Exception as e:
-                                        self.log_error(f"Error processing coordinated product: {e}")
-                            except Exception as e:
-                                self.log_error(f"Error finding product cards: {e}")
-
-                        except Exception as e:
-                            self.log_error(f"Error finding coordinated item links: {e}")
+                    self.log_error(f"Failed to open {BASE_URL} for session cookies: {e}")
+            self.http = HttpClient.from_driver(self.driver, rate_limiter=self.rate_limiter)
+        self.driver.quit()
+        self.driver = None
+
+    def run_shard_worker(self):
+        """Scrape product shards leased from the coordinator until it has none left; it writes the output."""
+        self.release_setup_browser()
+        pool = self.product_pool()
+        worker = ShardWorker(CoordinatorClient(COORDINATOR_ADDRESS, connect_timeout=COORDINATOR_WAIT), pool,
+                             on_done=self.record_product_state)
+        self.log_execution(f"Shard worker {worker.name} of coordinator {COORDINATOR_ADDRESS}")
+        with ExitStack() as stack:
+            self.start_change_detection(stack)
+            worker.run()
+        self.log_execution(f"Shard worker: {worker.stats}")
+        if self.changes is not None:
+            self.log_execution(f"Change detection: {self.changes.stats} ({self.changes.report_path})")
+        if self.http is not None:
+            self.log_execution(f"HTTP client: {self.http.stats}")
+        if self.rate_limiter is not None:
+            self.log_execution(f"Rate control: {self.rate_limiter.stats()}")
+        self.log_execution(f"Failures: {pool.failures}, retries: {pool.retries}, "
+                           f"circuit breaker: {pool.breaker.stats()}")
+        self.log_execution(f"Wait times: {self.wait_stats.summary()}")
 
-                        link_index += 1
-
-                except Exception as e:
-                    self.log_error(f"Error handling coordinated products: {e}")
-
-                json_data = json.dumps(coordinated_items_info, ensure_ascii=False, indent=2)
-                self.log_execution(f"All coordinated items info JSON:\n{json_data}")
-
-                if all([breadcrumb, category, productTitle, price, image_url]):
-                    row = {
-                        "Breadcrumb": breadcrumb,
-                        "Image URL": image_url,
-                        "Category": category,
-                        "Product title": productTitle,
-                        "Price": price,
-                        "Sizes": sizes,
-                        "Size info": sizeInfo,
-                        "Title of description": title,
-                        "Description": description,
-                        "General description (itemization)": itemization,
-                        "Rating": rating,
-                        "Number of reviews": number_of_reviews,
-                        "User Reviews": reviews_data,
-                        "Coordinated product info": coordinated_items_info,
-                    }
-                    rows.append(row)
-                if index % 3 == 0:
-                    self.driver.quit()
-                    time.sleep(5)
-                    self.launch_driver()
-                    wait = WebDriverWait(self.driver, 60)
-            except Exception as e:
-                self.log_error(f"Failed to open ({product_link}): {e}")
-                continue
-
-        df_new = pd.DataFrame(rows)
-
-        if os.path.exists(excel_path):
-            os.remove(excel_path)
-
-        df_new.to_excel(excel_path, index=False)
+    def test_adidas(self):
+        if ROLE == "worker":
+            self.run_shard_worker()
+            return
+        resumed = self.state.begin(resume=RESUME)
+        if resumed and self.state.listing_complete:
+            self.log_execution(f"Resuming crawl from {STATE_DB_PATH}: {self.state.counts()}")
+        else:
+            with self.run_logger.stage("listing"):
+                product_links = self.discover_product_links()
+            self.log_execution(f"Product Links: {len(product_links)}")
+            # Only a listing whose end was seen is final; otherwise a resume discovers it again
+            self.state.add_discovered(product_links, complete=self.listing_complete and bool(product_links))
+
+        self.release_setup_browser()
+        product_links = self.state.pending()
+        self.log_execution(f"Products to extract: {len(product_links)}")
+        output_path = os.path.join(self.execution_dir, f"products.{OUTPUT_FORMAT}")
+        self.state.add_output(output_path)
+        if ROLE == "coordinator":
+            # Workers scrape, and keep review-sync and change-detection state in their own crawl-state databases
+            pool = ShardCoordinator(COORDINATOR_ADDRESS, shard_size=SHARD_SIZE, lease_ttl=LEASE_TTL,
+                                    log_error=self.log_error)
+        else:
+            pool = self.product_pool()
+        with ExitStack() as stack:
+            if ROLE != "coordinator":
+                self.start_change_detection(stack)
+            sinks = [stack.enter_context(open_sink(OUTPUT_FORMAT, output_path))]
+            if TABLES_FORMAT:
+                tables = stack.enter_context(
+                    NormalizedSink(os.path.join(self.execution_dir, 'tables'), TABLES_FORMAT))
+                sinks.append(tables)
+            pool.run(product_links, on_row=lambda index, row: self.write_row(sinks, row),
+                     on_done=lambda *result: self.record_result(sinks, *result))
+            if self.changes is not None and self.state.listing_complete:
+                self.changes.report_removed([product_key(url) for url in self.state.discovered()])
+        self.log_execution(f"Rows written: {sinks[0].rows_written} ({output_path})")
+        if TABLES_FORMAT:
+            self.log_execution(f"Normalized tables: {tables.records_written} ({tables.directory})")
+        self.log_execution(f"Style-card cache: {self.style_cache.stats()}")
+        self.log_execution(f"Color variants: {self.variants.stats()}")
+        self.log_execution(f"Size charts: {self.size_charts.stats()}")
+        if self.changes is not None:
+            self.log_execution(f"Change detection: {self.changes.stats} ({self.changes.report_path})")
+        if self.http is not None:
+            self.log_execution(f"HTTP client: {self.http.stats}")
+        if self.rate_limiter is not None:
+            self.log_execution(f"Rate control: {self.rate_limiter.stats()}")
+        if ROLE == "coordinator":
+            self.log_execution(f"Coordinator: {pool.stats}, workers: {sorted(pool.workers)}")
+        else:
+            self.log_execution(f"Failures: {pool.failures}, retries: {pool.retries}, "
+                               f"circuit breaker: {pool.breaker.stats()}")
+        self.log_execution(f"Resource policy: {self.resource_policy.stats()}")
+        self.log_execution(f"Screenshots: {self.screenshots.stats}")
+        self.log_execution(f"Wait times: {self.wait_stats.summary()}")
+        if self.state.finish():
+            self.log_execution(f"Crawl complete: {self.state.counts()}")
+        else:
+            self.log_execution(f"Crawl incomplete, re-run to retry: {self.state.counts()}")
+
+        # Excel is a post-processing step streamed from the row files of every run of this crawl
+        with self.profiler.span("excel_export"):
+            export_excel(self.state.outputs(), excel_path, summary=bool(TABLES_FORMAT))
         self.log_execution(f"New Excel file created with data: {excel_path}")
 
 if __name__ == "__main__":
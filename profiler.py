@@ -0,0 +1,141 @@
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Stage of WebDriver calls made outside any span
+UNSTAGED = "unstaged"
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+class RunProfiler:
+    """Timing spans per crawl stage plus the WebDriver commands each stage issued.
+
+    Spans nest per thread; a WebDriver call is charged to the innermost open
+    span of the thread that made it, so parallel workers do not mix.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._durations = {}
+        self._calls = {}
+        self._call_seconds = {}
+        self._commands = {}
+        self._started = time.monotonic()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def current_stage(self):
+        stack = self._stack()
+        return stack[-1] if stack else UNSTAGED
+
+    @contextmanager
+    def span(self, name):
+        stack = self._stack()
+        stack.append(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            stack.pop()
+            with self._lock:
+                self._durations.setdefault(name, []).append(elapsed)
+
+    def instrument(self, driver):
+        """Count every WebDriver command sent by ``driver`` against the calling thread's stage."""
+        if getattr(driver, "_profiled", False):
+            return driver
+        execute = driver.execute
+
+        def profiled_execute(driver_command, params=None):
+            started = time.perf_counter()
+            try:
+                return execute(driver_command, params)
+            finally:
+                self.count_call(driver_command, time.perf_counter() - started)
+
+        driver.execute = profiled_execute
+        driver._profiled = True
+        return driver
+
+    def count_call(self, command, seconds=0.0):
+        stage = self.current_stage()
+        with self._lock:
+            self._calls[stage] = self._calls.get(stage, 0) + 1
+            self._call_seconds[stage] = self._call_seconds.get(stage, 0.0) + seconds
+            commands = self._commands.setdefault(stage, {})
+            commands[command] = commands.get(command, 0) + 1
+
+    def report(self):
+        with self._lock:
+            stages = sorted(set(self._durations) | set(self._calls))
+            report = {"wall_s": round(time.monotonic() - self._started, 3), "stages": {}}
+            for stage in stages:
+                durations = sorted(self._durations.get(stage, []))
+                report["stages"][stage] = {
+                    "count": len(durations),
+                    "total_s": round(sum(durations), 3),
+                    "p50_s": round(percentile(durations, 0.50), 3),
+                    "p95_s": round(percentile(durations, 0.95), 3),
+                    "max_s": round(durations[-1], 3) if durations else 0.0,
+                    "webdriver_calls": self._calls.get(stage, 0),
+                    "webdriver_s": round(self._call_seconds.get(stage, 0.0), 3),
+                    "commands": dict(sorted(self._commands.get(stage, {}).items())),
+                }
+            return report
+
+    def prometheus(self, report=None, prefix="adidas_crawl"):
+        """The report in the Prometheus text exposition format (for a node_exporter textfile)."""
+        report = report or self.report()
+        lines = [
+            f"# HELP {prefix}_stage_duration_seconds Duration of crawl stages.",
+            f"# TYPE {prefix}_stage_duration_seconds summary",
+        ]
+        for stage, entry in report["stages"].items():
+            name = _label(stage)
+            lines.append(f'{prefix}_stage_duration_seconds{{stage="{name}",quantile="0.5"}} {entry["p50_s"]}')
+            lines.append(f'{prefix}_stage_duration_seconds{{stage="{name}",quantile="0.95"}} {entry["p95_s"]}')
+            lines.append(f'{prefix}_stage_duration_seconds_sum{{stage="{name}"}} {entry["total_s"]}')
+            lines.append(f'{prefix}_stage_duration_seconds_count{{stage="{name}"}} {entry["count"]}')
+        lines += [
+            f"# HELP {prefix}_webdriver_calls_total WebDriver commands sent per stage.",
+            f"# TYPE {prefix}_webdriver_calls_total counter",
+        ]
+        for stage, entry in report["stages"].items():
+            lines.append(f'{prefix}_webdriver_calls_total{{stage="{_label(stage)}"}} {entry["webdriver_calls"]}')
+        lines += [
+            f"# HELP {prefix}_wall_seconds Wall time of the run.",
+            f"# TYPE {prefix}_wall_seconds gauge",
+            f"{prefix}_wall_seconds {report['wall_s']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path, prom_path):
+        """Write the JSON report and the Prometheus textfile (each replaced atomically); return the report."""
+        report = self.report()
+        for path, text in ((json_path, json.dumps(report, ensure_ascii=False, indent=2)),
+                           (prom_path, self.prometheus(report))):
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as report_file:
+                report_file.write(text)
+            os.replace(tmp_path, path)
+        return report
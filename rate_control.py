@@ -0,0 +1,266 @@
+import logging
+import math
+import re
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import TimeoutException
+
+logger = logging.getLogger()
+
+# Statuses that mean "slow down" rather than "this page is broken"
+THROTTLE_STATUSES = (403, 429, 503)
+
+# Titles of interstitials served instead of the page when the crawler is suspected of being a bot
+BOT_WALL_TITLES = ("access denied", "pardon our interruption", "are you a robot", "just a moment",
+                   "attention required", "request unsuccessful", "security check")
+
+# Markup only such interstitials carry (PerimeterX, Cloudflare and Incapsula challenges); a normal page that
+# loads reCAPTCHA or a consent script, or says "access denied" in its text, matches none of them
+BOT_WALL_SIGNATURES = re.compile(
+    r'id="px-captcha"|cf-browser-verification|window\._cf_chl_opt|<iframe[^>]+src="/_incapsula_resource', re.I)
+
+TITLE = re.compile(r"<title[^>]*>(.*?)</title>", re.I | re.S)
+
+
+class BotWallError(Exception):
+    """A bot-protection page was served instead of ``url``."""
+
+    def __init__(self, url):
+        super().__init__(f"Bot wall served for {url}")
+        self.url = url
+
+
+def is_bot_wall(text):
+    """True if a page title, or a page's HTML, is a bot-protection interstitial rather than the site.
+
+    Only the title and known challenge signatures count, never words in the page body.
+    """
+    if not text:
+        return False
+    if "<" not in text:
+        title = text
+    else:
+        head = text[:20000]
+        if BOT_WALL_SIGNATURES.search(head):
+            return True
+        match = TITLE.search(head)
+        title = match.group(1) if match else ""
+    title = " ".join(title.split()).lower()
+    return any(marker in title for marker in BOT_WALL_TITLES)
+
+
+def is_timeout(error):
+    return isinstance(error, (TimeoutException, socket.timeout, TimeoutError)) or "timed out" in str(error).lower()
+
+
+class TokenBucket:
+    """Requests per second with bursts of up to ``burst``; ``acquire`` blocks until a token is free."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            self.burst = max(1.0, rate)
+
+    def acquire(self):
+        """Take one token, returning how long the caller waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class Outcome:
+    """What the caller learned about one request: HTTP status, a bot wall, or a Retry-After."""
+
+    def __init__(self):
+        self.status = None
+        self.blocked = False
+        self.retry_after = None
+
+
+class HostController:
+    """Token bucket plus AIMD concurrency and rate for one host.
+
+    Every ``window`` healthy requests (no error, latency within
+    ``latency_tolerance`` times the best recent latency) add one concurrent
+    slot and ``rate_step`` requests/s. A timeout, a throttling status, a bot
+    wall or an error rate above ``error_threshold`` multiplies both by
+    ``decrease`` and pauses the host for ``cooldown`` seconds (or Retry-After).
+    """
+
+    def __init__(self, host, rate=2.0, min_rate=0.2, max_rate=10.0, rate_step=0.5, concurrency=2,
+                 max_concurrency=8, window=10, decrease=0.5, latency_tolerance=3.0, error_threshold=0.2,
+                 cooldown=30.0):
+        self.host = host
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate_step = rate_step
+        self.max_concurrency = max_concurrency
+        self.window = window
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.error_threshold = error_threshold
+        self.cooldown = cooldown
+
+        self.bucket = TokenBucket(rate)
+        self.concurrency = max(1, min(concurrency, max_concurrency))
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._paused_until = 0.0
+        self._baseline = None
+        self._recent = []
+        self._healthy_streak = 0
+        self.stats = {"requests": 0, "errors": 0, "timeouts": 0, "throttled": 0, "bot_walls": 0,
+                      "increases": 0, "decreases": 0, "waited_s": 0.0}
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    def _wait_for_slot(self):
+        waited = 0.0
+        with self._condition:
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause <= 0 and self._in_flight < self.concurrency:
+                    self._in_flight += 1
+                    return waited
+                started = time.monotonic()
+                self._condition.wait(timeout=pause if pause > 0 else None)
+                waited += time.monotonic() - started
+
+    def _release_slot(self):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def request(self):
+        """Hold one request slot and one token; report the outcome through the yielded Outcome."""
+        waited = self._wait_for_slot()
+        waited += self.bucket.acquire()
+        outcome = Outcome()
+        started = time.monotonic()
+        error = None
+        try:
+            yield outcome
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._release_slot()
+            self.record(time.monotonic() - started, outcome, error, waited)
+
+    def record(self, latency, outcome, error=None, waited=0.0):
+        with self._condition:
+            self.stats["requests"] += 1
+            self.stats["waited_s"] = round(self.stats["waited_s"] + waited, 3)
+            reason = None
+            if outcome.blocked:
+                self.stats["bot_walls"] += 1
+                reason = "bot wall"
+            elif outcome.status in THROTTLE_STATUSES:
+                self.stats["throttled"] += 1
+                reason = f"HTTP {outcome.status}"
+            elif error is not None and is_timeout(error):
+                self.stats["timeouts"] += 1
+                reason = "timeout"
+            failed = reason is not None or error is not None or (outcome.status or 0) >= 500
+            if failed:
+                self.stats["errors"] += 1
+
+            self._recent = (self._recent + [failed])[-self.window * 2:]
+            if reason is None and len(self._recent) >= self.window and \
+                    sum(self._recent) / len(self._recent) > self.error_threshold:
+                reason = "error rate"
+            if reason is not None:
+                self._back_off(reason, outcome.retry_after)
+                return
+
+            if not failed:
+                # The baseline is the best latency seen lately; it drifts up so one lucky request is forgotten
+                self._baseline = latency if self._baseline is None else min(self._baseline * 1.02, latency)
+                healthy = latency <= self._baseline * self.latency_tolerance
+                self._healthy_streak = self._healthy_streak + 1 if healthy else 0
+                if self._healthy_streak >= self.window:
+                    self._healthy_streak = 0
+                    self._increase()
+
+    def _increase(self):
+        rate = min(self.max_rate, self.rate + self.rate_step)
+        concurrency = min(self.max_concurrency, self.concurrency + 1)
+        if rate == self.rate and concurrency == self.concurrency:
+            return
+        self.bucket.set_rate(rate)
+        self.concurrency = concurrency
+        self.stats["increases"] += 1
+        self._condition.notify_all()
+
+    def _back_off(self, reason, retry_after=None):
+        self._healthy_streak = 0
+        self._recent = []
+        self.bucket.set_rate(max(self.min_rate, self.rate * self.decrease))
+        self.concurrency = max(1, math.floor(self.concurrency * self.decrease))
+        self._paused_until = max(self._paused_until, time.monotonic() + (retry_after or self.cooldown))
+        self.stats["decreases"] += 1
+        logger.warning(f"Backing off {self.host} ({reason}): {self.rate:.2f} req/s, concurrency {self.concurrency}, "
+                       f"paused {retry_after or self.cooldown:.0f}s")
+
+    def snapshot(self):
+        with self._condition:
+            return {"rate": round(self.rate, 2), "concurrency": self.concurrency, **self.stats}
+
+
+class RateLimiter:
+    """One HostController per host, created on first use with the shared ``policy`` settings."""
+
+    def __init__(self, **policy):
+        self.policy = policy
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def host(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = HostController(host, **self.policy)
+            return self._hosts[host]
+
+    def request(self, url):
+        """Context manager pacing one request to ``url``'s host (see HostController.request)."""
+        return self.host(url).request()
+
+    def stats(self):
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {host: controller.snapshot() for host, controller in hosts.items()}
+
+
+def retry_after_seconds(value):
+    """Seconds from a Retry-After header given in seconds (HTTP dates are ignored)."""
+    if value and re.fullmatch(r"\s*\d+\s*", value):
+        return float(value)
+    return None
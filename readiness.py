@@ -0,0 +1,139 @@
+import threading
+import time
+
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Resolves once no DOM mutation has been seen for quietMs (or after timeoutMs)
+DOM_QUIET_JS = """
+const done = arguments[arguments.length - 1];
+const quietMs = arguments[0];
+const timeoutMs = arguments[1];
+const started = performance.now();
+let last = performance.now();
+let mutations = 0;
+const observer = new MutationObserver(records => { mutations += records.length; last = performance.now(); });
+observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+(function check() {
+    const now = performance.now();
+    if (now - last >= quietMs || now - started >= timeoutMs) {
+        observer.disconnect();
+        return done({quiet: now - last >= quietMs, mutations: mutations});
+    }
+    setTimeout(check, Math.min(50, quietMs));
+})();
+"""
+
+# Resolves once the page is loaded and no new resource has finished for idleMs (or after timeoutMs)
+NETWORK_IDLE_JS = """
+const done = arguments[arguments.length - 1];
+const idleMs = arguments[0];
+const timeoutMs = arguments[1];
+const started = performance.now();
+let count = performance.getEntriesByType("resource").length;
+let last = performance.now();
+(function check() {
+    const now = performance.now();
+    const current = performance.getEntriesByType("resource").length;
+    if (current !== count) {
+        count = current;
+        last = now;
+    }
+    const idle = document.readyState === "complete" && now - last >= idleMs;
+    if (idle || now - started >= timeoutMs) {
+        return done({idle: idle, resources: count});
+    }
+    setTimeout(check, 50);
+})();
+"""
+
+
+class WaitStats:
+    """Thread-safe record of how long each kind of wait actually took."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waits = {}
+
+    def record(self, label, seconds, timed_out=False):
+        with self._lock:
+            entry = self._waits.setdefault(label, {"count": 0, "total": 0.0, "max": 0.0, "timeouts": 0})
+            entry["count"] += 1
+            entry["total"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+            if timed_out:
+                entry["timeouts"] += 1
+
+    def summary(self):
+        with self._lock:
+            return {
+                label: {
+                    "count": entry["count"],
+                    "total_s": round(entry["total"], 2),
+                    "mean_s": round(entry["total"] / entry["count"], 3),
+                    "max_s": round(entry["max"], 2),
+                    "timeouts": entry["timeouts"],
+                }
+                for label, entry in sorted(self._waits.items())
+            }
+
+
+class element_ready:
+    """One condition for present + displayed (+ enabled when ``clickable``) instead of three chained waits."""
+
+    def __init__(self, locator, clickable=False):
+        self.locator = locator
+        self.clickable = clickable
+
+    def __call__(self, driver):
+        try:
+            element = driver.find_element(*self.locator)
+            if not element.is_displayed():
+                return False
+            if self.clickable and not element.is_enabled():
+                return False
+            return element
+        except (NoSuchElementException, StaleElementReferenceException):
+            return False
+
+
+class ReadinessWait(WebDriverWait):
+    """WebDriverWait that waits on page signals instead of fixed sleeps and times every wait."""
+
+    def __init__(self, driver, timeout, stats=None, poll_frequency=0.2):
+        super().__init__(driver, timeout, poll_frequency=poll_frequency)
+        self.stats = stats
+
+    def _record(self, label, started, timed_out=False):
+        if self.stats is not None:
+            self.stats.record(label, time.monotonic() - started, timed_out)
+
+    def until(self, method, message="", label="until"):
+        started = time.monotonic()
+        try:
+            result = super().until(method, message)
+        except TimeoutException:
+            self._record(label, started, timed_out=True)
+            raise
+        self._record(label, started)
+        return result
+
+    def element(self, locator, clickable=False):
+        """Wait for a single element to be present and visible (and enabled if ``clickable``)."""
+        return self.until(element_ready(locator, clickable), label=f"element {locator[1]}")
+
+    def dom_quiet(self, quiet=0.3, timeout=5):
+        """Wait until the DOM has stopped mutating for ``quiet`` seconds."""
+        return self._run_async("dom_quiet", DOM_QUIET_JS, quiet, timeout)
+
+    def network_idle(self, idle=0.5, timeout=10):
+        """Wait until the page is loaded and no resource has completed for ``idle`` seconds."""
+        return self._run_async("network_idle", NETWORK_IDLE_JS, idle, timeout)
+
+    def _run_async(self, label, script, window, timeout):
+        started = time.monotonic()
+        self._driver.set_script_timeout(timeout + 5)
+        result = self._driver.execute_async_script(script, int(window * 1000), int(timeout * 1000))
+        settled = bool(result and (result.get("quiet") or result.get("idle")))
+        self._record(label, started, timed_out=not settled)
+        return result
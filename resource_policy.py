@@ -0,0 +1,103 @@
+import json
+import logging
+import threading
+
+logger = logging.getLogger()
+
+IMAGES = ["*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico", "*assets.adidas.com/images/*"]
+FONTS = ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"]
+MEDIA = ["*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.mov", "*/videos/*"]
+TRACKERS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googleadservices.com*",
+    "*facebook.net*", "*connect.facebook.*", "*analytics.tiktok.com*", "*criteo.*", "*hotjar.*",
+    "*bat.bing.com*", "*adobedtm.com*", "*omtrdc.net*", "*demdex.net*", "*quantummetric.com*",
+    "*contentsquare.net*", "*glassboxdigital.io*", "*yjtag.jp*", "*s.yimg.jp*", "*snapchat.com*",
+    "*pinterest.com/ct*", "*clarity.ms*", "*newrelic.com*", "*nr-data.net*",
+]
+
+# URL patterns blocked in each crawl phase (Network.setBlockedURLs wildcards)
+PROFILES = {
+    # Only hrefs are needed from listing pages
+    "listing": IMAGES + FONTS + MEDIA + TRACKERS,
+    # Image URLs are read from attributes, so the images themselves are never needed
+    "pdp": IMAGES + FONTS + MEDIA + TRACKERS,
+    "size_chart": IMAGES + FONTS + MEDIA + TRACKERS,
+    # Screenshots must look like the real page
+    "screenshots": MEDIA + TRACKERS,
+}
+
+# Typical transfer size per CDP resource type, used to estimate bytes avoided by a blocked request
+ESTIMATED_BYTES = {"Image": 60_000, "Font": 40_000, "Media": 500_000, "Script": 80_000, "Stylesheet": 30_000}
+DEFAULT_ESTIMATED_BYTES = 10_000
+
+
+def enable_performance_log(options):
+    """Ask chromedriver to record CDP network events so blocked requests can be counted."""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+class ResourcePolicy:
+    """Apply per-phase CDP request blocking to every driver and count what it avoided."""
+
+    def __init__(self, profiles=None, enabled=True):
+        self.profiles = profiles or PROFILES
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.blocked_requests = 0
+        self.blocked_bytes_estimate = 0
+        self.blocked_by_type = {}
+        self.loaded_requests = 0
+        self.loaded_bytes = 0
+
+    def set_phase(self, driver, phase):
+        """Switch the driver's blocked-URL list to ``phase``'s profile (no-op if already there)."""
+        if not self.enabled or getattr(driver, "resource_phase", None) == phase:
+            return
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.profiles[phase]})
+        except Exception as e:
+            logger.warning(f"Failed to apply resource policy '{phase}': {e}")
+            return
+        driver.resource_phase = phase
+
+    def collect(self, driver):
+        """Drain the driver's performance log and add its requests to the counters."""
+        if not self.enabled:
+            return
+        try:
+            entries = driver.get_log("performance")
+        except Exception:
+            return
+        blocked, blocked_bytes, by_type, loaded, loaded_bytes = 0, 0, {}, 0, 0
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            params = message.get("params", {})
+            if message.get("method") == "Network.loadingFailed" and params.get("blockedReason"):
+                resource_type = params.get("type", "Other")
+                blocked += 1
+                blocked_bytes += ESTIMATED_BYTES.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+                by_type[resource_type] = by_type.get(resource_type, 0) + 1
+            elif message.get("method") == "Network.loadingFinished":
+                loaded += 1
+                loaded_bytes += int(params.get("encodedDataLength", 0))
+        with self._lock:
+            self.blocked_requests += blocked
+            self.blocked_bytes_estimate += blocked_bytes
+            for resource_type, count in by_type.items():
+                self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + count
+            self.loaded_requests += loaded
+            self.loaded_bytes += loaded_bytes
+
+    def stats(self):
+        with self._lock:
+            return {
+                "blocked_requests": self.blocked_requests,
+                "blocked_bytes_estimate": self.blocked_bytes_estimate,
+                "blocked_by_type": dict(self.blocked_by_type),
+                "loaded_requests": self.loaded_requests,
+                "loaded_bytes": self.loaded_bytes,
+            }
@@ -0,0 +1,139 @@
+import time
+
+from extractor import parse_reviews
+
+# Clicks "load more" inside the page until the list stops growing, then returns every review's
+# outerHTML. One WebDriver round trip replaces a click + count + wait + sleep cycle per batch.
+# With known review keys it also stops once a known review is rendered and at least the expected
+# number of new ones are.
+LOAD_ALL_REVIEWS_JS = """
+const done = arguments[arguments.length - 1];
+const maxClicks = arguments[0];
+const batchTimeoutMs = arguments[1];
+const known = new Set(arguments[2] || []);
+const expectedNew = arguments[3] || 0;
+const reviewSelector = '[data-auto-id="review"]';
+const buttonSelector = "button[data-auto-id='reviews-load-more']";
+let clicks = 0;
+
+function count() {
+    return document.querySelectorAll(reviewSelector).length;
+}
+
+function text(review, selector) {
+    const element = review.querySelector(selector);
+    return element ? element.textContent.trim() : "";
+}
+
+function caughtUp() {
+    if (!known.size) {
+        return false;
+    }
+    let seenKnown = false;
+    let fresh = 0;
+    for (const review of document.querySelectorAll(reviewSelector)) {
+        const key = [text(review, 'span[class*="user-name"]'), text(review, 'span[class*="date"]'),
+                     text(review, "h4")].join("|");
+        if (known.has(key)) {
+            seenKnown = true;
+        } else {
+            fresh += 1;
+        }
+    }
+    return seenKnown && fresh >= expectedNew;
+}
+
+function finish(reason) {
+    const html = Array.from(document.querySelectorAll(reviewSelector)).map(e => e.outerHTML).join("");
+    done({clicks: clicks, count: count(), reason: reason, html: html});
+}
+
+function step() {
+    const button = document.querySelector(buttonSelector);
+    if (!button || button.disabled || button.offsetParent === null) {
+        return finish("exhausted");
+    }
+    if (caughtUp()) {
+        return finish("known");
+    }
+    if (clicks >= maxClicks) {
+        return finish("max_clicks");
+    }
+    const before = count();
+    button.scrollIntoView({block: "center"});
+    button.click();
+    clicks += 1;
+    const started = performance.now();
+    (function poll() {
+        if (count() > before) {
+            return setTimeout(step, 0);
+        }
+        if (performance.now() - started > batchTimeoutMs) {
+            return finish("timeout");
+        }
+        setTimeout(poll, 50);
+    })();
+}
+
+step();
+"""
+
+# Review count of the open PDP: the review header once the section is open, else the JSON-LD reviewCount
+REVIEW_COUNT_JS = """
+const header = document.querySelector('div[class*="reviews-header"] > h2');
+if (header) {
+    const match = header.textContent.match(/\\((\\d+)\\)/);
+    return match ? parseInt(match[1], 10) : 0;
+}
+for (const script of document.querySelectorAll('script[type="application/ld+json"]')) {
+    try {
+        const items = [].concat(JSON.parse(script.textContent));
+        for (const item of items) {
+            const rating = item && item.aggregateRating;
+            if (rating && rating.reviewCount !== undefined) {
+                return parseInt(rating.reviewCount, 10);
+            }
+        }
+    } catch (e) {}
+}
+return null;
+"""
+
+
+def review_key(review):
+    """Identity of a review across runs: reviewer, date and title."""
+    return "|".join(review.get(field) or "" for field in ("reviewer_id", "date", "review_title"))
+
+
+def review_count(driver):
+    """Number of reviews the open PDP reports, or None if it does not say."""
+    return driver.execute_script(REVIEW_COUNT_JS)
+
+
+def harvest_reviews(driver, max_clicks=500, batch_timeout=10, total_timeout=600, known_keys=None, expected_new=0):
+    """Load every review batch in-page and parse them all in one pass.
+
+    Returns ``(reviews_data, stats)`` where ``reviews_data`` uses the same
+    schema as the row's "User Reviews" column. With ``known_keys`` (see
+    review_key) paging stops once a known review and ``expected_new`` unknown
+    ones are rendered, and only the unknown reviews are returned.
+    """
+    started = time.monotonic()
+    known_keys = list(known_keys or [])
+    driver.set_script_timeout(total_timeout)
+    result = driver.execute_async_script(LOAD_ALL_REVIEWS_JS, max_clicks, int(batch_timeout * 1000), known_keys,
+                                         expected_new)
+    reviews_data = parse_reviews(result["html"])
+    parsed = len(reviews_data)
+    if known_keys:
+        known = set(known_keys)
+        reviews_data = [review for review in reviews_data if review_key(review) not in known]
+    stats = {
+        "clicks": result["clicks"],
+        "rendered": result["count"],
+        "parsed": parsed,
+        "new": len(reviews_data),
+        "stop_reason": result["reason"],
+        "seconds": round(time.monotonic() - started, 2),
+    }
+    return reviews_data, stats
@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+import pytz
+
+logger = logging.getLogger()
+
+JST = pytz.timezone('Asia/Tokyo')
+
+# How much of a bulk payload (size info, reviews, coordinated items) goes into the log
+PAYLOAD_VERBOSITY = ("none", "summary", "full")
+
+_STOP = object()
+
+
+def _summarize(payload):
+    if isinstance(payload, list):
+        return {"count": len(payload)}
+    if isinstance(payload, dict):
+        return {"count": len(payload), "keys": list(payload)[:20]}
+    return {"value": payload}
+
+
+class RunLogger:
+    """Queue log records to a background thread that appends compact JSONL to open files.
+
+    Each record carries the calling thread's product context (index, URL,
+    stage) so parallel workers' lines can be told apart. Stages are also
+    timed as spans of ``profiler`` (a profiler.RunProfiler) when one is given.
+    """
+
+    def __init__(self, execution_dir, error_dir, payload_verbosity="summary", batch_size=100, flush_interval=1.0,
+                 profiler=None):
+        if payload_verbosity not in PAYLOAD_VERBOSITY:
+            raise ValueError(f"payload_verbosity must be one of {PAYLOAD_VERBOSITY}")
+        os.makedirs(execution_dir, exist_ok=True)
+        os.makedirs(error_dir, exist_ok=True)
+        self.execution_log_path = os.path.join(execution_dir, "execution_log.jsonl")
+        self.error_log_path = os.path.join(error_dir, "error_log.jsonl")
+        self.payload_verbosity = payload_verbosity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.profiler = profiler
+
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        self._files = {
+            "execution": open(self.execution_log_path, 'a', encoding="utf-8"),
+            "error": open(self.error_log_path, 'a', encoding="utf-8"),
+        }
+        self._writer = threading.Thread(target=self._write_loop, name="run-logger", daemon=True)
+        self._writer.start()
+
+    # Context
+
+    def set_context(self, **fields):
+        """Attach fields (product_index, url, ...) to every record logged from this thread."""
+        context = dict(getattr(self._local, "context", {}))
+        context.update(fields)
+        self._local.context = {key: value for key, value in context.items() if value is not None}
+
+    def clear_context(self):
+        self._local.context = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Tag records with ``name`` and log the stage's duration when it ends."""
+        previous = getattr(self._local, "context", {}).get("stage")
+        self.set_context(stage=name)
+        started = time.monotonic()
+        try:
+            with self.profiler.span(name) if self.profiler else nullcontext():
+                yield
+        finally:
+            self.execution("stage finished", duration=round(time.monotonic() - started, 3))
+            self.set_context(stage=previous)
+
+    # Records
+
+    def _put(self, kind, record):
+        record["ts"] = time.time()
+        for key, value in getattr(self._local, "context", {}).items():
+            record.setdefault(key, value)
+        self._queue.put((kind, record))
+
+    def execution(self, message, **fields):
+        self._put("execution", {"level": "info", "message": message, **fields})
+
+    def error(self, message, error=None, **fields):
+        record = {"level": "error", "message": message, **fields}
+        if error is None:
+            error = sys.exc_info()[1]
+        if error is not None:
+            record["error_class"] = type(error).__name__
+        # The traceback belongs to the calling thread, so it is formatted here rather than in the writer
+        trace = traceback.format_exc()
+        if trace and trace != "NoneType: None\n":
+            record["traceback"] = trace
+        self._put("error", record)
+        logger.error(message)
+
+    def payload(self, name, payload):
+        """Log a bulk structure according to payload_verbosity."""
+        if self.payload_verbosity == "none":
+            return
+        if self.payload_verbosity == "summary":
+            self.execution(name, **_summarize(payload))
+        else:
+            self.execution(name, payload=payload)
+
+    # Writer
+
+    def _write_loop(self):
+        pending = 0
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                break
+            if item is not None:
+                kind, record = item
+                record["ts"] = datetime.fromtimestamp(record["ts"], JST).isoformat(timespec="milliseconds")
+                try:
+                    self._files[kind].write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                    pending += 1
+                except Exception as e:
+                    logger.error(f"Failed to write log record: {e}")
+            if pending and (pending >= self.batch_size or time.monotonic() - last_flush >= self.flush_interval):
+                self._flush()
+                pending = 0
+                last_flush = time.monotonic()
+        # Everything queued before close() has been written; flush it
+        self._flush()
+
+    def _flush(self):
+        for log_file in self._files.values():
+            try:
+                log_file.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush log: {e}")
+
+    def close(self):
+        """Write every queued record and close the files."""
+        self._queue.put(_STOP)
+        self._writer.join()
+        for log_file in self._files.values():
+            log_file.close()
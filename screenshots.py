@@ -0,0 +1,118 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = logging.getLogger()
+
+FORMATS = ("png", "jpeg", "webp")
+
+
+class ScreenshotPolicy:
+    """Which captures are kept: 'all', 'errors' or 'sample:N' (every error plus 1 in N successes).
+
+    ``stages`` optionally limits captures to the named stages.
+    """
+
+    def __init__(self, mode="all", stages=None):
+        self.mode = mode
+        self.sample_every = 1
+        if mode.startswith("sample:"):
+            self.sample_every = max(1, int(mode.split(":", 1)[1]))
+        elif mode not in ("all", "errors"):
+            raise ValueError(f"Unknown screenshot policy: {mode}")
+        self.stages = set(stages) if stages else None
+        self._successes = 0
+        self._lock = threading.Lock()
+
+    def wants(self, kind, stage=None):
+        if self.stages is not None and stage not in self.stages:
+            return False
+        if kind == "error":
+            return True
+        if self.mode == "errors":
+            return False
+        with self._lock:
+            self._successes += 1
+            return (self._successes - 1) % self.sample_every == 0
+
+
+class ScreenshotPipeline:
+    """Capture on the crawl thread, then dedupe, encode and write on a background worker."""
+
+    def __init__(self, screenshot_dir, policy=None, image_format="png", quality=70):
+        if image_format not in FORMATS:
+            raise ValueError(f"image_format must be one of {FORMATS}")
+        if image_format != "png" and Image is None:
+            logger.warning("Pillow is not installed; screenshots are saved as PNG.")
+            image_format = "png"
+        self.screenshot_dir = screenshot_dir
+        self.policy = policy or ScreenshotPolicy()
+        self.image_format = image_format
+        self.quality = quality
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screenshots")
+        self._lock = threading.Lock()
+        self._seen = set()
+        self.stats = {"captured": 0, "skipped": 0, "duplicates": 0, "written": 0, "bytes_written": 0, "failed": 0}
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def wants(self, kind, stage=None):
+        """Ask the policy before spending any wait on a capture."""
+        if self.policy.wants(kind, stage):
+            return True
+        self._count("skipped")
+        return False
+
+    def capture(self, driver, name, kind, timestamp):
+        """Grab the screenshot in one round trip; encoding and writing happen off-thread."""
+        png = driver.get_screenshot_as_png()
+        self._count("captured")
+        sub_dir = 'error' if kind == 'error' else 'success'
+        self._executor.submit(self._save, png, sub_dir, f"{name}_{timestamp}")
+
+    def _encode(self, png):
+        if self.image_format == "png":
+            return png, "png"
+        image = Image.open(io.BytesIO(png))
+        buffer = io.BytesIO()
+        if self.image_format == "jpeg":
+            image.convert("RGB").save(buffer, "JPEG", quality=self.quality, optimize=True)
+            return buffer.getvalue(), "jpg"
+        image.save(buffer, "WEBP", quality=self.quality, method=4)
+        return buffer.getvalue(), "webp"
+
+    def _save(self, png, sub_dir, base_name):
+        try:
+            digest = hashlib.sha1(png).hexdigest()
+            with self._lock:
+                duplicate = digest in self._seen
+                self._seen.add(digest)
+            if duplicate:
+                self._count("duplicates")
+                return
+            data, extension = self._encode(png)
+            full_dir = os.path.join(self.screenshot_dir, sub_dir)
+            os.makedirs(full_dir, exist_ok=True)
+            path = os.path.join(full_dir, f"{base_name}.{extension}")
+            with open(path, "wb") as image_file:
+                image_file.write(data)
+            self._count("written")
+            self._count("bytes_written", len(data))
+            logger.info(f"Screenshot saved: {path}")
+        except Exception as e:
+            self._count("failed")
+            logger.error(f"Failed to save screenshot: {e}")
+
+    def close(self):
+        """Wait for queued screenshots to be written."""
+        self._executor.shutdown(wait=True)
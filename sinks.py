@@ -0,0 +1,226 @@
+import json
+import logging
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logger = logging.getLogger()
+
+# Summary-sheet headers for nested columns, which hold their item count instead of JSON
+SUMMARY_COLUMNS = {
+    "Size info": "Size chart measurements",
+    "User Reviews": "Reviews extracted",
+    "Coordinated product info": "Coordinated items",
+}
+
+
+def _cell(value):
+    """Flatten nested values (reviews, size info, coordinated items) to a JSON string."""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+class JsonlSink:
+    """Append each row to a JSON Lines file as soon as it is produced."""
+
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        self.rows_written = 0
+        self._file = open(path, 'a', encoding="utf-8")
+
+    def write(self, row):
+        self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.rows_written += 1
+
+    def when_durable(self, callback):
+        """Call ``callback`` once every row written so far is on disk (at once: each write is flushed)."""
+        callback()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ParquetSink:
+    """Buffer rows and flush them to a Parquet dataset one row group at a time.
+
+    ``path`` is a directory with one complete file (``part-00001.parquet``, ...)
+    per row group, each moved into place once written, so a crash loses only
+    the buffered rows and never leaves a file without its footer. Readers such
+    as pyarrow and pandas open the directory as one table.
+    Nested columns are stored as JSON strings so every row group shares one schema.
+    ``schema`` fixes the column types up front; otherwise they are inferred from the first row group.
+    """
+
+    def __init__(self, path, row_group_size=100, schema=None):
+        if pq is None:
+            raise ImportError("pyarrow is required for Parquet output")
+        self.path = path
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._buffer = []
+        self._durable_callbacks = []
+        self._schema = schema
+        os.makedirs(path, exist_ok=True)
+        self._parts = len(_part_files(path))
+
+    def write(self, row):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.row_group_size:
+            self.flush()
+
+    def when_durable(self, callback):
+        """Call ``callback`` once every row written so far is in a finished part file."""
+        if self._buffer:
+            self._durable_callbacks.append(callback)
+        else:
+            callback()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        if self._schema is None:
+            columns = list(self._buffer[0].keys())
+            self._schema = pa.schema([
+                (column, pa.int64() if _is_integer_column([row.get(column) for row in self._buffer]) else pa.string())
+                for column in columns
+            ])
+        data = {}
+        for field in self._schema:
+            values = [_cell(row.get(field.name)) for row in self._buffer]
+            if field.type == pa.string():
+                values = [None if value is None else str(value) for value in values]
+            data[field.name] = values
+        table = pa.Table.from_pydict(data, schema=self._schema)
+        self._parts += 1
+        part_path = os.path.join(self.path, f"part-{self._parts:05d}.parquet")
+        with open(part_path + ".tmp", "wb") as part_file:
+            pq.write_table(table, part_file)
+            part_file.flush()
+            os.fsync(part_file.fileno())
+        os.replace(part_path + ".tmp", part_path)
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+        callbacks, self._durable_callbacks = self._durable_callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _is_integer_column(values):
+    """Integer columns (e.g. review counts) stay numeric; everything else is stored as text."""
+    present = [value for value in values if value is not None]
+    return bool(present) and all(isinstance(value, int) and not isinstance(value, bool) for value in present)
+
+
+def open_sink(output_format, path):
+    """Create the sink for ``output_format`` ('jsonl' or 'parquet')."""
+    if output_format == "jsonl":
+        return JsonlSink(path)
+    if output_format == "parquet":
+        return ParquetSink(path)
+    raise ValueError(f"Unknown output format: {output_format}")
+
+
+def when_durable(sinks, callback):
+    """Call ``callback`` once every sink in ``sinks`` has all rows written so far on disk."""
+    sinks = list(sinks)
+    waiting = len(sinks)
+
+    def sink_durable():
+        nonlocal waiting
+        waiting -= 1
+        if waiting == 0:
+            callback()
+
+    for sink in sinks:
+        sink.when_durable(sink_durable)
+
+
+def _part_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith("part-") and name.endswith(".parquet"))
+
+
+def _iter_parquet_file(path):
+    try:
+        parquet_file = pq.ParquetFile(path)
+    except Exception as e:
+        # Left by a crash before the file was finished (no footer); its rows were never marked done
+        logger.warning(f"Skipping unreadable Parquet output {path}: {e}")
+        return
+    for batch in parquet_file.iter_batches():
+        yield from batch.to_pylist()
+
+
+def iter_rows(path):
+    """Stream rows back from a JSONL or Parquet output, skipping what a crash left unfinished."""
+    if path.endswith(".parquet"):
+        if pq is None:
+            raise ImportError("pyarrow is required to read Parquet output")
+        paths = [os.path.join(path, name) for name in _part_files(path)] if os.path.isdir(path) else [path]
+        for part_path in paths:
+            yield from _iter_parquet_file(part_path)
+        return
+    with open(path, encoding="utf-8") as rows_file:
+        for number, line in enumerate(rows_file, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping damaged line {number} of {path}")
+
+
+def export_excel(source_paths, excel_path, summary=False):
+    """Write one or more output files to Excel row by row with a write-only workbook.
+
+    With ``summary`` nested columns hold their item count (the detail lives in the normalized tables).
+    """
+    from openpyxl import Workbook
+
+    if isinstance(source_paths, str):
+        source_paths = [source_paths]
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    columns = None
+    count = 0
+    for row in (row for path in source_paths if os.path.exists(path) for row in iter_rows(path)):
+        if columns is None:
+            columns = list(row.keys())
+            sheet.append([SUMMARY_COLUMNS.get(column, column) if summary else column for column in columns])
+        if summary:
+            sheet.append([len(value) if isinstance(value, (list, dict)) else value
+                          for value in (row.get(column) for column in columns)])
+        else:
+            sheet.append([_cell(row.get(column)) for column in columns])
+        count += 1
+
+    if os.path.exists(excel_path):
+        os.remove(excel_path)
+    workbook.save(excel_path)
+    return count
@@ -0,0 +1,141 @@
+import copy
+import hashlib
+import re
+import threading
+
+from extractor import parse_html, parse_size_chart
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# Everything on the PDP that decides which size chart the modal shows, read in one round trip: breadcrumb,
+# category, size labels, the size-chart link's target and data attributes, and the fit line of the specifications
+SIZE_CHART_IDENTITY_JS = """
+const text = selector => {
+    const element = document.querySelector(selector);
+    return element ? element.textContent.trim() : "";
+};
+const sizes = Array.from(document.querySelectorAll('div[data-auto-id="size-selector"] button span'))
+    .map(span => span.textContent.trim());
+if (!sizes.length) {
+    return null;
+}
+const crumbs = Array.from(document.querySelectorAll('ol[data-auto-id="breadcrumbs-desktop"] [property="name"]'))
+    .map(name => name.textContent.trim());
+const link = document.querySelector('[data-auto-id="size-chart-link"]');
+const target = link ? Array.from(link.attributes)
+    .filter(attribute => attribute.name === "href"
+        || (attribute.name.startsWith("data-") && attribute.name !== "data-auto-id"))
+    .map(attribute => `${attribute.name}=${attribute.value}`).sort().join(";") : "";
+const fit = Array.from(document.querySelectorAll('#navigation-target-specifications li'))
+    .map(item => item.textContent.trim()).find(line => line.includes("フィット")) || "";
+return [crumbs.join("/"), text('div[data-auto-id="product-category"] span'), sizes.join(","), target, fit].join("|");
+"""
+
+
+def size_chart_identity(driver):
+    """Key for the size chart a PDP will show, taken before the modal is opened (None without sizes)."""
+    return driver.execute_script(SIZE_CHART_IDENTITY_JS)
+
+
+def size_chart_identity_from_html(html):
+    """The same key as size_chart_identity, computed from a PDP's HTML without a browser."""
+    soup = parse_html(html)
+    sizes = [span.get_text().strip() for span in soup.select('div[data-auto-id="size-selector"] button span')]
+    if not sizes:
+        return None
+    crumbs = [name.get_text().strip()
+              for name in soup.select('ol[data-auto-id="breadcrumbs-desktop"] [property="name"]')]
+    category = soup.select_one('div[data-auto-id="product-category"] span')
+    link = soup.select_one('[data-auto-id="size-chart-link"]')
+    target = ";".join(sorted(f"{name}={value}" for name, value in (link.attrs.items() if link else ())
+                             if name == "href" or (name.startswith("data-") and name != "data-auto-id")))
+    fit = next((line for line in (item.get_text().strip()
+                                  for item in soup.select('#navigation-target-specifications li'))
+                if "フィット" in line), "")
+    return "|".join(["/".join(crumbs), category.get_text().strip() if category else "", ",".join(sizes), target, fit])
+
+
+def chart_fingerprint(modal_html):
+    """Content fingerprint of the modal's tables, insensitive to whitespace and generated ids."""
+    tables = re.findall(r"<table\b.*?</table>", modal_html or "", flags=re.S | re.I)
+    normalized = re.sub(r'\s+(id|class|style)="[^"]*"', "", "".join(tables))
+    normalized = re.sub(r">\s+<", "><", normalized)
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def _cell_text(element):
+    """Text of a cell like BeautifulSoup's get_text(strip=True): every text fragment stripped, then joined."""
+    return "".join(text.strip() for text in element.itertext())
+
+
+def parse_size_chart_fast(modal_html):
+    """sizeInfo from the modal's outerHTML with lxml; same result as extractor.parse_size_chart."""
+    if lxml is None:
+        return parse_size_chart(modal_html)
+    root = lxml.html.fromstring(modal_html)
+    size_info = {}
+    for table in root.iter("table"):
+        thead = table.find(".//thead")
+        tbody = table.find(".//tbody")
+        if thead is None or tbody is None:
+            continue
+        size_headers = [_cell_text(th) for th in thead.iter("th")][1:]
+        for tr in tbody.iter("tr"):
+            cells = [_cell_text(cell) for cell in tr.iter("th", "td")]
+            if len(cells) < 2:
+                continue
+            size_values = cells[1:]
+            size_dict = {size: size_values[idx] for idx, size in enumerate(size_headers)
+                         if idx < len(size_values) and size_values[idx]}
+            size_info.setdefault(cells[0], []).append(size_dict)
+    return size_info
+
+
+class SizeChartCache:
+    """sizeInfo cached by chart fingerprint, plus which PDP identities showed which chart.
+
+    ``lookup`` answers from a PDP identity alone, so a hit needs no modal
+    open/close. The identity is a heuristic (the site exposes no chart id),
+    so lookups are opt-in; ``store`` parses a newly opened modal only when
+    its fingerprint has not been seen before, whether or not lookups are on.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._charts = {}
+        self._identities = {}
+        self.hits = 0
+        self.misses = 0
+        self.parsed = 0
+
+    def lookup(self, identity):
+        with self._lock:
+            fingerprint = self._identities.get(identity)
+            if fingerprint is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return copy.deepcopy(self._charts[fingerprint])
+
+    def store(self, identity, modal_html):
+        """Return the sizeInfo of an opened modal, parsing it only for an unseen chart."""
+        fingerprint = chart_fingerprint(modal_html)
+        with self._lock:
+            size_info = self._charts.get(fingerprint)
+        if size_info is None:
+            size_info = parse_size_chart_fast(modal_html)
+            with self._lock:
+                self.parsed += 1
+                self._charts.setdefault(fingerprint, size_info)
+        with self._lock:
+            if identity:
+                self._identities[identity] = fingerprint
+        return copy.deepcopy(size_info)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "charts": len(self._charts),
+                    "identities": len(self._identities), "parsed": self.parsed}
@@ -0,0 +1,70 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that never change the content of a look page
+TRACKING_PARAMS = ("utm_", "cm_", "gclid", "fbclid", "ref", "_")
+
+
+def normalize_style_url(url):
+    """Cache key for a style-card URL: lower-cased host, no fragment, tracking params dropped, params sorted."""
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not any(key == param or (param.endswith("_") and key.startswith(param)) for param in TRACKING_PARAMS)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+
+class StyleCardCache:
+    """Thread-safe TTL + LRU memo of coordinated items scraped from style-card pages."""
+
+    def __init__(self, ttl_seconds=3600, max_entries=512):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, url):
+        """Cached coordinated items for ``url``, or None on a miss."""
+        key = normalize_style_url(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, url, items):
+        key = normalize_style_url(url)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), copy.deepcopy(items))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+            }
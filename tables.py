@@ -0,0 +1,198 @@
+import csv
+import os
+import re
+from datetime import date, datetime
+
+from sinks import ParquetSink, pa, when_durable
+
+# Normalized tables, linked by product_number: (column, arrow type name) in column order
+TABLES = {
+    "products": [
+        ("product_number", "string"), ("breadcrumb", "string"), ("category", "string"),
+        ("product_title", "string"), ("price_yen", "int64"), ("price_text", "string"), ("sizes", "string"),
+        ("image_url", "string"), ("description_title", "string"), ("description", "string"),
+        ("itemization", "string"), ("rating", "float64"), ("number_of_reviews", "int64"),
+        ("reviews_extracted", "int64"), ("coordinated_items", "int64"),
+    ],
+    "reviews": [
+        ("product_number", "string"), ("review_index", "int64"), ("review_date", "date32"),
+        ("date_text", "string"), ("rating", "int64"), ("review_title", "string"),
+        ("review_description", "string"), ("reviewer_id", "string"),
+    ],
+    "coordinated_items": [
+        ("product_number", "string"), ("item_index", "int64"), ("item_product_number", "string"),
+        ("product_page_url", "string"), ("image_url", "string"), ("price_yen", "int64"), ("price_text", "string"),
+    ],
+    "size_chart": [
+        ("product_number", "string"), ("measurement", "string"), ("size", "string"), ("value", "string"),
+        ("value_min", "float64"), ("value_max", "float64"),
+    ],
+}
+
+DATE_FORMATS = ("%Y/%m/%d", "%Y-%m-%d", "%Y.%m.%d", "%Y年%m月%d日", "%b %d, %Y", "%B %d, %Y", "%d/%m/%Y")
+
+TABLE_FORMATS = ("parquet", "csv")
+
+
+def parse_price(text):
+    """Whole yen from a price such as '¥7,100' or '7,100円（税込）'."""
+    if not text:
+        return None
+    digits = re.sub(r"[^\d]", "", str(text).split(".")[0])
+    return int(digits) if digits else None
+
+
+def parse_float(text):
+    if text in (None, ""):
+        return None
+    try:
+        return float(str(text).replace(",", "."))
+    except ValueError:
+        return None
+
+
+def parse_date(text):
+    if not text:
+        return None
+    text = " ".join(str(text).split())
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_range(text):
+    """(min, max) of a size-chart cell such as '88', '88.5' or '88-91'."""
+    numbers = [float(number) for number in re.findall(r"\d+(?:\.\d+)?", str(text or ""))]
+    if not numbers:
+        return None, None
+    return min(numbers), max(numbers)
+
+
+def normalize_row(row):
+    """Split one output row into records for every normalized table."""
+    number = row.get("Product number")
+    reviews = row.get("User Reviews") or []
+    items = row.get("Coordinated product info") or []
+    records = {
+        "products": [{
+            "product_number": number,
+            "breadcrumb": row.get("Breadcrumb"),
+            "category": row.get("Category"),
+            "product_title": row.get("Product title"),
+            "price_yen": parse_price(row.get("Price")),
+            "price_text": row.get("Price"),
+            "sizes": row.get("Sizes"),
+            "image_url": row.get("Image URL"),
+            "description_title": row.get("Title of description"),
+            "description": row.get("Description"),
+            "itemization": row.get("General description (itemization)"),
+            "rating": parse_float(row.get("Rating")),
+            "number_of_reviews": row.get("Number of reviews"),
+            "reviews_extracted": len(reviews),
+            "coordinated_items": len(items),
+        }],
+        "reviews": [{
+            "product_number": number,
+            "review_index": index,
+            "review_date": parse_date(review.get("date")),
+            "date_text": review.get("date"),
+            "rating": review.get("rating"),
+            "review_title": review.get("review_title"),
+            "review_description": review.get("review_description"),
+            "reviewer_id": review.get("reviewer_id"),
+        } for index, review in enumerate(reviews)],
+        "coordinated_items": [{
+            "product_number": number,
+            "item_index": index,
+            "item_product_number": item.get("product_number"),
+            "product_page_url": item.get("product_page_url"),
+            "image_url": item.get("image_url"),
+            "price_yen": parse_price(item.get("price")),
+            "price_text": item.get("price"),
+        } for index, item in enumerate(items)],
+        "size_chart": [],
+    }
+    for measurement, size_rows in (row.get("Size info") or {}).items():
+        for size_row in size_rows:
+            for size, value in size_row.items():
+                value_min, value_max = parse_range(value)
+                records["size_chart"].append({
+                    "product_number": number, "measurement": measurement, "size": size, "value": value,
+                    "value_min": value_min, "value_max": value_max,
+                })
+    return records
+
+
+class CsvTableSink:
+    """Append records to a CSV file with a fixed header (dates as ISO strings)."""
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.rows_written = 0
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'a', encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        if new_file:
+            self._writer.writerow(columns)
+
+    def write(self, record):
+        self._writer.writerow([
+            record.get(column).isoformat() if isinstance(record.get(column), date) else record.get(column)
+            for column in self.columns
+        ])
+        self._file.flush()
+        self.rows_written += 1
+
+    def when_durable(self, callback):
+        callback()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class NormalizedSink:
+    """Stream output rows into the normalized tables, one file per table in ``directory``."""
+
+    def __init__(self, directory, table_format="parquet", row_group_size=500):
+        if table_format not in TABLE_FORMATS:
+            raise ValueError(f"table_format must be one of {TABLE_FORMATS}")
+        if table_format == "parquet" and pa is None:
+            raise ImportError("pyarrow is required for Parquet tables")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.rows_written = 0
+        self.records_written = dict.fromkeys(TABLES, 0)
+        self._tables = {}
+        for name, columns in TABLES.items():
+            path = os.path.join(directory, f"{name}.{table_format}")
+            if table_format == "parquet":
+                schema = pa.schema([(column, getattr(pa, type_name)()) for column, type_name in columns])
+                self._tables[name] = ParquetSink(path, row_group_size=row_group_size, schema=schema)
+            else:
+                self._tables[name] = CsvTableSink(path, [column for column, _ in columns])
+
+    def write(self, row):
+        for name, records in normalize_row(row).items():
+            for record in records:
+                self._tables[name].write(record)
+            self.records_written[name] += len(records)
+        self.rows_written += 1
+
+    def when_durable(self, callback):
+        """Call ``callback`` once every table holds all records written so far."""
+        when_durable(self._tables.values(), callback)
+
+    def close(self):
+        for table in self._tables.values():
+            table.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
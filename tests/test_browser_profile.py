@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+import browser_profile
+from browser_profile import BrowserProfiles
+
+pytestmark = pytest.mark.skipif(browser_profile.fcntl is None, reason="slot locks need fcntl")
+
+
+def test_processes_sharing_a_root_never_share_or_clean_a_leased_slot(tmp_path):
+    # Two instances stand in for two crawler processes: each holds its own flock file descriptors
+    first, second = BrowserProfiles(str(tmp_path)), BrowserProfiles(str(tmp_path))
+    slot, profile_dir, _ = first.lease()
+    crashpad = os.path.join(profile_dir, "Crashpad")
+    os.makedirs(crashpad)
+
+    assert second.lease()[0] == slot + 1
+    second.cleanup()
+    assert os.path.isdir(crashpad)
+
+    first.release(slot)
+    assert second.lease()[0] == slot
+    first.cleanup()
+    assert os.path.isdir(crashpad)
+
+
+def test_cleanup_trims_slots_no_process_holds(tmp_path):
+    profiles = BrowserProfiles(str(tmp_path))
+    slot, profile_dir, _ = profiles.lease()
+    os.makedirs(os.path.join(profile_dir, "Crashpad"))
+    profiles.release(slot)
+    BrowserProfiles(str(tmp_path)).cleanup()
+    assert not os.path.exists(os.path.join(profile_dir, "Crashpad"))
+    assert profiles.lease()[0] == slot
@@ -0,0 +1,127 @@
+import socket
+import threading
+
+from coordinator import CoordinatorClient, ShardCoordinator, ShardWorker
+
+LINKS = [f"http://fixture/tee/BM{n:04d}.html" for n in range(1, 7)]
+
+
+class StubPool:
+    """Stands in for ProductWorkerPool: every link becomes a row at once, in reverse order."""
+
+    def __init__(self):
+        self.runs = []
+
+    def run(self, product_links, on_row=None, on_done=None):
+        self.runs.append(list(product_links))
+        for index, url in reversed(list(enumerate(product_links, start=1))):
+            on_done(index, url, {"Product number": url}, None)
+
+
+def _address():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return f"127.0.0.1:{probe.getsockname()[1]}"
+
+
+def _serve(coordinator, rows, results):
+    thread = threading.Thread(target=coordinator.run, args=(LINKS,), kwargs={
+        "on_row": lambda index, row: rows.append((index, row["Product number"])),
+        "on_done": lambda index, url, row, error: results.append((index, url, error))}, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_expired_lease_is_leased_again_and_rows_merge_in_order():
+    address = _address()
+    coordinator = ShardCoordinator(address, shard_size=2, lease_ttl=0.5, linger=0)
+    rows, results = [], []
+    thread = _serve(coordinator, rows, results)
+
+    # A worker that leases the first shard and then dies without heartbeating
+    stalled = CoordinatorClient(address, connect_timeout=5)
+    lease = stalled.request({"op": "lease", "worker": "stalled"})
+    assert [url for _, url in lease["items"]] == LINKS[:2]
+    stalled.close()
+
+    pool = StubPool()
+    worker = ShardWorker(CoordinatorClient(address, connect_timeout=5), pool, name="live")
+    stats = worker.run()
+    thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert pool.runs == [LINKS[2:4], LINKS[4:6], LINKS[:2]]
+    assert stats == {"shards": 3, "products": 6, "lost_leases": 0}
+    assert rows == list(enumerate(LINKS, start=1))
+    assert [index for index, _, _ in results] == [1, 2, 3, 4, 5, 6]
+    assert all(error is None for _, _, error in results)
+    assert coordinator.stats["expired"] == 1 and coordinator.stats["requeued"] == 1
+    assert coordinator.stats["leases"] == 4 and coordinator.stats["completed"] == 6
+    assert coordinator.workers == {"stalled", "live"}
+
+
+def test_shard_leased_too_often_is_failed_and_late_results_are_ignored():
+    address = _address()
+    coordinator = ShardCoordinator(address, shard_size=2, lease_ttl=0.5, max_leases=1, linger=1.0)
+    rows, results = [], []
+    thread = _serve(coordinator, rows, results)
+
+    stalled = CoordinatorClient(address, connect_timeout=5)
+    lease = stalled.request({"op": "lease", "worker": "stalled"})
+    worker = ShardWorker(CoordinatorClient(address, connect_timeout=5), StubPool(), name="live")
+    worker.run()
+    # The stalled worker comes back after its products were failed
+    index, url = lease["items"][0]
+    stalled.request({"op": "result", "lease": lease["lease"], "index": index, "url": url,
+                     "row": {"Product number": url}, "error": None, "category": None})
+    stalled.close()
+    thread.join(timeout=10)
+
+    assert rows == list(enumerate(LINKS, start=1))[2:]
+    assert [index for index, _, _ in results] == [1, 2, 3, 4, 5, 6]
+    assert [error.category for _, _, error in results[:2]] == ["other", "other"]
+    assert coordinator.stats["failed"] == 2 and coordinator.stats["requeued"] == 0
+    assert coordinator.stats["duplicates"] == 1
+
+
+class FakeClient:
+    """Hands out one lease, then fails every request from ``fail_from`` on, like a coordinator that went away."""
+
+    def __init__(self, fail_from="result"):
+        self.fail_from = fail_from
+        self.sent = []
+        self.failing = False
+
+    def request(self, message):
+        self.failing = self.failing or message["op"] == self.fail_from
+        if self.failing:
+            raise ConnectionError("Coordinator closed the connection")
+        self.sent.append(message)
+        if message["op"] == "lease":
+            if any(sent["op"] == "complete" for sent in self.sent):
+                return {"done": True}
+            return {"lease": "L1", "items": [[1, LINKS[0]], [2, LINKS[1]]], "ttl": 60}
+        return {"ok": True}
+
+    def close(self):
+        pass
+
+
+def test_worker_stops_cleanly_when_the_coordinator_goes_away_mid_shard():
+    pool = StubPool()
+    stats = ShardWorker(FakeClient(fail_from="result"), pool, name="orphan").run()
+    assert pool.runs == [LINKS[:2]]
+    assert stats == {"shards": 0, "products": 0, "lost_leases": 0}
+
+    stats = ShardWorker(FakeClient(fail_from="complete"), StubPool(), name="orphan").run()
+    assert stats == {"shards": 0, "products": 2, "lost_leases": 0}
+
+
+def test_failing_local_state_does_not_drop_results():
+    def on_done(index, url, row, error):
+        raise OSError("database is locked")
+
+    client = FakeClient(fail_from=None)
+    stats = ShardWorker(client, StubPool(), name="local", on_done=on_done).run()
+    assert [sent["index"] for sent in client.sent if sent["op"] == "result"] == [2, 1]
+    assert stats == {"shards": 1, "products": 2, "lost_leases": 0}
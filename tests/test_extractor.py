@@ -0,0 +1,39 @@
+from extractor import build_row, extract_product, parse_reviews
+from fixture_server import SyntheticSite
+
+SITE = SyntheticSite(products=6, reviews=4)
+PRODUCT = SITE.products[0]
+URL = "http://fixture" + SITE.product_path(PRODUCT)
+HTML = SITE.pdp(PRODUCT["article"])
+
+
+def test_row_from_page_with_size_chart_and_reviews():
+    reviews = parse_reviews("".join(PRODUCT["reviews"]))
+    row = build_row(extract_product(HTML, size_chart_html=SITE.size_chart(PRODUCT), base_url=URL, reviews=reviews))
+    assert row["Product number"] == PRODUCT["article"]
+    assert list(row["Size info"]) == ["胸囲", "ウエスト", "着丈"]
+    assert row["Size info"]["胸囲"] == [{size: str(80 + 4 * i) for i, size in enumerate(PRODUCT["sizes"])}]
+    assert len(row["User Reviews"]) == len(PRODUCT["reviews"])
+    assert row["User Reviews"][0]["reviewer_id"] == "user0-0"
+
+
+def test_page_without_required_fields_gives_no_row():
+    assert build_row(extract_product("<html><body><h1>Not found</h1></body></html>", base_url=URL)) is None
+
+
+def test_fields_come_from_one_snapshot_of_the_rendered_page():
+    # Reviews and the size chart are rendered into the page the browser captured
+    chart_link = '<button data-auto-id="size-chart-link">'
+    rendered = HTML.replace('<section id="reviews-section"></section>',
+                            f'<section id="reviews-section">{"".join(PRODUCT["reviews"])}</section>')
+    rendered = rendered.replace(chart_link, SITE.size_chart(PRODUCT) + chart_link)
+    product = extract_product(rendered, base_url=URL)
+    assert product["product_number"] == PRODUCT["article"]
+    assert product["breadcrumb"] == "メンズ / Tシャツ"
+    assert product["product_title"] == PRODUCT["name"]
+    assert product["price"] == PRODUCT["price"]
+    assert product["title"] == f"{PRODUCT['name']} の特徴"
+    assert product["itemization"] == "• レギュラーフィット\n• 綿 100%\n• 生産国: ベトナム"
+    assert product["rating"] == str(PRODUCT["rating"])
+    assert len(product["reviews"]) == len(PRODUCT["reviews"])
+    assert list(product["size_info"]) == ["胸囲", "ウエスト", "着丈"]
@@ -0,0 +1,54 @@
+from failures import ELEMENT_MISSING, CircuitBreaker, ElementMissingError, RetryPolicy, classify
+from rate_control import BotWallError
+from worker_pool import ProductWorkerPool
+
+LINKS = [f"http://fixture/tee/BM{n:04d}.html" for n in range(1, 13)]
+
+
+class StubDriver:
+    def quit(self):
+        pass
+
+
+def _pool(scrape, breaker):
+    return ProductWorkerPool(StubDriver, scrape, recycle_policy={"prewarm": False, "max_rss_mb": 0},
+                             retry_policy=RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.01),
+                             breaker=breaker)
+
+
+def test_missing_fields_are_not_retried_in_the_run_and_do_not_trip_the_breaker():
+    calls = []
+
+    def scrape(driver, index, link):
+        calls.append(link)
+        if index % 3 == 0:
+            raise ElementMissingError(f"Price not found ({link})")
+        # Sold-out products: the page loads but a required field is missing
+        return None if index % 3 == 1 else {"Product number": link}
+
+    breaker = CircuitBreaker(threshold=0.5, window=10, min_requests=5, cooldown=60)
+    results = []
+    pool = _pool(scrape, breaker)
+    pool.run(LINKS, on_row=lambda index, row: None, on_done=lambda *result: results.append(result))
+
+    assert calls == LINKS
+    assert pool.retries == 0 and pool.failures == {ELEMENT_MISSING: 8}
+    assert breaker.stats()["trips"] == 0
+    assert [classify(error, row) for _, _, row, error in results].count(ELEMENT_MISSING) == 8
+
+
+def test_site_failures_are_retried_in_the_run():
+    attempts = {}
+
+    def scrape(driver, index, link):
+        attempts[link] = attempts.get(link, 0) + 1
+        if attempts[link] == 1:
+            raise BotWallError(link)
+        return {"Product number": link}
+
+    breaker = CircuitBreaker(threshold=0.5, window=10, min_requests=100, cooldown=60)
+    pool = _pool(scrape, breaker)
+    rows = pool.run(LINKS[:3])
+
+    assert rows == [{"Product number": link} for link in LINKS[:3]]
+    assert pool.retries == 3 and attempts == dict.fromkeys(LINKS[:3], 2)
@@ -0,0 +1,41 @@
+import pytest
+
+from extractor import build_row, extract_product_static
+from fixture_server import FixtureServer, SyntheticSite
+from http_client import HttpClient, HttpError
+
+SITE = SyntheticSite(products=6, reviews=4)
+PRODUCT = SITE.products[0]
+URL = "http://fixture" + SITE.product_path(PRODUCT)
+HTML = SITE.pdp(PRODUCT["article"])
+
+
+def test_static_extraction_reads_markup_and_fills_gaps_from_json_ld():
+    product = extract_product_static(HTML, base_url=URL)
+    assert product["product_number"] == PRODUCT["article"]
+    assert product["breadcrumb"] == "メンズ / Tシャツ"
+    assert product["category"] == PRODUCT["category"]
+    assert product["product_title"] == PRODUCT["name"]
+    assert product["price"] == PRODUCT["price"]
+    assert product["sizes"] == ", ".join(size for size in PRODUCT["sizes"] if size not in PRODUCT["unavailable"])
+    assert product["image_url"] == f"http://fixture/img/{PRODUCT['article']}.gif"
+    assert product["itemization"] == "• レギュラーフィット\n• 綿 100%\n• 生産国: ベトナム"
+    # Rating and review count are rendered client-side; they come from JSON-LD
+    assert product["rating"] == str(PRODUCT["rating"])
+    assert product["number_of_reviews"] == len(PRODUCT["reviews"])
+    assert product["variants"] == ["BM0000", "BM0001", "BM0002"]
+    assert product["style_card_links"] == [f"http://fixture/look/{look}" for look in PRODUCT["looks"]]
+    assert product["size_info"] == {} and product["reviews"] == []
+
+
+def test_product_pages_are_fetched_over_one_keep_alive_connection():
+    with FixtureServer(SyntheticSite(products=6, reviews=4)) as server:
+        client = HttpClient()
+        pages = [client.get_text(server.base_url + SITE.product_path(product)) for product in SITE.products[:3]]
+        with pytest.raises(HttpError):
+            client.get_text(server.base_url + "/tee-0/UNKNOWN.html")
+        client.close()
+    rows = [build_row(extract_product_static(page, base_url=server.base_url + SITE.product_path(product)))
+            for page, product in zip(pages, SITE.products)]
+    assert [row["Product number"] for row in rows] == ["BM0000", "BM0001", "BM0002"]
+    assert client.stats["requests"] == 4 and client.stats["connections"] == 1
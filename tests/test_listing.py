@@ -0,0 +1,58 @@
+from urllib.parse import parse_qs, urlsplit
+
+from fixture_server import LISTING_PATH, SyntheticSite
+from listing import ListingDiscovery
+
+FIRST_URL = "http://fixture" + LISTING_PATH
+
+
+def _offset(url):
+    return int(parse_qs(urlsplit(url).query).get("start", ["0"])[0])
+
+
+def _discovery(failing, fallback=True, past_end=None):
+    site = SyntheticSite(products=200, page_size=12)
+
+    def fetch(url):
+        if _offset(url) >= 200 and past_end == "404":
+            raise OSError("HTTP 404")
+        # past_end == "repeat": like sites that answer any later offset with the last page
+        return site.listing(min(_offset(url), 192) if past_end == "repeat" else _offset(url))
+
+    def http_fetch(url):
+        if _offset(url) in failing:
+            raise OSError("HTTP 429")
+        return fetch(url)
+
+    discovery = ListingDiscovery(http_fetch, fallback_fetch=fetch if fallback else None)
+    return discovery, discovery.discover(FIRST_URL, fetch(FIRST_URL))
+
+
+def test_whole_listing_is_discovered_and_complete():
+    discovery, links = _discovery(failing=())
+    assert len(links) == 200
+    assert discovery.complete
+
+
+def test_failed_window_is_recovered_by_the_fallback_and_discovery_continues():
+    discovery, links = _discovery(failing=range(36, 73))
+    assert len(links) == 200
+    assert discovery.complete
+
+
+def test_unrecoverable_window_is_not_reported_complete():
+    discovery, links = _discovery(failing=range(36, 73), fallback=False)
+    assert len(links) == 36
+    assert not discovery.complete
+
+
+def test_page_without_next_link_ends_a_listing_that_answers_404_past_its_end():
+    discovery, links = _discovery(failing=(), fallback=False, past_end="404")
+    assert len(links) == 200
+    assert discovery.complete and not discovery.failed_pages
+
+
+def test_page_without_next_link_ends_a_listing_that_repeats_its_last_page():
+    discovery, links = _discovery(failing=(), past_end="repeat")
+    assert len(links) == 200
+    assert discovery.complete
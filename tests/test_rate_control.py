@@ -0,0 +1,24 @@
+from fixture_server import SyntheticSite
+from rate_control import is_bot_wall
+
+SITE = SyntheticSite(products=3)
+PDP = SITE.pdp(SITE.products[0]["article"])
+
+
+def test_product_page_is_not_a_bot_wall():
+    assert not is_bot_wall(PDP)
+    assert not is_bot_wall(SITE.products[0]["name"])
+
+
+def test_product_page_with_captcha_script_and_access_denied_text_is_not_a_bot_wall():
+    page = PDP.replace("</body>", '<script src="https://www.google.com/recaptcha/api.js"></script>'
+                                  '<div class="g-recaptcha"></div><p>Access denied for this coupon code.</p></body>')
+    assert "</body>" in PDP and not is_bot_wall(page)
+
+
+def test_interstitials_are_bot_walls():
+    assert is_bot_wall("Access Denied")
+    assert is_bot_wall("<html><head><title>Just a moment...</title></head><body></body></html>")
+    assert is_bot_wall('<html><head><title>adidas</title></head><body><div id="px-captcha"></div></body></html>')
+    assert is_bot_wall('<html><body><iframe id="main-iframe" src="/_Incapsula_Resource?SWUDNSAI=31"></iframe>'
+                       '</body></html>')
@@ -0,0 +1,68 @@
+from extractor import parse_reviews
+from fixture_server import SyntheticSite
+from review_harvester import harvest_reviews, review_key
+
+SITE = SyntheticSite(products=3, reviews=12, review_batch=4, seed=5)
+# Ten reviews: three batches
+REVIEWS = SITE.products[0]["reviews"]
+
+
+class ReviewPageDriver:
+    """Stands in for the PDP: LOAD_ALL_REVIEWS_JS pages through the fixture's review batches.
+
+    Each "load more" click renders the next ``review_batch`` reviews, like the
+    fixture page's review endpoint; paging stops when the button is gone,
+    at the click limit, or once a known review and enough new ones are shown.
+    """
+
+    def __init__(self, reviews, batch):
+        self.reviews = reviews
+        self.batch = batch
+        self.script_timeout = None
+
+    def set_script_timeout(self, seconds):
+        self.script_timeout = seconds
+
+    def execute_async_script(self, script, max_clicks, batch_timeout_ms, known_keys, expected_new):
+        assert "reviews-load-more" in script
+        known = set(known_keys)
+        shown, clicks, reason = 0, 0, None
+        while reason is None:
+            rendered = parse_reviews("".join(self.reviews[:shown]))
+            fresh = [review for review in rendered if review_key(review) not in known]
+            if shown >= len(self.reviews):
+                reason = "exhausted"
+            elif known and len(fresh) < len(rendered) and len(fresh) >= expected_new:
+                reason = "known"
+            elif clicks >= max_clicks:
+                reason = "max_clicks"
+            else:
+                shown = min(len(self.reviews), shown + self.batch)
+                clicks += 1
+        return {"clicks": clicks, "count": shown, "reason": reason, "html": "".join(self.reviews[:shown])}
+
+
+def test_every_batch_is_loaded_and_parsed_in_one_pass():
+    assert len(REVIEWS) == 10
+    driver = ReviewPageDriver(REVIEWS, SITE.review_batch)
+    reviews, stats = harvest_reviews(driver, total_timeout=30)
+    assert reviews == parse_reviews("".join(REVIEWS))
+    assert all(1 <= review["rating"] <= 5 for review in reviews)
+    assert stats["stop_reason"] == "exhausted" and stats["parsed"] == stats["new"] == len(REVIEWS)
+    assert stats["clicks"] == 3
+    assert driver.script_timeout == 30
+
+
+def test_known_reviews_stop_paging_and_are_left_out():
+    all_reviews = parse_reviews("".join(REVIEWS))
+    # The two newest reviews arrived since the last run
+    known = [review_key(review) for review in all_reviews[2:]]
+    reviews, stats = harvest_reviews(ReviewPageDriver(REVIEWS, SITE.review_batch), known_keys=known, expected_new=2)
+    assert reviews == all_reviews[:2]
+    assert stats["stop_reason"] == "known" and stats["clicks"] == 1 and stats["new"] == 2
+
+
+def test_click_limit_returns_a_partial_harvest():
+    reviews, stats = harvest_reviews(ReviewPageDriver(REVIEWS, SITE.review_batch), max_clicks=1)
+    assert len(reviews) == SITE.review_batch
+    assert stats["stop_reason"] == "max_clicks"
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from crawl_state import CrawlStateStore
+from sinks import export_excel, iter_rows
+
+pytest.importorskip("pyarrow")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINKS = [f"http://fixture/tee/BM{n:04d}.html" for n in range(150)]
+
+# A crawl that streams rows to Parquet and dies without closing anything
+CRASHING_CRAWL = textwrap.dedent("""
+    import os, sys
+    sys.path.insert(0, {root!r})
+    from crawl_state import CrawlStateStore
+    from sinks import ParquetSink, when_durable
+
+    links = [f"http://fixture/tee/BM{{n:04d}}.html" for n in range(150)]
+    state = CrawlStateStore({db!r})
+    state.begin(resume=False)
+    state.add_discovered(links)
+    sink = ParquetSink({output!r}, row_group_size=100)
+    for url in links:
+        row = {{"Product number": url[-11:-5], "Number of reviews": 3}}
+        sink.write(row)
+        when_durable([sink], lambda url=url, row=row: state.mark_done(url, row))
+    os._exit(1)
+""")
+
+
+def test_crash_keeps_flushed_rows_done_and_buffered_rows_pending(tmp_path):
+    db, output = str(tmp_path / "state.sqlite"), str(tmp_path / "products.parquet")
+    script = CRASHING_CRAWL.format(root=ROOT, db=db, output=output)
+    assert subprocess.run([sys.executable, "-c", script]).returncode == 1
+
+    state = CrawlStateStore(db)
+    assert state.begin(resume=True)
+    # The first row group reached disk; the 50 buffered rows were lost and are extracted again
+    assert state.pending() == LINKS[100:]
+    state.close()
+    rows = list(iter_rows(output))
+    assert [row["Product number"] for row in rows] == [url[-11:-5] for url in LINKS[:100]]
+    assert export_excel([output], str(tmp_path / "products.xlsx")) == 100
+
+
+def test_export_skips_damaged_outputs(tmp_path):
+    unfinished = tmp_path / "old.parquet"
+    unfinished.write_bytes(b"PAR1" + b"\0" * 64)
+    rows_file = tmp_path / "products.jsonl"
+    rows_file.write_text('{"Product number": "BM0001"}\n{"Product num', encoding="utf-8")
+    assert list(iter_rows(str(unfinished))) == []
+    assert export_excel([str(unfinished), str(rows_file)], str(tmp_path / "products.xlsx")) == 1
@@ -0,0 +1,32 @@
+from extractor import parse_size_chart
+from fixture_server import SyntheticSite
+from size_chart import SizeChartCache, parse_size_chart_fast, size_chart_identity_from_html
+
+SITE = SyntheticSite(products=6)
+
+
+def test_identity_includes_size_chart_link_and_fit_line():
+    html = SITE.pdp(SITE.products[0]["article"])
+    identity = size_chart_identity_from_html(html)
+    assert identity.endswith("|レギュラーフィット")
+    assert size_chart_identity_from_html(html.replace("レギュラーフィット", "スリムフィット")) != identity
+    linked = html.replace('data-auto-id="size-chart-link"', 'data-auto-id="size-chart-link" data-chart="tops-m"')
+    assert "data-chart=tops-m" in size_chart_identity_from_html(linked)
+
+
+def test_identical_charts_are_parsed_once():
+    cache = SizeChartCache()
+    chart = SITE.size_chart(SITE.products[0])
+    first = cache.store(None, chart)
+    assert cache.store(None, chart.replace("</tr>", "</tr>\n  ")) == first
+    assert cache.stats()["parsed"] == 1 and cache.lookup(None) is None
+
+
+def test_fast_and_soup_parsers_agree():
+    chart = SITE.size_chart(SITE.products[0])
+    assert parse_size_chart_fast(chart) == parse_size_chart(chart)
+    # Labels and values split over inline elements and whitespace, as on the live modal
+    marked_up = chart.replace("<th>S</th>", "<th>S <span>(JP)</span>\n</th>").replace(
+        "<td>84</td>", "<td> 84 <!-- cm --><span>cm</span></td>")
+    assert parse_size_chart_fast(marked_up) == parse_size_chart(marked_up)
+    assert parse_size_chart_fast(marked_up)["胸囲"][0]["S(JP)"] == "84cm"
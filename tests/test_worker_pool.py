@@ -0,0 +1,60 @@
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException
+
+from failures import RetryPolicy
+from worker_pool import ProductWorkerPool
+
+LINKS = [f"http://fixture/tee/BM{n:04d}.html" for n in range(1, 11)]
+
+
+class StubDriver:
+    def quit(self):
+        pass
+
+
+def _pool(scrape, worker_count=3):
+    return ProductWorkerPool(StubDriver, scrape, worker_count=worker_count,
+                             recycle_policy={"prewarm": False, "max_rss_mb": 0},
+                             retry_policy=RetryPolicy(max_attempts=2, base_delay=0.05, max_delay=0.05))
+
+
+def test_rows_are_released_in_link_order_while_workers_finish_out_of_order():
+    workers = set()
+
+    def scrape(driver, index, link):
+        workers.add(threading.current_thread().name)
+        # Earlier links take longest, so later ones finish first
+        time.sleep(0.02 * (len(LINKS) - index))
+        return {"Product number": link}
+
+    released, done = [], []
+    pool = _pool(scrape)
+    pool.run(LINKS, on_row=lambda index, row: released.append((index, row["Product number"])),
+             on_done=lambda index, link, row, error: done.append(index))
+
+    assert released == list(enumerate(LINKS, start=1))
+    assert done == list(range(1, len(LINKS) + 1))
+    assert len(workers) == 3 and pool.completed == len(LINKS)
+
+
+def test_failed_product_is_retried_and_keeps_its_place():
+    attempts = {}
+
+    def scrape(driver, index, link):
+        attempts[link] = attempts.get(link, 0) + 1
+        if index in (2, 5) and attempts[link] == 1:
+            raise TimeoutException("page load timed out")
+        if index == 7:
+            raise TimeoutException("page load timed out")
+        return {"Product number": link}
+
+    results = []
+    pool = _pool(scrape, worker_count=2)
+    rows = pool.run(LINKS, on_done=lambda index, link, row, error: results.append((index, row is not None)))
+
+    assert [row["Product number"] for row in rows] == LINKS[:6] + LINKS[7:]
+    assert results == [(index, index != 7) for index in range(1, len(LINKS) + 1)]
+    assert attempts[LINKS[1]] == 2 and attempts[LINKS[6]] == 2
+    assert pool.retries == 3 and pool.failed == 1 and pool.failures == {"timeout": 4}
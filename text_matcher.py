@@ -0,0 +1,76 @@
+import unicodedata
+from collections import Counter, namedtuple
+from difflib import SequenceMatcher
+
+MatchResult = namedtuple("MatchResult", ["label", "found", "exact", "score", "position"])
+
+
+def normalize_text(text):
+    """NFKC-normalize and collapse whitespace, the same way page text and labels are compared."""
+    return unicodedata.normalize("NFKC", " ".join((text or "").split()))
+
+
+class PageTextIndex:
+    """Character n-gram index over one page's text for exact and fuzzy label lookups.
+
+    The page is indexed once; each query only touches the positions of the
+    label's own n-grams, and fuzzy scores are computed against a window the
+    size of the label instead of against the whole page.
+    """
+
+    def __init__(self, text, n=2):
+        self.text = normalize_text(text)
+        self.n = n
+        self._postings = {}
+        for position in range(len(self.text) - n + 1):
+            self._postings.setdefault(self.text[position:position + n], []).append(position)
+
+    def _grams(self, label):
+        return [(offset, label[offset:offset + self.n]) for offset in range(len(label) - self.n + 1)]
+
+    def find(self, label):
+        """Position of an exact occurrence of ``label`` (already normalized), or -1."""
+        if len(label) < self.n:
+            return self.text.find(label)
+        # Verify only the occurrences of the label's rarest n-gram
+        offset, gram = min(self._grams(label), key=lambda item: len(self._postings.get(item[1], ())))
+        for position in self._postings.get(gram, ()):
+            start = position - offset
+            if start >= 0 and self.text.startswith(label, start):
+                return start
+        return -1
+
+    def _candidate_starts(self, label, limit):
+        """Window starts where the most label n-grams line up."""
+        votes = Counter()
+        for offset, gram in self._grams(label):
+            for position in self._postings.get(gram, ()):
+                votes[max(0, position - offset)] += 1
+        return [start for start, _ in votes.most_common(limit)]
+
+    def similarity(self, label, candidates=5):
+        """Best local-window similarity of ``label`` and its position (score 0.0 if nothing aligns)."""
+        if len(label) < self.n:
+            return (1.0, self.text.find(label)) if label in self.text else (0.0, -1)
+        best_score, best_position = 0.0, -1
+        slack = min(8, max(1, len(label) // 4))
+        for start in self._candidate_starts(label, candidates):
+            for shift in range(-slack, slack + 1):
+                window_start = max(0, start + shift)
+                window = self.text[window_start:window_start + len(label) + slack]
+                score = SequenceMatcher(None, label, window).ratio()
+                if score > best_score:
+                    best_score, best_position = score, window_start
+        return best_score, best_position
+
+    def match(self, label, threshold=0.75):
+        normalized = normalize_text(label.strip())
+        position = self.find(normalized)
+        if position >= 0:
+            return MatchResult(label, True, True, 1.0, position)
+        score, position = self.similarity(normalized)
+        return MatchResult(label, score > threshold, False, round(score, 3), position)
+
+    def match_many(self, labels, threshold=0.75):
+        """Check many expected labels against the same page."""
+        return [self.match(label, threshold) for label in labels]
@@ -0,0 +1,184 @@
+import heapq
+import logging
+import queue
+import threading
+import time
+
+from driver_manager import DriverLifecycle
+from failures import PRODUCT_FAULTS, classify
+
+logger = logging.getLogger()
+
+
+class ProductWorkerPool:
+    """Scrape product pages with N browser workers pulling from a shared queue.
+
+    Each worker owns a DriverLifecycle around ``driver_factory`` (configured
+    by ``recycle_policy``) and calls ``scrape(driver, index, product_link)``
+    for every link it takes. With ``lazy_driver`` scrape gets a
+    ``get_driver()`` callable instead, and a browser is only started for
+    products that ask for one. Rows are released strictly in product-link
+    order, no matter which worker finished first: to ``on_row`` as soon as
+    they can be (and then dropped from memory), or collected and returned by
+    ``run`` when no ``on_row`` is given.
+
+    Failures are classified (failures.classify); with a ``retry_policy`` a
+    retryable product goes on a deferred queue and is tried again after an
+    exponential backoff, and a ``breaker`` (failures.CircuitBreaker) holds
+    every worker back while the failure rate is too high.
+    """
+
+    def __init__(self, driver_factory, scrape, worker_count=1, recycle_policy=None, log_error=None,
+                 lazy_driver=False, retry_policy=None, breaker=None):
+        self.driver_factory = driver_factory
+        self.scrape = scrape
+        self.lazy_driver = lazy_driver
+        self.retry_policy = retry_policy
+        self.breaker = breaker
+        self.worker_count = max(1, int(worker_count))
+        self.recycle_policy = recycle_policy or {}
+        self.log_error = log_error or logger.error
+
+        self._tasks = queue.Queue()
+        self._deferred = []
+        self._in_progress = 0
+        self._lock = threading.Lock()
+        self._results = {}
+        self._rows = []
+        self._next_index = 1
+        self._on_row = None
+        self._on_done = None
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.failures = {}
+        self.recycles = {}
+
+    def run(self, product_links, on_row=None, on_done=None):
+        """Scrape every link; return the rows in product-link order unless ``on_row`` consumes them.
+
+        ``on_done(index, product_link, row, error)`` is called for every product,
+        successful or not, in the same order and after its row reached ``on_row``.
+        """
+        self._on_row = on_row
+        self._on_done = on_done
+        self._rows = []
+        self._results = {}
+        self._next_index = 1
+        self._deferred = []
+        for index, product_link in enumerate(product_links, start=1):
+            self._tasks.put((index, product_link, 1))
+
+        started = time.monotonic()
+        workers = [
+            threading.Thread(target=self._work, args=(worker_id,), name=f"product-worker-{worker_id}", daemon=True)
+            for worker_id in range(1, min(self.worker_count, len(product_links)) + 1)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        # Flush anything still held back (only possible if a worker thread died)
+        with self._lock:
+            self._release(force=True)
+        elapsed = time.monotonic() - started
+        logger.info(f"Worker pool: {self.completed} done, {self.failed} failed in {elapsed:.1f}s "
+                    f"with {len(workers)} workers, {self.retries} retries, failures {self.failures}, "
+                    f"driver recycles {self.recycles}")
+        return self._rows
+
+    def _next_task(self):
+        """The next due task, waiting for deferred retries; None once nothing is left anywhere."""
+        while True:
+            with self._lock:
+                if self._deferred and self._deferred[0][0] <= time.monotonic():
+                    task = heapq.heappop(self._deferred)[1:]
+                else:
+                    try:
+                        task = self._tasks.get_nowait()
+                    except queue.Empty:
+                        task = None
+                if task is not None:
+                    self._in_progress += 1
+                    return task
+                if not self._deferred and not self._in_progress:
+                    return None
+                # A retry is due later, or a running product may still be deferred
+                delay = self._deferred[0][0] - time.monotonic() if self._deferred else 1.0
+            time.sleep(min(max(delay, 0.05), 1.0))
+
+    def _work(self, worker_id):
+        lifecycle = DriverLifecycle(self.driver_factory, **self.recycle_policy)
+        try:
+            while True:
+                task = self._next_task()
+                if task is None:
+                    break
+                index, product_link, attempt = task
+                if self.breaker is not None:
+                    self.breaker.wait()
+
+                row = None
+                error = None
+                task_driver = []
+
+                def get_driver():
+                    if not task_driver:
+                        task_driver.append(lifecycle.acquire())
+                    return task_driver[0]
+
+                try:
+                    row = self.scrape(get_driver if self.lazy_driver else get_driver(), index, product_link)
+                except Exception as e:
+                    # Isolate the failure to this product; the lifecycle decides if the browser survives it
+                    error = e
+                    self.log_error(f"[worker {worker_id}] Failed to open ({product_link}): {e}")
+                if task_driver:
+                    lifecycle.report(error)
+
+                category = classify(error, row)
+                if self.breaker is not None:
+                    self.breaker.record(category is None or category in PRODUCT_FAULTS)
+                with self._lock:
+                    self._in_progress -= 1
+                    if category is not None:
+                        self.failures[category] = self.failures.get(category, 0) + 1
+                    if category is not None and self.retry_policy is not None \
+                            and self.retry_policy.should_retry(category, attempt):
+                        delay = self.retry_policy.delay(attempt)
+                        self.retries += 1
+                        heapq.heappush(self._deferred, (time.monotonic() + delay, index, product_link, attempt + 1))
+                        logger.info(f"[worker {worker_id}] Retrying ({product_link}) in {delay:.0f}s "
+                                    f"after {category} (attempt {attempt})")
+                        continue
+                    if row:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+                    self._results[index] = (product_link, row, error)
+                    self._release()
+        finally:
+            lifecycle.close()
+            with self._lock:
+                for reason, count in lifecycle.recycles.items():
+                    self.recycles[reason] = self.recycles.get(reason, 0) + count
+
+    def _release(self, force=False):
+        """Hand finished rows to on_row in index order (call with the lock held)."""
+        while self._next_index in self._results or (force and self._results and
+                                                    self._next_index <= max(self._results)):
+            product_link, row, error = self._results.pop(self._next_index, (None, None, None))
+            if row and self._on_row:
+                try:
+                    self._on_row(self._next_index, row)
+                except Exception as e:
+                    self.log_error(f"Failed to handle row {self._next_index}: {e}")
+            elif row:
+                self._rows.append(row)
+            if product_link and self._on_done:
+                try:
+                    self._on_done(self._next_index, product_link, row, error)
+                except Exception as e:
+                    self.log_error(f"Failed to record result of ({product_link}): {e}")
+            self._next_index += 1